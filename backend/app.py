@@ -1,6 +1,7 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from datetime import datetime, timedelta
+import math
 import random
 import os
 from dotenv import load_dotenv
@@ -9,7 +10,18 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from neo4j_service import neo4j_service
+from station_repository import EmbeddedRepository, DEFAULT_STATIONS_FILE
 from train_tracker import TrainTracker
+from station_index import StationIndex, STATION_FIELDS, project
+from station_store import StationStore
+from train_columns import TrainColumns
+from kpi_aggregates import FleetAggregates
+from station_search import StationSearchEngine
+from spatial_index import MAX_CLUSTER_ZOOM, SpatialIndex
+from response_cache import ResponseCache
+from route_graph import RouteGraph, PathCost, SegmentOverlay, WEIGHTS
+from live_feed import LiveFeed
+from urllib.parse import urlencode
 import threading
 import json
 import logging
@@ -24,9 +36,28 @@ class KPICalculator:
     def __init__(self):
         pass
     
-    def calculate_kpis(self, trains_data):
-        """Calculate key performance indicators from train data"""
-        if not trains_data:
+    def calculate_totals(self, trains_data):
+        """Sum the raw counters every KPI is derived from"""
+        return {
+            "total": len(trains_data),
+            "on_time": sum(1 for train in trains_data if train.get('delay', 0) == 0),
+            "active": sum(1 for train in trains_data if train.get('status') == 'running'),
+            "delay": sum(train.get('delay', 0) for train in trains_data)
+        }
+    
+    def adjust_totals(self, totals, before, after):
+        """Return totals with one train's contribution swapped from `before` to `after`"""
+        adjusted = dict(totals)
+        for train, sign in ((before, -1), (after, 1)):
+            adjusted["on_time"] += sign * (1 if train.get('delay', 0) == 0 else 0)
+            adjusted["active"] += sign * (1 if train.get('status') == 'running' else 0)
+            adjusted["delay"] += sign * train.get('delay', 0)
+        return adjusted
+    
+    def kpis_from_totals(self, totals):
+        """Turn raw counters into the KPI payload"""
+        total_trains = totals["total"]
+        if not total_trains:
             return {
                 "total_trains": 0,
                 "on_time_trains": 0,
@@ -36,23 +67,24 @@ class KPICalculator:
                 "active_trains": 0
             }
         
-        total_trains = len(trains_data)
-        on_time_trains = sum(1 for train in trains_data if train.get('delay', 0) == 0)
-        delayed_trains = total_trains - on_time_trains
-        active_trains = sum(1 for train in trains_data if train.get('status') == 'running')
-        
-        total_delay = sum(train.get('delay', 0) for train in trains_data)
-        average_delay = total_delay / total_trains if total_trains > 0 else 0
-        punctuality_rate = (on_time_trains / total_trains * 100) if total_trains > 0 else 0
+        on_time_trains = totals["on_time"]
+        average_delay = totals["delay"] / total_trains
+        punctuality_rate = on_time_trains / total_trains * 100
         
         return {
             "total_trains": total_trains,
             "on_time_trains": on_time_trains,
-            "delayed_trains": delayed_trains,
+            "delayed_trains": total_trains - on_time_trains,
             "average_delay_minutes": round(average_delay, 2),
             "punctuality_rate": round(punctuality_rate, 2),
-            "active_trains": active_trains
+            "active_trains": totals["active"]
         }
+    
+    def calculate_kpis(self, trains_data):
+        """Calculate key performance indicators from train data (dicts or TrainColumns)"""
+        if isinstance(trains_data, TrainColumns):
+            return trains_data.kpis()
+        return self.kpis_from_totals(self.calculate_totals(trains_data))
 
 class DisruptionHandler:
     def __init__(self):
@@ -95,6 +127,9 @@ else:
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Pre-serialized responses for /api/stations and /api/routes
+response_cache = ResponseCache(encode=app.json.dumps)
+
 # Dummy train data
 TRAINS_DATA = [
     {
@@ -159,6 +194,9 @@ TRAINS_DATA = [
     }
 ]
 
+# Running KPI counters over TRAINS_DATA; every mutation below must call fleet_stats.update()
+fleet_stats = FleetAggregates(TRAINS_DATA)
+
 # Route data for visualization
 ROUTES_DATA = [
     {
@@ -185,35 +223,10 @@ ROUTES_DATA = [
     }
 ]
 
-# Load station data from Neo4j AuraDB
-def load_stations_from_neo4j():
-    """Load station data from Neo4j AuraDB"""
-    print("🔗 Connecting to Neo4j AuraDB...")
-    
-    # Test connection first
-    if not neo4j_service.test_connection():
-        print("❌ Failed to connect to Neo4j AuraDB, using default stations")
-        return get_default_stations()
-    
-    print("✅ Connected to Neo4j AuraDB")
-    
-    try:
-        # Fetch all stations from Neo4j
-        stations = neo4j_service.get_stations()
-        
-        if not stations:
-            print("⚠️  No stations found in Neo4j, using default stations")
-            return get_default_stations()
-        
-        print(f"✅ Loaded {len(stations)} stations from Neo4j AuraDB")
-        return stations
-        
-    except Exception as e:
-        print(f"⚠️  Error loading stations from Neo4j: {e}, using default stations")
-        return get_default_stations()
-
+# Stations are loaded at startup (below): from the station store snapshot of a remote backend, else from the
+# configured backend, else from the embedded station file; these four are the last resort if even that fails
 def get_default_stations():
-    """Default station data if CSV loading fails"""
+    """Built-in stations served when neither the backend nor the embedded station file yields any"""
     return [
         {
             "id": "NDLS",
@@ -253,47 +266,181 @@ def get_default_stations():
         }
     ]
 
-# Load station data
-STATIONS_DATA = load_stations_from_neo4j()
+def station_position(station_code):
+    """Resolve a station code to (lat, lng), or None if it has no known location"""
+    # Read from the spatial index's coordinate table; no station dict is built
+    row = station_index.row_of(station_code)
+    return station_spatial.coordinates(row) if row is not None else None
+
+def lookup_station_coordinates(station_code):
+    """Resolve a station code to {'name', 'lat', 'lng'} for the train tracker"""
+    coords = station_position(station_code)
+    if not coords:
+        return None
+    station = station_index.get(station_code)
+    return {'name': station.get('name', station_code), 'lat': coords[0], 'lng': coords[1]}
+
+if train_tracker:
+    train_tracker.station_lookup = lookup_station_coordinates
+
+# Encoded /api/trains/live bodies for the latest position snapshots
+live_response_cache = ResponseCache(encode=app.json.dumps, max_entries=32)
+
+# /api/trains/live/stream deltas follow the tracker's position clock
+live_feed = LiveFeed(train_tracker.next_snapshot, encode=app.json.dumps) if train_tracker else None
+
+# Directory of memory-mapped station store files shared by every worker process;
+# the newest file is also the startup snapshot of the last stations and routes loaded
+STATION_STORE_DIR = os.getenv('STATION_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'station_store'))
+
+def reload_stations(store):
+    """Rebuild the shared station index, search and spatial indexes over a fresh StationStore"""
+    global station_index, station_search, station_spatial
+    index = StationIndex(store)
+    search = StationSearchEngine(index)
+    spatial = SpatialIndex(index)
+    # Swap the finished structures in together so requests never see a half-built set
+    station_index, station_search, station_spatial = index, search, spatial
+    response_cache.invalidate('stations')
+    if train_tracker:
+        # Train curves were built from the old station coordinates
+        train_tracker.reset_trajectories()
+        response_cache.invalidate('trajectories')
+    return index
+
+# In-process graph of ROUTE relationships used for rerouting
+route_graph = RouteGraph()
+
+def create_embedded_repository():
+    """EmbeddedRepository over EMBEDDED_STATIONS_FILE and, if set, EMBEDDED_ROUTES_FILE"""
+    routes_path = os.getenv('EMBEDDED_ROUTES_FILE') or None
+    if not routes_path:
+        logger.warning("⚠️ EMBEDDED_ROUTES_FILE not set: the embedded graph has no ROUTE edges, rerouting is unavailable")
+    return EmbeddedRepository.from_files(os.getenv('EMBEDDED_STATIONS_FILE', DEFAULT_STATIONS_FILE), routes_path)
+
+def create_station_repository():
+    """
+    Pick the station/route storage backend from STATION_BACKEND
+
+    'neo4j' (default) queries AuraDB; 'embedded' builds an in-memory graph from
+    EMBEDDED_STATIONS_FILE (CSV/JSON) and the optional EMBEDDED_ROUTES_FILE
+    """
+    backend = os.getenv('STATION_BACKEND', 'neo4j').lower()
+    if backend == 'embedded':
+        return create_embedded_repository()
+    if backend != 'neo4j':
+        logger.warning(f"⚠️ Unknown STATION_BACKEND '{backend}', using neo4j")
+    return neo4j_service
+
+station_repository = create_station_repository()
+
+def refresh_stations():
+    """
+    Reload stations and routes from the storage backend and write them to the shared station store
+
+    Keeps the data already loaded when the backend is unreachable or has no stations.
+
+    Returns:
+        True if fresh data was loaded
+    """
+    if not station_repository.test_connection():
+        logger.warning(f"⚠️ {station_repository.name} unreachable, keeping the loaded stations")
+        return False
+    # Plan every registered query once so the first real requests hit cached plans
+    station_repository.warm_up()
+    stations = station_repository.get_stations()
+    if not stations:
+        logger.warning(f"⚠️ No stations found in {station_repository.name}, keeping the loaded stations")
+        return False
+    edges = station_repository.get_route_edges()
+    try:
+        # One write serves both as the workers' shared mmap and as the next startup's snapshot
+        store = StationStore.shared(stations, STATION_STORE_DIR, edges=edges, source=station_repository.name)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not write station store ({e}), keeping it in process memory")
+        store = StationStore.from_stations(stations, edges, source=station_repository.name)
+    reload_stations(store)
+    route_graph.load(edges, station_position)
+    return True
+
+def load_fallback_stations():
+    """
+    Serve the embedded station file while the configured backend is unavailable
+
+    The data is kept in process memory only, so the next startup still prefers a snapshot
+    of the configured backend; get_default_stations() is the last resort if the file fails to load.
+    """
+    try:
+        fallback = create_embedded_repository()
+        stations, edges = fallback.get_stations(), fallback.get_route_edges()
+    except (OSError, ValueError) as e:
+        logger.error(f"❌ Failed to load the embedded station file: {e}")
+        stations, edges = [], []
+    if not stations:
+        stations = get_default_stations()
+    reload_stations(StationStore.from_stations(stations, edges, source=EmbeddedRepository.name))
+    route_graph.load(edges, station_position)
+
+def missing_routes_error():
+    """Why rerouting cannot run right now, or None once ROUTE edges are loaded"""
+    if len(route_graph):
+        return None
+    if station_repository.name == EmbeddedRepository.name:
+        return "No ROUTE data loaded; set EMBEDDED_ROUTES_FILE to reroute with the embedded backend"
+    return f"No ROUTE data loaded from {station_repository.name}"
+
+# Start from the last store a remote backend produced, mapped as-is, and refresh in the background;
+# otherwise load from the backend (or the defaults) before serving
+_snapshot = StationStore.latest(STATION_STORE_DIR) if station_repository.remote else None
+if _snapshot is not None and _snapshot.source == station_repository.name:
+    reload_stations(_snapshot)
+    route_graph.load(_snapshot.edges(), station_position)
+    print(f"✅ Loaded {len(_snapshot)} stations from snapshot saved {_snapshot.saved_at.isoformat()}")
+    threading.Thread(target=refresh_stations, name='station-refresh', daemon=True).start()
+elif not refresh_stations():
+    print(f"❌ Failed to load stations from {station_repository.name}, using the embedded station file")
+    load_fallback_stations()
+del _snapshot
+
+def parse_point(args):
+    """
+    Read 'lat' and 'lng' query parameters
+
+    Raises:
+        KeyError: If either is missing
+        ValueError: Unless lat is finite in [-90, 90] and lng is finite in [-180, 180]
+    """
+    lat = float(args['lat'])
+    lng = float(args['lng'])
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        raise ValueError("lat must be within [-90, 90] and lng within [-180, 180]")
+    return lat, lng
+
+def parse_bbox(value):
+    """Parse 'min_lat,min_lng,max_lat,max_lng' into a tuple of floats"""
+    parts = [float(p) for p in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError("bbox must be min_lat,min_lng,max_lat,max_lng")
+    if not all(math.isfinite(p) for p in parts):
+        raise ValueError("bbox values must be finite numbers")
+    return tuple(parts)
 
 # ==========================
 # What-if: Rerouting helpers
 # ==========================
-def mark_route_failed_in_neo4j(train: str, from_station: str, to_station: str):
-    """Mark a ROUTE relationship for a given train and segment as FAILED (soft-fail)."""
-    if not neo4j_service.driver:
-        raise RuntimeError("Neo4j driver not initialized")
-
-    cypher = (
-        "MATCH (s1:Station {code:$from_station})-[r:ROUTE {train:$train}]->(s2:Station {code:$to_station})\n"
-        "SET r.status = 'FAILED'\n"
-        "RETURN r"
-    )
-    with neo4j_service.driver.session() as session:
-        result = session.run(cypher, train=train, from_station=from_station, to_station=to_station)
-        return [record["r"] for record in result]
-
-
-def get_shortest_open_path(current_station: str, destination_station: str, max_hops: int = 20):
-    """Compute a shortest path using ROUTE as bidirectional and only OPEN/null status segments."""
-    if not neo4j_service.driver:
-        raise RuntimeError("Neo4j driver not initialized")
-
-    cypher = (
-        f"MATCH (src:Station {{code:$current}}), (dst:Station {{code:$destination}})\n"
-        f"MATCH p = (src)-[:ROUTE*1..{max_hops}]-(dst)\n"
-        f"WHERE ALL(r IN relationships(p) WHERE r.status IS NULL OR r.status='OPEN')\n"
-        f"WITH p, length(p) AS hops\n"
-        f"ORDER BY hops ASC\n"
-        f"RETURN [n IN nodes(p) | n.code] AS path\n"
-        f"LIMIT 1"
-    )
-
-    with neo4j_service.driver.session() as session:
-        record = session.run(cypher, current=current_station, destination=destination_station).single()
-        if record:
-            return record["path"]
-        return None
+def get_alternate_paths(current_station: str, destination_station: str, overlay: SegmentOverlay = None,
+                        k: int = 3, weight: str = 'hops', max_hops: int = 20, time_budget_ms: float = 250):
+    """Compute up to k alternate paths treating ROUTE as bidirectional and using only OPEN/null status segments.
+
+    Runs Yen's k-shortest paths on the in-process route graph, weighted by hop
+    count, great-circle distance or estimated travel time. The scenario's failed
+    and slowed segments are applied as an overlay; the shared graph and Neo4j are
+    never modified, so concurrent scenarios cannot interfere.
+    Returns (paths, complete) where each path carries hops, distance_km and travel_time_min.
+    """
+    cost = PathCost(station_position, weight=weight, overlay=overlay)
+    return route_graph.k_shortest_paths(current_station, destination_station, cost, k=k,
+                                        max_hops=max_hops, time_budget_ms=time_budget_ms)
 
 # ==========================
 # AI Recommendations (Gemini)
@@ -539,19 +686,193 @@ def get_train_details(train_id):
 @app.route('/api/routes', methods=['GET'])
 def get_routes():
     """Get all railway routes"""
-    return jsonify({
+    return response_cache.respond('routes', lambda: {
         "success": True,
         "data": ROUTES_DATA,
         "count": len(ROUTES_DATA)
     })
 
+def build_stations_payload(args):
+    """Build the /api/stations payload for the given query args.
+
+    Optional query:
+      zone=, state=, division=            filter by region
+      bbox=min_lat,min_lng,max_lat,max_lng  only stations inside a map viewport
+      zoom=<0-22>                         cluster located stations on a grid for that zoom level
+      fields=id,position                  project each station to the listed fields
+      limit=<n>&cursor=<next_cursor>      paginate; next_cursor is returned while more remain
+
+    Raises ValueError for invalid query values.
+    """
+    index, spatial = station_index, station_spatial
+    rows = index.filter_rows(
+        zone=args.get('zone'),
+        state=args.get('state'),
+        division=args.get('division')
+    )
+
+    bbox = args.get('bbox')
+    if bbox:
+        bbox_rows = spatial.rows_in_bbox(*parse_bbox(bbox))
+        if rows is None:
+            rows = bbox_rows
+        else:
+            keep = set(rows)
+            rows = [row for row in bbox_rows if row in keep]
+
+    fields = args.get('fields')
+    if fields:
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in STATION_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields {unknown}. Must be among: {list(STATION_FIELDS)}")
+    else:
+        fields = None
+
+    zoom = args.get('zoom')
+    if zoom is not None:
+        zoom = int(zoom)
+        if not 0 <= zoom <= MAX_CLUSTER_ZOOM:
+            raise ValueError(f"zoom must be between 0 and {MAX_CLUSTER_ZOOM}")
+        if rows is None:
+            rows = range(len(index))
+        items = [
+            project(index.station(row), fields) if row is not None else cluster
+            for row, cluster in spatial.cluster_rows(rows, zoom)
+        ]
+    elif rows is None:
+        items = index.stations if fields is None else [project(s, fields) for s in index]
+    else:
+        items = [project(index.station(row), fields) for row in rows]
+
+    total = len(items)
+    next_cursor = None
+    cursor = args.get('cursor')
+    limit = args.get('limit')
+    if cursor or limit:
+        offset = index.decode_cursor(cursor) if cursor else 0
+        limit = int(limit or 1000)
+        if limit <= 0:
+            raise ValueError("limit must be a positive integer")
+        limit = min(limit, 5000)
+        items = items[offset:offset + limit]
+        if offset + limit < total:
+            next_cursor = index.encode_cursor(offset + limit)
+
+    payload = {
+        "success": True,
+        "data": items,
+        "count": len(items),
+        "total": total
+    }
+    if next_cursor:
+        payload["next_cursor"] = next_cursor
+    return payload
+
 @app.route('/api/stations', methods=['GET'])
 def get_stations():
-    """Get all stations"""
+    """Get stations (see build_stations_payload for query options); served pre-serialized with ETags"""
+    args = request.args
+    cache_key = 'stations?' + urlencode(sorted(args.items(multi=True)))
+    try:
+        return response_cache.respond(cache_key, lambda: build_stations_payload(args))
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": f"Invalid query: {str(e)}"
+        }), 400
+
+@app.route('/api/stations/reload', methods=['POST'])
+def reload_stations_endpoint():
+    """Reload stations and the route graph from the storage backend, rebuilding indexes and cached responses"""
+    try:
+        if not refresh_stations():
+            return jsonify({
+                "success": False,
+                "error": f"{station_repository.name} unavailable or empty; keeping the loaded stations",
+                "stations_loaded": len(station_index),
+                "version": station_index.version
+            }), 503
+        return jsonify({
+            "success": True,
+            "message": "Stations reloaded",
+            "stations_loaded": len(station_index),
+            "routes_loaded": len(route_graph),
+            "version": station_index.version
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"Failed to reload stations: {str(e)}"
+        }), 500
+
+@app.route('/api/stations/nearby', methods=['GET'])
+def get_nearby_stations():
+    """Get stations within radius_km of a point, nearest first"""
+    try:
+        lat, lng = parse_point(request.args)
+        radius_km = float(request.args.get('radius_km', 25))
+        limit = int(request.args.get('limit', 100))
+        if not 0 <= radius_km < float('inf'):
+            raise ValueError("radius_km must be a finite, non-negative number")
+        if limit < 1:
+            raise ValueError("limit must be positive")
+    except (KeyError, ValueError):
+        return jsonify({
+            "success": False,
+            "error": "'lat' in [-90, 90] and 'lng' in [-180, 180] are required; "
+                     "'radius_km' must be a finite non-negative number and 'limit' a positive integer"
+        }), 400
+
+    stations = [
+        {**station, "distance_km": round(distance, 3)}
+        for station, distance in station_spatial.nearby(lat, lng, radius_km, limit)
+    ]
     return jsonify({
         "success": True,
-        "data": STATIONS_DATA,
-        "count": len(STATIONS_DATA)
+        "data": stations,
+        "count": len(stations),
+        "radius_km": radius_km
+    })
+
+@app.route('/api/stations/nearest', methods=['GET'])
+def get_nearest_stations():
+    """Get the k stations closest to a point (e.g. a train's position)"""
+    try:
+        lat, lng = parse_point(request.args)
+        k = int(request.args.get('k', 1))
+        if k < 1:
+            raise ValueError("k must be positive")
+    except (KeyError, ValueError):
+        return jsonify({
+            "success": False,
+            "error": "'lat' in [-90, 90] and 'lng' in [-180, 180] are required; 'k' must be a positive integer"
+        }), 400
+
+    stations = [
+        {**station, "distance_km": round(distance, 3)}
+        for station, distance in station_spatial.nearest(lat, lng, k)
+    ]
+    return jsonify({
+        "success": True,
+        "data": stations,
+        "count": len(stations)
+    })
+
+@app.route('/api/stations/<station_code>', methods=['GET'])
+def get_station(station_code):
+    """Get a specific station by code"""
+    station = station_index.get(station_code)
+
+    if not station:
+        return jsonify({
+            "success": False,
+            "error": "Station not found"
+        }), 404
+
+    return jsonify({
+        "success": True,
+        "data": station
     })
 
 @app.route('/api/trains/<train_id>/position', methods=['PUT'])
@@ -575,6 +896,7 @@ def update_train_position(train_id):
     train['position']['latitude'] = data['latitude']
     train['position']['longitude'] = data['longitude']
     train['lastUpdate'] = datetime.now().isoformat()
+    fleet_stats.update(train)
     
     return jsonify({
         "success": True,
@@ -608,6 +930,7 @@ def update_train_status(train_id):
     
     train['status'] = data['status']
     train['lastUpdate'] = datetime.now().isoformat()
+    fleet_stats.update(train)
     
     return jsonify({
         "success": True,
@@ -618,12 +941,12 @@ def update_train_status(train_id):
 def get_connected_stations(station_code):
     """Get stations directly connected to the given station via route relationships"""
     try:
-        # Use Neo4j to get connected stations if available, otherwise fallback to empty list
-        if neo4j_service.driver:
-            stations = neo4j_service.get_connected_stations(station_code)
+        # Ask the storage backend for connected stations if it is configured
+        if station_repository.configured():
+            stations = station_repository.get_connected_stations(station_code)
         else:
-            # Fallback: return just the station itself if no Neo4j connection
-            station = next((s for s in STATIONS_DATA if s['id'] == station_code), None)
+            # Fallback: return just the station itself if no backend connection
+            station = station_index.get(station_code)
             stations = [station] if station else []
         
         return jsonify({
@@ -643,30 +966,26 @@ def get_connected_stations(station_code):
 def search_stations():
     """Search stations by name, code, zone, or state"""
     query = request.args.get('q', '')
-    limit = int(request.args.get('limit', 100))
     
     if not query:
         return jsonify({
             "success": False,
             "error": "Search query 'q' is required"
         }), 400
+
+    try:
+        limit = int(request.args.get('limit', 100))
+        if limit < 1:
+            raise ValueError("limit must be positive")
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "'limit' must be a positive integer"
+        }), 400
     
     try:
-        # Use Neo4j search if available, otherwise fallback to local search
-        if neo4j_service.driver:
-            stations = neo4j_service.search_stations(query, limit)
-        else:
-            # Fallback to local search
-            stations = []
-            query_lower = query.lower()
-            for station in STATIONS_DATA:
-                if (query_lower in station['name'].lower() or 
-                    query_lower in station['id'].lower() or
-                    query_lower in station.get('zone', '').lower() or
-                    query_lower in station.get('state', '').lower()):
-                    stations.append(station)
-                    if len(stations) >= limit:
-                        break
+        # Served from the in-memory index; no database round trip per keystroke
+        stations = station_search.search(query, limit)
         
         return jsonify({
             "success": True,
@@ -691,7 +1010,8 @@ def health_check():
         "timestamp": datetime.now().isoformat(),
         "uptime": "running",
         "neo4j": neo4j_status,
-        "stations_loaded": len(STATIONS_DATA)
+        "station_backend": station_repository.name,
+        "stations_loaded": len(station_index)
     })
 
 # Enhanced API endpoints
@@ -699,7 +1019,7 @@ def health_check():
 def get_dashboard_stats():
     """Get comprehensive dashboard statistics"""
     try:
-        kpis = kpi_calculator.calculate_kpis(TRAINS_DATA)
+        kpis = kpi_calculator.kpis_from_totals(fleet_stats.totals())
         
         # Add additional stats
         stats = {
@@ -775,6 +1095,10 @@ def report_disruption():
         
         # Update global train data
         TRAINS_DATA = updated_trains
+        # Disruptions touch at most the reported train
+        train = next((t for t in updated_trains if t['id'] == event_data.get('train_id')), None)
+        if train is not None:
+            fleet_stats.update(train)
         
         return jsonify({
             "success": True,
@@ -788,6 +1112,76 @@ def report_disruption():
             "error": f"Failed to handle disruption: {str(e)}"
         }), 500
 
+def scenario_train_rows(trains, scenario):
+    """Rows of the trains a delay/cancel scenario targets (train_id, train_ids list, or "*" for all)"""
+    train_ids = scenario.get('train_ids')
+    if train_ids in ('*', 'all'):
+        return list(range(len(trains)))
+    if train_ids is None:
+        train_ids = [scenario.get('train_id')]
+    elif not isinstance(train_ids, list):
+        # A lone id string would otherwise be matched character by character
+        raise ValueError('train_ids must be a list of train ids or "*"')
+    wanted = set(train_ids)
+    rows = []
+    for row, train in enumerate(trains):
+        if train['id'] in wanted:
+            rows.append(row)
+            wanted.discard(train['id'])
+    return rows
+
+def simulate_train_scenario(trains, scenario, base_totals=None):
+    """Apply a delay/cancel scenario to a read-only train snapshot.
+
+    Only the targeted trains are copied, and KPIs are derived by adjusting the
+    snapshot totals for those trains, so a scenario costs O(affected trains).
+    Returns ({row: modified train}, kpis).
+    """
+    scenario_type = scenario.get('type', 'delay')
+    if scenario_type not in ('delay', 'cancel'):
+        raise ValueError(f"Unsupported scenario type: {scenario_type}")
+    minutes = scenario.get('delay_minutes', 30)
+    if scenario_type == 'delay' and (isinstance(minutes, bool) or not isinstance(minutes, (int, float))):
+        raise ValueError("delay_minutes must be a number")
+
+    totals = base_totals if base_totals is not None else kpi_calculator.calculate_totals(trains)
+    changed = {}
+    for row in scenario_train_rows(trains, scenario):
+        before = trains[row]
+        after = before.copy()
+        if scenario_type == 'delay':
+            after['delay'] = after.get('delay', 0) + minutes
+            after['status'] = 'delayed'
+        else:
+            after['status'] = 'cancelled'
+        changed[row] = after
+        totals = kpi_calculator.adjust_totals(totals, before, after)
+    return changed, kpi_calculator.kpis_from_totals(totals)
+
+MAX_BATCH_SCENARIOS = 1000
+
+def expand_sweep(sweep, max_scenarios=MAX_BATCH_SCENARIOS):
+    """Expand {..., delay_minutes: {start, stop, step}} into one delay scenario per value (stop inclusive)
+
+    Raises:
+        ValueError: If step is not positive or the sweep expands to more than max_scenarios scenarios
+    """
+    minutes = sweep.get('delay_minutes')
+    if isinstance(minutes, dict):
+        start, stop, step = int(minutes.get('start', 5)), int(minutes.get('stop', 60)), int(minutes.get('step', 5))
+        if step <= 0:
+            raise ValueError("sweep step must be positive")
+        # Sized before anything is built, so a huge stop costs nothing
+        values = range(start, stop + 1, step)
+    else:
+        values = None
+    count = 1 if values is None else len(values)
+    if count > max_scenarios:
+        raise ValueError(f"sweep expands to {count} scenarios; at most {max_scenarios} fit in this batch")
+    if values is None:
+        return [sweep]
+    return [{**sweep, 'type': sweep.get('type', 'delay'), 'delay_minutes': value} for value in values]
+
 @app.route('/api/whatif', methods=['POST'])
 def whatif_scenario():
     """Run what-if analysis scenarios"""
@@ -803,23 +1197,16 @@ def whatif_scenario():
         scenario_type = scenario.get('type', 'delay')
         
         if scenario_type in ['delay', 'cancel']:
-            # Legacy simple scenarios on the demo TRAINS_DATA
-            simulation_trains = [train.copy() for train in TRAINS_DATA]
-            train_id = scenario.get('train_id')
-            if scenario_type == 'delay':
-                minutes = scenario.get('delay_minutes', 30)
-                for train in simulation_trains:
-                    if train['id'] == train_id:
-                        train['delay'] = train.get('delay', 0) + minutes
-                        train['status'] = 'delayed'
-                        break
-            elif scenario_type == 'cancel':
-                for train in simulation_trains:
-                    if train['id'] == train_id:
-                        train['status'] = 'cancelled'
-                        break
-
-            scenario_kpis = kpi_calculator.calculate_kpis(simulation_trains)
+            # Simple scenarios on the demo TRAINS_DATA; only the affected trains are copied
+            trains = list(TRAINS_DATA)
+            try:
+                changed, scenario_kpis = simulate_train_scenario(trains, scenario)
+            except (TypeError, ValueError) as e:
+                return jsonify({
+                    "success": False,
+                    "error": f"Invalid {scenario_type} scenario: {str(e)}"
+                }), 400
+            simulation_trains = [changed.get(i, train) for i, train in enumerate(trains)]
             return jsonify({
                 "success": True,
                 "message": "What-if scenario completed",
@@ -832,50 +1219,71 @@ def whatif_scenario():
             })
         
         elif scenario_type == 'reroute':
-            # Rerouting using Neo4j graph
+            # Rerouting on the in-process route graph with scenario-scoped segment changes
             train = scenario.get('train') or scenario.get('train_id')
             current_station = scenario.get('current_station')
             destination_station = scenario.get('destination_station')
-            failed_segment = scenario.get('failed_segment')  # [from, to]
 
-            if not (train and current_station and destination_station and failed_segment and len(failed_segment) == 2):
+            if not (current_station and destination_station):
                 return jsonify({
                     "success": False,
-                    "error": "Missing required fields: train, current_station, destination_station, failed_segment[from,to]"
+                    "error": "Missing required fields: current_station, destination_station"
                 }), 400
+            routes_error = missing_routes_error()
+            if routes_error:
+                return jsonify({
+                    "success": False,
+                    "error": routes_error
+                }), 503
 
-            # 1) Mark failed route
+            weight = scenario.get('weight', 'hops')
             try:
-                failed = mark_route_failed_in_neo4j(train, failed_segment[0], failed_segment[1])
-            except Exception as e:
+                k = max(1, min(int(scenario.get('k', 3)), 10))
+                time_budget_ms = float(scenario.get('time_budget_ms', 250))
+                # 1) Failed/slowed segments apply to this scenario only
+                overlay = SegmentOverlay.from_scenario(scenario)
+            except (TypeError, ValueError) as e:
                 return jsonify({
                     "success": False,
-                    "error": f"Failed to mark failed segment: {str(e)}"
-                }), 500
+                    "error": f"Invalid reroute scenario: {str(e)}"
+                }), 400
+            if weight not in WEIGHTS:
+                return jsonify({
+                    "success": False,
+                    "error": f"weight must be one of {list(WEIGHTS)}"
+                }), 400
 
-            # 2) Compute shortest path using only OPEN/null edges
+            # 2) Compute the k best paths using only OPEN/null edges
             try:
-                alt_path = get_shortest_open_path(current_station, destination_station)
+                alternatives, complete = get_alternate_paths(current_station, destination_station, overlay=overlay,
+                                                             k=k, weight=weight, time_budget_ms=time_budget_ms)
             except Exception as e:
                 return jsonify({
                     "success": False,
                     "error": f"Failed to compute alternate path: {str(e)}"
                 }), 500
 
-            if not alt_path:
+            if not alternatives:
                 return jsonify({
                     "success": True,
                     "message": "No alternate path available",
-                    "data": {"alternate_path": None}
+                    "data": {"alternate_path": None, "alternatives": []}
                 })
 
             # 3) Return reroute result; frontend can visualize on the map
+            best = alternatives[0]
             return jsonify({
                 "success": True,
                 "message": "Reroute successful",
                 "data": {
-                    "alternate_path": alt_path,
-                    "failed_segment": failed_segment,
+                    "alternate_path": best["path"],
+                    "distance_km": best["distance_km"],
+                    "travel_time_min": best["travel_time_min"],
+                    "alternatives": alternatives,
+                    "weight": weight,
+                    "search_complete": complete,
+                    "failed_segment": scenario.get('failed_segment'),
+                    "failed_segments": [sorted(segment) for segment in overlay.failed],
                     "train": train,
                     "timestamp": datetime.now().isoformat()
                 }
@@ -892,6 +1300,103 @@ def whatif_scenario():
             "error": f"Failed to run scenario: {str(e)}"
         }), 500
 
+@app.route('/api/whatif/batch', methods=['POST'])
+def whatif_batch():
+    """Evaluate many what-if scenarios against one shared train snapshot.
+
+    Expects JSON: { scenarios?: [scenario, ...], sweep?: {type: "delay", train_ids: "*" | [...],
+                    delay_minutes: {start, stop, step}}, include_trains?: false }
+    Delay/cancel scenarios return KPIs; reroute scenarios return alternate paths.
+    """
+    try:
+        payload = request.get_json(silent=True) or {}
+        if not isinstance(payload, dict):
+            return jsonify({
+                "success": False,
+                "error": "Request body must be a JSON object"
+            }), 400
+        scenarios = payload.get('scenarios') or []
+        if not isinstance(scenarios, list):
+            return jsonify({
+                "success": False,
+                "error": "scenarios must be a list"
+            }), 400
+        if len(scenarios) > MAX_BATCH_SCENARIOS:
+            return jsonify({
+                "success": False,
+                "error": f"At most {MAX_BATCH_SCENARIOS} scenarios per batch"
+            }), 400
+        sweep = payload.get('sweep')
+        if sweep:
+            if not isinstance(sweep, dict):
+                return jsonify({
+                    "success": False,
+                    "error": "sweep must be an object"
+                }), 400
+            try:
+                scenarios = scenarios + expand_sweep(sweep, MAX_BATCH_SCENARIOS - len(scenarios))
+            except (TypeError, ValueError) as e:
+                return jsonify({
+                    "success": False,
+                    "error": f"Invalid sweep: {str(e)}"
+                }), 400
+        if not scenarios:
+            return jsonify({
+                "success": False,
+                "error": "No scenarios provided"
+            }), 400
+        include_trains = bool(payload.get('include_trains'))
+
+        # One read-only snapshot and one totals pass shared by every scenario
+        trains = list(TRAINS_DATA)
+        base_totals = fleet_stats.totals()
+
+        results = []
+        for position, scenario in enumerate(scenarios):
+            result = {"index": position, "scenario": scenario}
+            try:
+                if not isinstance(scenario, dict):
+                    raise ValueError("Each scenario must be an object")
+                if scenario.get('type', 'delay') == 'reroute':
+                    if not (scenario.get('current_station') and scenario.get('destination_station')):
+                        raise ValueError("Missing required fields: current_station, destination_station")
+                    routes_error = missing_routes_error()
+                    if routes_error:
+                        raise ValueError(routes_error)
+                    overlay = SegmentOverlay.from_scenario(scenario)
+                    alternatives, complete = get_alternate_paths(
+                        scenario.get('current_station'), scenario.get('destination_station'), overlay=overlay,
+                        k=max(1, min(int(scenario.get('k', 1)), 10)), weight=scenario.get('weight', 'hops'),
+                        time_budget_ms=float(scenario.get('time_budget_ms', 50)))
+                    result.update({"success": True, "alternatives": alternatives, "search_complete": complete})
+                else:
+                    changed, kpis = simulate_train_scenario(trains, scenario, base_totals)
+                    result.update({
+                        "success": True,
+                        "kpis": kpis,
+                        "affected_trains": [trains[row]['id'] for row in changed]
+                    })
+                    if include_trains:
+                        result["changed_trains"] = list(changed.values())
+            except (TypeError, ValueError) as e:
+                result.update({"success": False, "error": str(e)})
+            results.append(result)
+
+        return jsonify({
+            "success": True,
+            "data": {
+                "baseline_kpis": kpi_calculator.kpis_from_totals(base_totals),
+                "results": results,
+                "count": len(results),
+                "timestamp": datetime.now().isoformat()
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"Failed to run scenario batch: {str(e)}"
+        }), 500
+
 @app.route('/api/schedule/optimize', methods=['POST'])
 def optimize_schedule():
     """Optimize train schedule based on current conditions"""
@@ -906,12 +1411,13 @@ def optimize_schedule():
                 optimized_train['delay'] = max(0, train['delay'] - train['delay'] // 2)
                 if optimized_train['delay'] == 0:
                     optimized_train['status'] = 'running'
+                fleet_stats.update(optimized_train)
             optimized_trains.append(optimized_train)
         
         # Update global train data
         TRAINS_DATA = optimized_trains
         
-        kpis = kpi_calculator.calculate_kpis(optimized_trains)
+        kpis = kpi_calculator.kpis_from_totals(fleet_stats.totals())
         
         return jsonify({
             "success": True,
@@ -936,63 +1442,39 @@ def performance_metrics():
     try:
         # Select data source
         station_codes = request.args.get('stations', '')
-        trains_source = []
+        now = datetime.now()
         if station_codes and train_tracker:
             codes = [s.strip() for s in station_codes.split(',') if s.strip()]
             try:
                 trains_source = train_tracker.get_live_train_locations()
                 if codes:
                     trains_source = train_tracker.filter_trains_by_stations(trains_source, codes)
-                # Normalize to minimal structure for KPI calc
-                normalized = []
+                # Normalize straight into columns: (id, delay, status, hour of last update = now)
+                records = []
                 for t in trains_source:
                     status = t.get('demo_status') or ('stopped' if (t.get('halt_mins', 0) or 0) > 0 else ('delayed' if (t.get('mins_since_dep', 0) or 0) > 30 else 'running'))
-                    normalized.append({
-                        'id': t.get('train_number') or t.get('id') or 'unknown',
-                        'delay': max(0, int(t.get('halt_mins', 0) or 0)),
-                        'status': 'running' if status == 'RUNNING_FAST' or status == 'ON_TIME' or status == 'running' else ('delayed' if status == 'delayed' else 'stopped'),
-                        'lastUpdate': datetime.now().isoformat(),
-                    })
-                trains = normalized
+                    records.append((
+                        t.get('train_number') or t.get('id') or 'unknown',
+                        max(0, int(t.get('halt_mins', 0) or 0)),
+                        'running' if status == 'RUNNING_FAST' or status == 'ON_TIME' or status == 'running' else ('delayed' if status == 'delayed' else 'stopped'),
+                        now.hour,
+                    ))
+                columns = TrainColumns.from_records(records)
             except Exception:
-                trains = TRAINS_DATA
+                columns = None
         else:
-            trains = TRAINS_DATA
-
-        # KPIs
-        kpis = kpi_calculator.calculate_kpis(trains)
-
-        # Build simple hourly trend placeholders from delays
-        now = datetime.now()
-        buckets = {h: [] for h in range(24)}
-        for t in trains:
-            # Use lastUpdate hour if present; else current hour
-            try:
-                hour = datetime.fromisoformat(t.get('lastUpdate', now.isoformat())).hour
-            except Exception:
-                hour = now.hour
-            buckets.setdefault(hour, []).append(t.get('delay', 0))
-
-        punctuality_trend = []  # percentage on-time per hour
-        avg_delay_trend = []    # average delay minutes per hour
-        for h in range(24):
-            delays = buckets.get(h, [])
-            if delays:
-                total = len(delays)
-                on_time = sum(1 for d in delays if (d or 0) == 0)
-                punctuality = round(on_time / total * 100, 2)
-                avg_delay = round(sum(d or 0 for d in delays) / total, 2)
-            else:
-                punctuality = 100.0
-                avg_delay = 0.0
-            punctuality_trend.append({"hour": h, "value": punctuality})
-            avg_delay_trend.append({"hour": h, "value": avg_delay})
+            columns = None
 
-        # Additional derived metrics
-        status_counts = {}
-        for t in trains:
-            status = t.get('status', 'unknown')
-            status_counts[status] = status_counts.get(status, 0) + 1
+        if columns is not None:
+            # Live fleet: KPIs, status histogram and hourly trends in vectorized passes
+            kpis = kpi_calculator.calculate_kpis(columns)
+            status_counts = columns.status_counts()
+            punctuality_trend, avg_delay_trend = columns.hourly_trends()
+        else:
+            # Static fleet: read the running aggregates
+            kpis = kpi_calculator.kpis_from_totals(fleet_stats.totals())
+            status_counts = fleet_stats.status_counts()
+            punctuality_trend, avg_delay_trend = fleet_stats.hourly_trends()
 
         payload = {
             "kpis": kpis,
@@ -1052,7 +1534,9 @@ def get_live_trains():
         }), 503
     
     try:
-        live_trains = train_tracker.get_live_train_locations()
+        # Positions come from the tracker's shared clock; each snapshot is filtered
+        # and encoded once however many dashboards poll it
+        snapshot = train_tracker.live_snapshot()
         
         # Filter for target stations if specified
         station_codes = request.args.getlist('stations')
@@ -1060,14 +1544,19 @@ def get_live_trains():
             # Handle comma-separated stations parameter
             if len(station_codes) == 1 and ',' in station_codes[0]:
                 station_codes = [s.strip() for s in station_codes[0].split(',')]
-            live_trains = train_tracker.filter_trains_by_stations(live_trains, station_codes)
         
-        return jsonify({
-            "success": True,
-            "data": live_trains,
-            "count": len(live_trains),
-            "timestamp": datetime.now().isoformat()
-        })
+        def build():
+            live_trains = list(snapshot.trains)
+            if station_codes:
+                live_trains = train_tracker.filter_trains_by_stations(live_trains, station_codes)
+            return {
+                "success": True,
+                "data": live_trains,
+                "count": len(live_trains),
+                "timestamp": snapshot.timestamp
+            }
+        
+        return live_response_cache.respond(f"live:{snapshot.seq}?{','.join(station_codes)}", build)
         
     except Exception as e:
         return jsonify({
@@ -1075,6 +1564,60 @@ def get_live_trains():
             "error": f"Failed to get live trains: {str(e)}"
         }), 500
 
+@app.route('/api/trains/trajectories', methods=['GET'])
+def get_train_trajectories():
+    """Get each live train's route as an arc-length polyline so clients can interpolate between updates"""
+    if not train_tracker:
+        return jsonify({
+            "success": False,
+            "error": "Train tracking not available"
+        }), 503
+
+    try:
+        points = max(2, min(int(request.args.get('points', 32)), 256))
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "points must be an integer"
+        }), 400
+    station_codes = [s.strip() for value in request.args.getlist('stations')
+                     for s in value.split(',') if s.strip()]
+
+    def build():
+        trajectories = train_tracker.get_trajectories(points=points, station_codes=station_codes or None)
+        return {
+            "success": True,
+            "data": trajectories,
+            "count": len(trajectories)
+        }
+
+    try:
+        # Curves only change when stations are reloaded
+        return response_cache.respond(f"trajectories?points={points}&stations={','.join(station_codes)}", build)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"Failed to get trajectories: {str(e)}"
+        }), 500
+
+@app.route('/api/trains/live/stream', methods=['GET'])
+def stream_live_trains():
+    """Push live train positions as Server-Sent Events (snapshot, then per-tick deltas)"""
+    if not live_feed:
+        return jsonify({
+            "success": False,
+            "error": "Train tracking not available"
+        }), 503
+
+    station_codes = [s.strip() for value in request.args.getlist('stations')
+                     for s in value.split(',') if s.strip()]
+    frames = live_feed.stream(stations=station_codes or None,
+                              last_event_id=request.headers.get('Last-Event-ID'))
+    return Response(frames, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Don't let a reverse proxy buffer the stream
+    })
+
 @app.route('/api/trains/start-tracking', methods=['POST'])
 def start_train_tracking():
     """Start continuous train tracking"""
@@ -1114,7 +1657,11 @@ if __name__ == '__main__':
     print("   GET  /api/trains - Get all trains")
     print("   GET  /api/trains/<id> - Get specific train")
     print("   GET  /api/routes - Get railway routes")
-    print("   GET  /api/stations - Get stations")
+    print("   GET  /api/stations - Get stations (?zone=&state=&division=&bbox=&zoom=&fields=&limit=&cursor=)")
+    print("   POST /api/stations/reload - Reload stations and route graph from the storage backend")
+    print("   GET  /api/stations/nearby?lat=&lng=&radius_km= - Stations near a point")
+    print("   GET  /api/stations/nearest?lat=&lng=&k= - Nearest stations to a point")
+    print("   GET  /api/stations/<code> - Get specific station")
     print("   GET  /api/stations/<code>/connected - Get connected stations")
     print("   GET  /api/stations/search?q=<query> - Search stations")
     print("   PUT  /api/trains/<id>/position - Update train position")
@@ -1125,9 +1672,12 @@ if __name__ == '__main__':
     print("   POST /api/alerts/<id>/acknowledge - Acknowledge alert")
     print("   POST /api/disruption - Report disruption")
     print("   POST /api/whatif - Run what-if analysis")
+    print("   POST /api/whatif/batch - Run many what-if scenarios in one call")
     print("   POST /api/schedule/optimize - Optimize schedule")
     print("   GET  /api/trains/track - Get tracked trains")
     print("   GET  /api/trains/live - Get live train locations")
+    print("   GET  /api/trains/live/stream - Stream live train positions (SSE)")
+    print("   GET  /api/trains/trajectories - Get train route polylines for client interpolation")
     print("   POST /api/trains/start-tracking - Start train tracking")
     print("\n🌐 Server starting on http://localhost:5001")
     
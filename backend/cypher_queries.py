@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Registry of the Cypher statements the backend runs against Neo4j.
+Every statement is fixed text with $parameters only, so Neo4j plans each one
+once and reuses the cached plan for any limit, code or search term. Plans are
+warmed at startup with EXPLAIN, and running this module dumps the estimated
+plan cost of every registered query (actual db hits with `--profile`) so
+regressions show up in review.
+
+Usage:
+    python3 cypher_queries.py [--profile]
+"""
+
+import argparse
+import re
+from typing import Dict, NamedTuple
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CypherQuery(NamedTuple):
+    name: str
+    text: str
+    sample_params: Dict  # Representative parameters for warm-up and plan dumps
+
+
+def station_projection(var: str) -> str:
+    """RETURN columns for a Station node variable, in the order station_from_values() expects"""
+    return (f"{var}.code as code, {var}.name as name, {var}.lat as latitude, {var}.lng as longitude, "
+            f"{var}.zone as zone, {var}.state as state, {var}.division as division, "
+            f"{var}.type as type, {var}.platforms as platforms")
+
+
+QUERIES: Dict[str, CypherQuery] = {}
+
+
+def register(name: str, text: str, **sample_params) -> CypherQuery:
+    query = CypherQuery(name, ' '.join(text.split()), sample_params)
+    QUERIES[name] = query
+    return query
+
+
+PING = register('ping', "RETURN 1 as test")
+
+STATIONS_ALL = register('stations.all', f"""
+    MATCH (s:Station)
+    RETURN {station_projection('s')}
+    ORDER BY s.name
+""")
+
+STATIONS_PAGE = register('stations.page', f"""
+    MATCH (s:Station)
+    RETURN {station_projection('s')}
+    ORDER BY s.name
+    LIMIT $limit
+""", limit=100)
+
+STATION_BY_CODE = register('stations.by_code', f"""
+    MATCH (s:Station {{code: $code}})
+    RETURN {station_projection('s')}
+""", code='NDLS')
+
+CONNECTED_STATIONS = register('stations.connected', f"""
+    MATCH (s:Station {{code: $station_code}})
+    OPTIONAL MATCH (s)-[r:ROUTE]-(connected:Station)
+    WITH s, collect(DISTINCT connected) as connected_stations
+    UNWIND [s] + connected_stations as station
+    RETURN {station_projection('station')}
+    ORDER BY station.name
+""", station_code='NDLS')
+
+# Full-text search over the station_search index (see neo4j_schema.py); $terms is Lucene syntax
+SEARCH_STATIONS = register('stations.search', f"""
+    CALL db.index.fulltext.queryNodes('station_search', $terms, {{limit: $limit}})
+    YIELD node AS s, score
+    RETURN {station_projection('s')}
+    ORDER BY score DESC, s.name
+""", terms='delhi*', limit=100)
+
+# Substring scan used when the full-text index has not been created
+SEARCH_STATIONS_CONTAINS = register('stations.search_contains', f"""
+    MATCH (s:Station)
+    WHERE toLower(s.name) CONTAINS toLower($search)
+       OR toLower(s.code) CONTAINS toLower($search)
+       OR toLower(s.zone) CONTAINS toLower($search)
+       OR toLower(s.state) CONTAINS toLower($search)
+    RETURN {station_projection('s')}
+    ORDER BY s.name
+    LIMIT $limit
+""", search='delhi', limit=100)
+
+ROUTE_EDGES = register('routes.edges', """
+    MATCH (a:Station)-[r:ROUTE]->(b:Station)
+    RETURN a.code as source,
+           b.code as target,
+           r.train as train,
+           r.status as status
+""")
+
+
+LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+
+def fulltext_query(search_term: str) -> str:
+    """
+    Turn free text into a Lucene query for SEARCH_STATIONS: every word must prefix-match
+
+    Wildcard terms bypass the analyzer, so words are lower-cased here to match the index.
+    """
+    words = [LUCENE_SPECIAL.sub(r'\\\1', word.lower()) for word in search_term.split()]
+    return ' AND '.join(f"{word}*" for word in words)
+
+
+def summarize_plan(plan: Dict, profiled: bool) -> Dict:
+    """
+    Collapse an EXPLAIN/PROFILE plan tree into comparable numbers
+
+    Returns:
+        {'db_hits' (None for EXPLAIN), 'rows' (actual, or the planner's estimate), 'operators'}
+    """
+    db_hits = 0
+    operators = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        operators.append(node.get('operatorType', '?').split('@')[0])
+        db_hits += node.get('dbHits', 0)
+        stack.extend(reversed(node.get('children', [])))
+    rows = plan.get('rows') if profiled else plan.get('args', {}).get('EstimatedRows')
+    return {'db_hits': db_hits if profiled else None,
+            'rows': round(rows) if rows is not None else None,
+            'operators': operators}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dump the plan cost of every registered Cypher query")
+    parser.add_argument('--profile', action='store_true',
+                        help="Execute each query with PROFILE (actual db hits) instead of EXPLAIN")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    from neo4j_service import neo4j_service
+
+    if not neo4j_service.test_connection():
+        logger.error("❌ Neo4j is not reachable")
+        return
+    mode = 'PROFILE' if args.profile else 'EXPLAIN'
+    print(f"{'query':<22} {'db hits':>10} {'rows':>10} {'ms':>8}  operators")
+    for report in neo4j_service.plan_report(profile=args.profile):
+        print(f"{report['name']:<22} {str(report['db_hits']):>10} {str(report['rows']):>10} "
+              f"{report['time_ms']:>8.1f}  {' > '.join(report['operators'])}")
+    neo4j_service.close()
+    logger.info(f"✅ {mode} report for {len(QUERIES)} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Bulk-load railway stations from indian_railway_stations.csv (or .json) into Neo4j
+Streams the file and writes batches with UNWIND ... MERGE, one transaction per batch
+
+Usage:
+    python3 import_stations.py [--file indian_railway_stations.csv] [--batch-size 1000] [--dry-run]
+"""
+
+import argparse
+import os
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+import logging
+
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+
+from neo4j_executor import QueryExecutor, driver_config
+from neo4j_schema import ensure_schema
+from station_repository import DEFAULT_STATIONS_FILE, read_stations
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE = DEFAULT_STATIONS_FILE
+DEFAULT_BATCH_SIZE = 1000
+
+# Empty values arrive as null so coalesce() keeps whatever the node already has;
+# in particular the CSV's 0,0 placeholder coordinates never overwrite real ones
+MERGE_QUERY = """
+UNWIND $rows AS row
+MERGE (s:Station {code: row.code})
+SET s.name = coalesce(row.name, s.name),
+    s.nameHindi = coalesce(row.nameHindi, s.nameHindi),
+    s.lat = coalesce(row.lat, s.lat),
+    s.lng = coalesce(row.lng, s.lng),
+    s.zone = coalesce(row.zone, s.zone),
+    s.state = coalesce(row.state, s.state),
+    s.division = coalesce(row.division, s.division)
+"""
+
+
+def batched(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    """Group rows into lists of at most size"""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_stations(driver, rows: Iterable[Dict], database: str = 'neo4j',
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Upsert station rows into Neo4j
+
+    Args:
+        driver: A neo4j Driver
+        rows: Normalized station rows (see station_repository.normalize_row)
+        database: Target database name
+        batch_size: Rows per UNWIND transaction
+
+    Returns:
+        Number of rows written
+    """
+    executor = QueryExecutor(driver, database)
+    # The Station.code uniqueness constraint also backs the MERGE lookups with an index
+    ensure_schema(executor)
+    written = 0
+    for batch in batched(rows, batch_size):
+        # No timeout: a large batch on a cold cache may legitimately take a while
+        executor.write(MERGE_QUERY, {'rows': batch}, timeout=0)
+        written += len(batch)
+        logger.info(f"Imported {written} stations")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import railway stations into Neo4j")
+    parser.add_argument('--file', default=DEFAULT_FILE, help="Station CSV or JSON file")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Rows per transaction")
+    parser.add_argument('--dry-run', action='store_true', help="Parse the file without writing to Neo4j")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        started = time.perf_counter()
+        count = sum(1 for _ in read_stations(args.file))
+        logger.info(f"✅ Parsed {count} stations from {args.file} in {time.perf_counter() - started:.2f}s")
+        return
+
+    # Load environment variables
+    load_dotenv()
+
+    uri = os.getenv("NEO4J_URI")
+    username = os.getenv("NEO4J_USERNAME")
+    password = os.getenv("NEO4J_PASSWORD")
+    database = os.getenv("NEO4J_DATABASE", "neo4j")
+
+    if not all([uri, username, password]):
+        logger.error("Neo4j credentials not found in environment variables")
+        return
+
+    driver = GraphDatabase.driver(uri, auth=(username, password), **driver_config())
+    try:
+        driver.verify_connectivity()
+        logger.info("✅ Connected to Neo4j AuraDB")
+
+        started = time.perf_counter()
+        count = import_stations(driver, read_stations(args.file), database=database,
+                                batch_size=max(1, args.batch_size))
+        elapsed = time.perf_counter() - started
+        logger.info(f"✅ Imported {count} stations in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f} rows/s)")
+    except Exception as e:
+        logger.error(f"❌ Import failed: {e}")
+    finally:
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Running fleet aggregates kept up to date on every train mutation.
+Dashboard and performance endpoints read these counters instead of scanning the fleet.
+"""
+
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from train_columns import HOURS, hour_of, hourly_trends
+
+
+class FleetAggregates:
+    def __init__(self, trains: Iterable[Dict] = ()):
+        """
+        Args:
+            trains: Initial train dictionaries ('id', 'delay', 'status', 'lastUpdate')
+        """
+        self._lock = threading.Lock()
+        self.rebuild(trains)
+
+    def rebuild(self, trains: Iterable[Dict]):
+        """Recompute every counter from a full train list"""
+        with self._lock:
+            self._contributions: Dict[str, Tuple[float, str, int]] = {}
+            self._status_counts: Counter = Counter()
+            self._on_time = 0
+            self._delay = 0
+            self._hour_count = [0] * HOURS
+            self._hour_on_time = [0] * HOURS
+            self._hour_delay = [0] * HOURS
+            now = datetime.now()
+            for train in trains:
+                self._apply(train.get('id', 'unknown'), train.get('delay', 0) or 0,
+                            train.get('status', 'unknown'), hour_of(train, now))
+
+    def _add(self, contribution: Tuple[float, str, int], sign: int):
+        delay, status, hour = contribution
+        on_time = 1 if delay == 0 else 0
+        self._status_counts[status] += sign
+        if not self._status_counts[status]:
+            del self._status_counts[status]
+        self._on_time += sign * on_time
+        self._delay += sign * delay
+        self._hour_count[hour] += sign
+        self._hour_on_time[hour] += sign * on_time
+        self._hour_delay[hour] += sign * delay
+
+    def _apply(self, train_id: str, delay: float, status: str, hour: int):
+        previous = self._contributions.get(train_id)
+        if previous is not None:
+            self._add(previous, -1)
+        contribution = (delay, status, hour)
+        self._contributions[train_id] = contribution
+        self._add(contribution, 1)
+
+    def update(self, train: Dict):
+        """Swap one train's contribution for its current state (adds unknown trains)"""
+        with self._lock:
+            self._apply(train.get('id', 'unknown'), train.get('delay', 0) or 0,
+                        train.get('status', 'unknown'), hour_of(train))
+
+    def remove(self, train_id: str):
+        """Drop a train's contribution"""
+        with self._lock:
+            previous = self._contributions.pop(train_id, None)
+            if previous is not None:
+                self._add(previous, -1)
+
+    def totals(self) -> Dict:
+        """Raw counters in the KPICalculator.calculate_totals() format"""
+        with self._lock:
+            return {
+                "total": len(self._contributions),
+                "on_time": self._on_time,
+                "active": self._status_counts.get('running', 0),
+                "delay": self._delay
+            }
+
+    def status_counts(self) -> Dict[str, int]:
+        """Number of trains per status"""
+        with self._lock:
+            return dict(self._status_counts)
+
+    def hourly_trends(self) -> Tuple[List[Dict], List[Dict]]:
+        """Per-hour punctuality and average delay by last-update hour (see train_columns.hourly_trends())"""
+        with self._lock:
+            return hourly_trends(self._hour_count, self._hour_on_time, self._hour_delay)
@@ -0,0 +1,170 @@
+"""
+Server-Sent Events feed of live train positions.
+Follows the train tracker's position clock (LiveSnapshot.seq) instead of
+running a clock of its own; each new snapshot is diffed against the previous
+one once for all subscribers and only the changed fields are pushed.
+"""
+
+import json
+import threading
+from typing import Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
+import logging
+
+from train_tracker import LiveSnapshot
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fields that move between ticks; everything else is only sent in snapshots
+DELTA_FIELDS = ('current_lat', 'current_lng', 'journey_progress', 'current_station',
+                'current_station_name', 'demo_status', 'halt_mins', 'speed_kmph', 'mins_since_dep')
+
+# Coordinates are rounded to ~1 m so sub-metre jitter is not sent as a change
+COORD_DECIMALS = 5
+
+
+def _train_id(train: Dict) -> str:
+    return str(train.get('train_number') or train.get('id') or '')
+
+
+def _round(value):
+    return round(value, COORD_DECIMALS) if isinstance(value, float) else value
+
+
+def _matches(train: Dict, stations: Optional[FrozenSet[str]]) -> bool:
+    """Same rule as TrainTracker.filter_trains_by_stations()"""
+    if not stations:
+        return True
+    return (str(train.get('route_from', '')).upper() in stations
+            or str(train.get('route_to', '')).upper() in stations)
+
+
+class LiveFeed:
+    def __init__(self, source: Callable[[int, float], LiveSnapshot], heartbeat_s: float = 15.0,
+                 encode: Callable[[Dict], str] = lambda payload: json.dumps(payload, separators=(',', ':'))):
+        """
+        Args:
+            source: Called with (after_seq, timeout); waits up to timeout seconds for a LiveSnapshot
+                newer than after_seq and returns the latest one (e.g. TrainTracker.next_snapshot)
+            heartbeat_s: Idle seconds before a keep-alive comment is sent to a subscriber
+            encode: Function turning a payload dict into a JSON string
+        """
+        self.source = source
+        self.heartbeat_s = heartbeat_s
+        self.encode = encode
+
+        self._cond = threading.Condition()
+        self._subscribers = 0
+        # The last snapshot diffed, and the seq its delta applies on top of
+        self._seq = 0
+        self._base_seq = 0
+        self._timestamp = ''
+        self._trains: Dict[str, Dict] = {}
+        self._changes: Dict[str, Dict] = {}
+        self._added: List[str] = []
+        self._removed: List[str] = []
+        # Encoded frames for the current snapshot, shared by every subscriber with the same filter
+        self._frames: Dict[Tuple[str, Optional[FrozenSet[str]]], str] = {}
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    def _publish(self, snapshot: LiveSnapshot) -> None:
+        """Diff a snapshot newer than the current one against it; caller holds self._cond"""
+        if snapshot.seq <= self._seq:
+            return
+        trains = {_train_id(t): t for t in snapshot.trains}
+        previous = self._trains
+
+        changes: Dict[str, Dict] = {}
+        for train_id, train in trains.items():
+            before = previous.get(train_id)
+            if before is None:
+                continue
+            changed = {field: _round(train.get(field)) for field in DELTA_FIELDS
+                       if _round(train.get(field)) != _round(before.get(field))}
+            if changed:
+                changes[train_id] = changed
+
+        self._added = [train_id for train_id in trains if train_id not in previous]
+        self._removed = [train_id for train_id in previous if train_id not in trains]
+        self._trains = trains
+        self._changes = changes
+        self._base_seq = self._seq
+        self._seq = snapshot.seq
+        self._timestamp = snapshot.timestamp
+        self._frames = {}
+
+    def _frame(self, kind: str, stations: Optional[FrozenSet[str]]) -> str:
+        """Encode the current snapshot as an SSE event; caller holds self._cond"""
+        key = (kind, stations)
+        frame = self._frames.get(key)
+        if frame is not None:
+            return frame
+
+        if kind == 'snapshot':
+            trains = [t for t in self._trains.values() if _matches(t, stations)]
+            payload = {"seq": self._seq, "timestamp": self._timestamp, "trains": trains, "count": len(trains)}
+        else:
+            visible = {train_id for train_id, t in self._trains.items() if _matches(t, stations)}
+            payload = {
+                "seq": self._seq,
+                "timestamp": self._timestamp,
+                "changed": {train_id: fields for train_id, fields in self._changes.items() if train_id in visible},
+                "added": [self._trains[train_id] for train_id in self._added if train_id in visible],
+                # Removed trains are no longer known, so cannot be filtered; clients ignore unknown ids
+                "removed": self._removed
+            }
+        frame = f"id: {self._seq}\nevent: {kind}\ndata: {self.encode(payload)}\n\n"
+        self._frames[key] = frame
+        return frame
+
+    def stream(self, stations: Optional[List[str]] = None, last_event_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Yield SSE frames for one subscriber
+
+        The first frame is a full `snapshot`; each later clock tick is a `delta`
+        with only the changed fields. A subscriber that falls behind by more
+        than one tick is sent a fresh snapshot instead of the missed deltas.
+
+        Args:
+            stations: Only include trains whose route starts or ends at one of these codes
+            last_event_id: SSE Last-Event-ID of a reconnecting client
+        """
+        wanted = frozenset(s.upper() for s in stations) if stations else None
+        with self._cond:
+            self._subscribers += 1
+        try:
+            try:
+                snapshot = self.source(0, self.heartbeat_s)
+            except Exception as e:
+                logger.error(f"Live feed source failed: {e}")
+                # Let the client retry
+                yield "retry: 5000\n: feed unavailable\n\n"
+                return
+            # Frames are built under the lock but yielded after releasing it,
+            # so a slow client never holds up the other subscribers
+            with self._cond:
+                self._publish(snapshot)
+                seen = self._seq
+                up_to_date = last_event_id is not None and last_event_id == str(seen)
+                frame = None if up_to_date else self._frame('snapshot', wanted)
+            if frame:
+                yield frame
+
+            while True:
+                snapshot = self.source(seen, self.heartbeat_s)
+                if snapshot.seq <= seen:
+                    frame = ": keepalive\n\n"
+                else:
+                    with self._cond:
+                        self._publish(snapshot)
+                        kind = 'delta' if self._base_seq == seen else 'snapshot'
+                        frame = self._frame(kind, wanted)
+                        seen = self._seq
+                yield frame
+        finally:
+            with self._cond:
+                self._subscribers -= 1
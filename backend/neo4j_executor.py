@@ -0,0 +1,144 @@
+"""
+Query executor on top of a shared Neo4j driver.
+Every query runs in a managed read or write transaction (execute_read /
+execute_write), so transient cluster errors are retried by the driver and
+reads can be routed to followers. Sessions are short-lived and per call
+(they are not thread-safe); the connections behind them come from the
+driver's pool, which all Flask threads share.
+"""
+
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional
+import logging
+
+from neo4j import READ_ACCESS, WRITE_ACCESS, ResultSummary, SummaryCounters, unit_of_work
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_FETCH_SIZE = int(os.getenv('NEO4J_FETCH_SIZE', '1000'))       # Records per pull from the server
+DEFAULT_QUERY_TIMEOUT = float(os.getenv('NEO4J_QUERY_TIMEOUT', '30'))  # Seconds per transaction
+STREAM_RETRIES = 3
+
+RETRYABLE_ERRORS = (TransientError, ServiceUnavailable, SessionExpired)
+
+
+def driver_config() -> Dict[str, Any]:
+    """
+    Connection pool settings for GraphDatabase.driver(), overridable from the environment
+
+    Returns:
+        Keyword arguments for GraphDatabase.driver()
+    """
+    return {
+        'max_connection_pool_size': int(os.getenv('NEO4J_MAX_POOL_SIZE', '50')),
+        'connection_acquisition_timeout': float(os.getenv('NEO4J_ACQUISITION_TIMEOUT', '10')),
+        'connection_timeout': float(os.getenv('NEO4J_CONNECTION_TIMEOUT', '15')),
+        # Recycle connections before cloud load balancers drop idle ones
+        'max_connection_lifetime': float(os.getenv('NEO4J_MAX_CONNECTION_LIFETIME', '1800')),
+        # Upper bound on execute_read/execute_write retries of transient errors
+        'max_transaction_retry_time': float(os.getenv('NEO4J_MAX_RETRY_TIME', '15')),
+        'fetch_size': DEFAULT_FETCH_SIZE,
+    }
+
+
+def _values(tx, query: str, parameters: Dict) -> List[List]:
+    return tx.run(query, parameters).values()
+
+
+def _consume(tx, query: str, parameters: Dict) -> SummaryCounters:
+    return tx.run(query, parameters).consume().counters
+
+
+def _summary(tx, query: str, parameters: Dict) -> ResultSummary:
+    return tx.run(query, parameters).consume()
+
+
+class QueryExecutor:
+    def __init__(self, driver, database: str = 'neo4j', fetch_size: int = DEFAULT_FETCH_SIZE,
+                 timeout: Optional[float] = DEFAULT_QUERY_TIMEOUT):
+        """
+        Args:
+            driver: A neo4j Driver (shared, thread-safe)
+            database: Database every session targets
+            fetch_size: Records fetched per round trip when streaming results
+            timeout: Default transaction timeout in seconds (None for the server default)
+        """
+        self.driver = driver
+        self.database = database
+        self.fetch_size = fetch_size
+        self.timeout = timeout
+
+    def _session(self, access_mode: str, fetch_size: Optional[int] = None):
+        return self.driver.session(database=self.database, default_access_mode=access_mode,
+                                   fetch_size=fetch_size or self.fetch_size)
+
+    def _work(self, function, timeout: Optional[float]):
+        return unit_of_work(timeout=self.timeout if timeout is None else timeout)(function)
+
+    def read(self, query: str, parameters: Optional[Dict] = None,
+             timeout: Optional[float] = None) -> List[List]:
+        """
+        Run a read query in a managed transaction and return all rows as value lists
+
+        Args:
+            query: Cypher query
+            parameters: Query parameters
+            timeout: Transaction timeout in seconds (default: executor timeout)
+        """
+        with self._session(READ_ACCESS) as session:
+            return session.execute_read(self._work(_values, timeout), query, parameters or {})
+
+    def write(self, query: str, parameters: Optional[Dict] = None,
+              timeout: Optional[float] = None) -> SummaryCounters:
+        """
+        Run a write query in a managed transaction
+
+        Returns:
+            The query's summary counters (nodes_created, properties_set, ...)
+        """
+        with self._session(WRITE_ACCESS) as session:
+            return session.execute_write(self._work(_consume, timeout), query, parameters or {})
+
+    def explain(self, query: str, parameters: Optional[Dict] = None, profile: bool = False) -> Dict:
+        """
+        Plan a read query with EXPLAIN (compiles and caches the plan, runs nothing) or
+        PROFILE (executes it and records db hits per operator)
+
+        Returns:
+            {'plan': plan tree dict, 'time_ms': server time to produce and consume the result}
+        """
+        prefix = 'PROFILE ' if profile else 'EXPLAIN '
+        with self._session(READ_ACCESS) as session:
+            summary = session.execute_read(self._work(_summary, None), prefix + query, parameters or {})
+        return {
+            'plan': (summary.profile if profile else summary.plan) or {},
+            'time_ms': (summary.result_available_after or 0) + (summary.result_consumed_after or 0)
+        }
+
+    def stream(self, query: str, parameters: Optional[Dict] = None, timeout: Optional[float] = None,
+               fetch_size: Optional[int] = None) -> Iterator:
+        """
+        Yield records of a read query as they arrive, fetch_size at a time
+
+        The transaction stays open while the caller iterates, so it is explicit rather
+        than managed: transient errors are retried only until the first record is yielded.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        for attempt in range(STREAM_RETRIES + 1):
+            started = False
+            try:
+                with self._session(READ_ACCESS, fetch_size) as session:
+                    with session.begin_transaction(timeout=timeout) as tx:
+                        for record in tx.run(query, parameters or {}):
+                            started = True
+                            yield record
+                return
+            except RETRYABLE_ERRORS as e:
+                if started or attempt == STREAM_RETRIES:
+                    raise
+                logger.warning(f"⚠️ Transient Neo4j error, retrying stream ({attempt + 1}/{STREAM_RETRIES}): {e}")
+                time.sleep(0.5 * 2 ** attempt)
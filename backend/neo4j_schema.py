@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Idempotent Neo4j schema bootstrap: uniqueness constraint and range indexes for
+station lookups, a full-text index for station search, and relationship indexes
+on ROUTE properties. Run as a script it times the registered queries before
+and after creating the schema.
+
+Usage:
+    python3 neo4j_schema.py [--repeats 5] [--no-timings]
+"""
+
+import argparse
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from cypher_queries import QUERIES
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEX_AWAIT_TIMEOUT_S = 300
+
+# (name, statement); IF NOT EXISTS makes every statement safe to re-run
+SCHEMA: List[Tuple[str, str]] = [
+    # Also the range index behind every Station {code: $code} lookup and import MERGE
+    ('station_code_unique',
+     "CREATE CONSTRAINT station_code_unique IF NOT EXISTS FOR (s:Station) REQUIRE s.code IS UNIQUE"),
+    ('station_name',
+     "CREATE RANGE INDEX station_name IF NOT EXISTS FOR (s:Station) ON (s.name)"),
+    ('station_search',
+     "CREATE FULLTEXT INDEX station_search IF NOT EXISTS FOR (s:Station) ON EACH [s.name, s.code, s.state, s.zone]"),
+    ('route_train',
+     "CREATE RANGE INDEX route_train IF NOT EXISTS FOR ()-[r:ROUTE]-() ON (r.train)"),
+    ('route_status',
+     "CREATE RANGE INDEX route_status IF NOT EXISTS FOR ()-[r:ROUTE]-() ON (r.status)"),
+]
+
+
+def ensure_schema(executor, await_timeout_s: Optional[float] = INDEX_AWAIT_TIMEOUT_S) -> int:
+    """
+    Create any missing constraints and indexes
+
+    Args:
+        executor: A QueryExecutor
+        await_timeout_s: Wait this long for new indexes to come online (None to return immediately)
+
+    Returns:
+        Number of constraints and indexes created
+    """
+    created = 0
+    for name, statement in SCHEMA:
+        counters = executor.write(statement)
+        added = counters.indexes_added + counters.constraints_added
+        created += added
+        if added:
+            logger.info(f"✅ Created {name}")
+    if created and await_timeout_s:
+        executor.read("CALL db.awaitIndexes($timeout)", {'timeout': int(await_timeout_s)}, timeout=0)
+    logger.info(f"✅ Schema ready ({created} created, {len(SCHEMA) - created} already present)")
+    return created
+
+
+def time_queries(executor, repeats: int = 5) -> Dict[str, Optional[float]]:
+    """
+    Median wall time in ms of every registered query with its sample parameters
+
+    Each query runs once untimed first so plan compilation is not counted.
+    Queries that fail (e.g. full-text search before its index exists) map to None.
+    """
+    timings: Dict[str, Optional[float]] = {}
+    for query in QUERIES.values():
+        try:
+            executor.read(query.text, query.sample_params)
+            samples = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                executor.read(query.text, query.sample_params)
+                samples.append((time.perf_counter() - started) * 1000)
+            timings[query.name] = statistics.median(samples)
+        except Exception as e:
+            logger.warning(f"⚠️ {query.name} failed: {e}")
+            timings[query.name] = None
+    return timings
+
+
+def _ms(value: Optional[float]) -> str:
+    return '-' if value is None else f"{value:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create Neo4j constraints and indexes")
+    parser.add_argument('--repeats', type=int, default=5, help="Timed runs per query")
+    parser.add_argument('--no-timings', action='store_true', help="Only create the schema")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    from neo4j_service import neo4j_service
+
+    if not neo4j_service.test_connection():
+        logger.error("❌ Neo4j is not reachable")
+        return
+    executor = neo4j_service.executor
+    try:
+        before = {} if args.no_timings else time_queries(executor, args.repeats)
+        ensure_schema(executor)
+        if args.no_timings:
+            return
+        after = time_queries(executor, args.repeats)
+        print(f"{'query':<26} {'before ms':>10} {'after ms':>10}")
+        for name in QUERIES:
+            print(f"{name:<26} {_ms(before.get(name)):>10} {_ms(after.get(name)):>10}")
+    finally:
+        neo4j_service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,25 @@ Neo4j AuraDB service for fetching railway station data
 """
 
 import os
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional
 from neo4j import GraphDatabase
+from neo4j.exceptions import ClientError
 import logging
 
+from cypher_queries import (CONNECTED_STATIONS, PING, QUERIES, ROUTE_EDGES, SEARCH_STATIONS, SEARCH_STATIONS_CONTAINS,
+                            STATION_BY_CODE, STATIONS_ALL, STATIONS_PAGE, fulltext_query, summarize_plan)
+from neo4j_executor import QueryExecutor, driver_config
+from station_repository import StationRepository, station_from_values
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class Neo4jService:
+
+class Neo4jService(StationRepository):
+    name = 'neo4j'
+    remote = True
+
     def __init__(self):
         """Initialize Neo4j connection"""
         self.uri = os.getenv('NEO4J_URI', '')
@@ -26,31 +36,84 @@ class Neo4jService:
             try:
                 self.driver = GraphDatabase.driver(
                     self.uri, 
-                    auth=(self.username, self.password)
+                    auth=(self.username, self.password),
+                    **driver_config()
                 )
                 logger.info("✅ Connected to Neo4j AuraDB")
             except Exception as e:
                 logger.error(f"❌ Failed to connect to Neo4j: {e}")
                 self.driver = None
 
+        # Every query goes through managed transactions on the driver's shared pool
+        self.executor = QueryExecutor(self.driver, self.database) if self.driver else None
+        self._warmed_up = False
+
     def close(self):
         """Close Neo4j connection"""
         if self.driver:
             self.driver.close()
 
+    def configured(self) -> bool:
+        """Whether credentials were found and a driver was created"""
+        return self.driver is not None
+
     def test_connection(self) -> bool:
         """Test Neo4j connection"""
         if not self.driver:
             return False
         
         try:
-            with self.driver.session(database=self.database) as session:
-                result = session.run("RETURN 1 as test")
-                return result.single() is not None
+            return bool(self.executor.read(PING.text, timeout=5))
         except Exception as e:
             logger.error(f"Neo4j connection test failed: {e}")
             return False
 
+    def warm_up(self) -> int:
+        """
+        Compile and cache the plan of every registered query with EXPLAIN (nothing is executed)
+
+        Only the first successful call does any work.
+
+        Returns:
+            Number of queries planned
+        """
+        if not self.executor or self._warmed_up:
+            return 0
+        planned = 0
+        for query in QUERIES.values():
+            try:
+                self.executor.explain(query.text, query.sample_params)
+                planned += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Could not plan query {query.name}: {e}")
+        self._warmed_up = planned == len(QUERIES)
+        logger.info(f"✅ Warmed up {planned}/{len(QUERIES)} query plans")
+        return planned
+
+    def plan_report(self, profile: bool = False) -> List[Dict]:
+        """
+        EXPLAIN (or PROFILE) every registered query with its sample parameters
+
+        Returns:
+            One {'name', 'db_hits', 'rows', 'operators', 'time_ms'} dictionary per query
+        """
+        reports = []
+        for query in QUERIES.values():
+            try:
+                explained = self.executor.explain(query.text, query.sample_params, profile=profile)
+            except Exception as e:
+                reports.append({'name': query.name, 'time_ms': 0, 'db_hits': None, 'rows': None,
+                                'operators': [f"error: {e}"]})
+                continue
+            report = {'name': query.name, 'time_ms': explained['time_ms']}
+            report.update(summarize_plan(explained['plan'], profile))
+            reports.append(report)
+        return reports
+
+    def _fetch_stations(self, query: str, **params) -> List[Dict]:
+        """Run a registered query returning station_projection() columns and map all rows at once"""
+        return [station_from_values(row) for row in self.executor.read(query, params)]
+
     def get_stations(self, limit: Optional[int] = None) -> List[Dict]:
         """
         Fetch all railway stations from Neo4j
@@ -66,80 +129,41 @@ class Neo4jService:
             return []
         
         try:
-            with self.driver.session(database=self.database) as session:
-                # Query to fetch stations - adjust based on your node structure
-                query = """
-                MATCH (s:Station)
-                RETURN s.code as code,
-                       s.name as name,
-                       s.lat as latitude,
-                       s.lng as longitude,
-                       s.zone as zone,
-                       s.state as state,
-                       s.division as division,
-                       s.type as type,
-                       s.platforms as platforms
-                ORDER BY s.name
-                """
-                
-                if limit:
-                    query += f" LIMIT {limit}"
-                
-                result = session.run(query)
-                stations = []
-                
-                for record in result:
-                    # Handle null coordinates with default India center
-                    lat = record.get("latitude")
-                    lng = record.get("longitude")
-                    
-                    if lat is None or lng is None:
-                        # Use real coordinates for major stations, default for others
-                        station_code = record.get("code", "")
-                        
-                        # Real coordinates for major stations
-                        real_coords = {
-                            "NDLS": (28.6448, 77.2167),  # New Delhi
-                            "MTJ": (27.4924, 77.6739),   # Mathura Junction
-                            "AGC": (27.1767, 78.0081),   # Agra Cantt
-                            "NZM": (28.5849, 77.2197),   # Hazrat Nizamuddin
-                            "MAS": (13.0827, 80.2707),   # Chennai Central
-                            "CSTM": (18.9404, 72.8354),  # Mumbai CST
-                            "HWH": (22.5851, 88.3468),   # Howrah
-                            "SBC": (12.9716, 77.5946),   # Bangalore City
-                            "ADI": (23.0225, 72.5714),   # Ahmedabad
-                            "BCT": (19.0176, 72.8562),   # Mumbai Central
-                        }
-                        
-                        if station_code in real_coords:
-                            lat, lng = real_coords[station_code]
-                        else:
-                            # Use default India center coordinates for stations without coordinates
-                            lat = 20.5937
-                            lng = 78.9629
-                    
-                    station = {
-                        "id": record.get("code", ""),
-                        "name": record.get("name", ""),
-                        "position": {
-                            "latitude": lat,
-                            "longitude": lng
-                        },
-                        "type": record.get("type", "minor"),
-                        "platforms": record.get("platforms", 2),
-                        "zone": record.get("zone", ""),
-                        "state": record.get("state", ""),
-                        "division": record.get("division", "")
-                    }
-                    stations.append(station)
-                
-                logger.info(f"✅ Fetched {len(stations)} stations from Neo4j")
-                return stations
+            query, params = self._stations_query(limit)
+            stations = self._fetch_stations(query, **params)
+            logger.info(f"✅ Fetched {len(stations)} stations from Neo4j")
+            return stations
                 
         except Exception as e:
             logger.error(f"Error fetching stations from Neo4j: {e}")
             return []
 
+    def iter_stations(self, limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Stream railway stations from Neo4j one at a time instead of building a list
+
+        Records are pulled NEO4J_FETCH_SIZE at a time; the transaction stays open until
+        the generator is exhausted or closed. Errors are logged and end the stream early.
+
+        Args:
+            limit: Maximum number of stations to yield (None for all)
+        """
+        if not self.driver:
+            logger.error("Neo4j driver not initialized")
+            return
+        
+        try:
+            for record in self.executor.stream(*self._stations_query(limit)):
+                yield station_from_values(record)
+        except Exception as e:
+            logger.error(f"Error streaming stations from Neo4j: {e}")
+
+    @staticmethod
+    def _stations_query(limit: Optional[int]):
+        if limit:
+            return STATIONS_PAGE.text, {'limit': int(limit)}
+        return STATIONS_ALL.text, {}
+
     def get_station_by_code(self, station_code: str) -> Optional[Dict]:
         """
         Fetch a specific station by its code
@@ -154,67 +178,8 @@ class Neo4jService:
             return None
         
         try:
-            with self.driver.session(database=self.database) as session:
-                query = """
-                MATCH (s:Station {code: $code})
-                RETURN s.code as code,
-                       s.name as name,
-                       s.lat as latitude,
-                       s.lng as longitude,
-                       s.zone as zone,
-                       s.state as state,
-                       s.division as division,
-                       s.type as type,
-                       s.platforms as platforms
-                """
-                
-                result = session.run(query, code=station_code)
-                record = result.single()
-                
-                if record:
-                    # Handle null coordinates with default India center
-                    lat = record.get("latitude")
-                    lng = record.get("longitude")
-                    
-                    if lat is None or lng is None:
-                        # Use real coordinates for major stations, default for others
-                        station_code = record.get("code", "")
-                        
-                        # Real coordinates for major stations
-                        real_coords = {
-                            "NDLS": (28.6448, 77.2167),  # New Delhi
-                            "MTJ": (27.4924, 77.6739),   # Mathura Junction
-                            "AGC": (27.1767, 78.0081),   # Agra Cantt
-                            "NZM": (28.5849, 77.2197),   # Hazrat Nizamuddin
-                            "MAS": (13.0827, 80.2707),   # Chennai Central
-                            "CSTM": (18.9404, 72.8354),  # Mumbai CST
-                            "HWH": (22.5851, 88.3468),   # Howrah
-                            "SBC": (12.9716, 77.5946),   # Bangalore City
-                            "ADI": (23.0225, 72.5714),   # Ahmedabad
-                            "BCT": (19.0176, 72.8562),   # Mumbai Central
-                        }
-                        
-                        if station_code in real_coords:
-                            lat, lng = real_coords[station_code]
-                        else:
-                            # Use default India center coordinates for stations without coordinates
-                            lat = 20.5937
-                            lng = 78.9629
-                    
-                    return {
-                        "id": record.get("code", ""),
-                        "name": record.get("name", ""),
-                        "position": {
-                            "latitude": lat,
-                            "longitude": lng
-                        },
-                        "type": record.get("type", "minor"),
-                        "platforms": record.get("platforms", 2),
-                        "zone": record.get("zone", ""),
-                        "state": record.get("state", ""),
-                        "division": record.get("division", "")
-                    }
-                return None
+            stations = self._fetch_stations(STATION_BY_CODE.text, code=station_code)
+            return stations[0] if stations else None
                 
         except Exception as e:
             logger.error(f"Error fetching station {station_code} from Neo4j: {e}")
@@ -235,75 +200,10 @@ class Neo4jService:
             return []
         
         try:
-            with self.driver.session(database=self.database) as session:
-                # Query to find stations connected via route relationships
-                query = """
-                MATCH (s:Station {code: $station_code})
-                OPTIONAL MATCH (s)-[r:ROUTE]-(connected:Station)
-                WITH s, collect(DISTINCT connected) as connected_stations
-                UNWIND [s] + connected_stations as station
-                RETURN station.code as code,
-                       station.name as name,
-                       station.lat as latitude,
-                       station.lng as longitude,
-                       station.zone as zone,
-                       station.state as state,
-                       station.division as division,
-                       station.type as type,
-                       station.platforms as platforms
-                ORDER BY station.name
-                """
-                
-                result = session.run(query, station_code=station_code)
-                stations = []
-                
-                for record in result:
-                    # Handle null coordinates with default India center
-                    lat = record.get("latitude")
-                    lng = record.get("longitude")
-                    
-                    if lat is None or lng is None:
-                        # Use real coordinates for major stations, default for others
-                        station_code = record.get("code", "")
-                        
-                        # Real coordinates for major stations
-                        real_coords = {
-                            "NDLS": (28.6448, 77.2167),  # New Delhi
-                            "MTJ": (27.4924, 77.6739),   # Mathura Junction
-                            "AGC": (27.1767, 78.0081),   # Agra Cantt
-                            "NZM": (28.5849, 77.2197),   # Hazrat Nizamuddin
-                            "MAS": (13.0827, 80.2707),   # Chennai Central
-                            "CSTM": (18.9404, 72.8354),  # Mumbai CST
-                            "HWH": (22.5851, 88.3468),   # Howrah
-                            "SBC": (12.9716, 77.5946),   # Bangalore City
-                            "ADI": (23.0225, 72.5714),   # Ahmedabad
-                            "BCT": (19.0176, 72.8562),   # Mumbai Central
-                        }
-                        
-                        if station_code in real_coords:
-                            lat, lng = real_coords[station_code]
-                        else:
-                            # Use default India center coordinates for stations without coordinates
-                            lat = 20.5937
-                            lng = 78.9629
-                    
-                    station = {
-                        "id": record.get("code", ""),
-                        "name": record.get("name", ""),
-                        "position": {
-                            "latitude": lat,
-                            "longitude": lng
-                        },
-                        "type": record.get("type", "minor"),
-                        "platforms": record.get("platforms", 2),
-                        "zone": record.get("zone", ""),
-                        "state": record.get("state", ""),
-                        "division": record.get("division", "")
-                    }
-                    stations.append(station)
-                
-                logger.info(f"✅ Found {len(stations)} connected stations for {station_code}")
-                return stations
+            # Stations connected via route relationships
+            stations = self._fetch_stations(CONNECTED_STATIONS.text, station_code=station_code)
+            logger.info(f"✅ Found {len(stations)} connected stations for {station_code}")
+            return stations
                 
         except Exception as e:
             logger.error(f"Error fetching connected stations for {station_code}: {e}")
@@ -311,7 +211,7 @@ class Neo4jService:
 
     def search_stations(self, search_term: str, limit: int = 100) -> List[Dict]:
         """
-        Search stations by name, code, or other fields
+        Search stations by name, code, state or zone using the station_search full-text index
         
         Args:
             search_term: The search term
@@ -324,80 +224,50 @@ class Neo4jService:
             return []
         
         try:
-            with self.driver.session(database=self.database) as session:
-                query = """
-                MATCH (s:Station)
-                WHERE toLower(s.name) CONTAINS toLower($search) 
-                   OR toLower(s.code) CONTAINS toLower($search)
-                   OR toLower(s.zone) CONTAINS toLower($search)
-                   OR toLower(s.state) CONTAINS toLower($search)
-                RETURN s.code as code,
-                       s.name as name,
-                       s.lat as latitude,
-                       s.lng as longitude,
-                       s.zone as zone,
-                       s.state as state,
-                       s.division as division,
-                       s.type as type,
-                       s.platforms as platforms
-                ORDER BY s.name
-                LIMIT $limit
-                """
-                
-                result = session.run(query, search=search_term, limit=limit)
-                stations = []
-                
-                for record in result:
-                    # Handle null coordinates with default India center
-                    lat = record.get("latitude")
-                    lng = record.get("longitude")
-                    
-                    if lat is None or lng is None:
-                        # Use real coordinates for major stations, default for others
-                        station_code = record.get("code", "")
-                        
-                        # Real coordinates for major stations
-                        real_coords = {
-                            "NDLS": (28.6448, 77.2167),  # New Delhi
-                            "MTJ": (27.4924, 77.6739),   # Mathura Junction
-                            "AGC": (27.1767, 78.0081),   # Agra Cantt
-                            "NZM": (28.5849, 77.2197),   # Hazrat Nizamuddin
-                            "MAS": (13.0827, 80.2707),   # Chennai Central
-                            "CSTM": (18.9404, 72.8354),  # Mumbai CST
-                            "HWH": (22.5851, 88.3468),   # Howrah
-                            "SBC": (12.9716, 77.5946),   # Bangalore City
-                            "ADI": (23.0225, 72.5714),   # Ahmedabad
-                            "BCT": (19.0176, 72.8562),   # Mumbai Central
-                        }
-                        
-                        if station_code in real_coords:
-                            lat, lng = real_coords[station_code]
-                        else:
-                            # Use default India center coordinates for stations without coordinates
-                            lat = 20.5937
-                            lng = 78.9629
-                    
-                    station = {
-                        "id": record.get("code", ""),
-                        "name": record.get("name", ""),
-                        "position": {
-                            "latitude": lat,
-                            "longitude": lng
-                        },
-                        "type": record.get("type", "minor"),
-                        "platforms": record.get("platforms", 2),
-                        "zone": record.get("zone", ""),
-                        "state": record.get("state", ""),
-                        "division": record.get("division", "")
-                    }
-                    stations.append(station)
-                
-                logger.info(f"✅ Found {len(stations)} stations matching '{search_term}'")
-                return stations
+            terms = fulltext_query(search_term)
+            if not terms:
+                return []
+            try:
+                stations = self._fetch_stations(SEARCH_STATIONS.text, terms=terms, limit=limit)
+            except ClientError as e:
+                # station_search index missing (run neo4j_schema.py); scan instead
+                logger.warning(f"⚠️ Full-text search unavailable, falling back to CONTAINS: {e.code}")
+                stations = self._fetch_stations(SEARCH_STATIONS_CONTAINS.text, search=search_term, limit=limit)
+            logger.info(f"✅ Found {len(stations)} stations matching '{search_term}'")
+            return stations
                 
         except Exception as e:
             logger.error(f"Error searching stations in Neo4j: {e}")
             return []
 
+    def get_route_edges(self) -> List[Dict]:
+        """
+        Fetch every ROUTE relationship between stations
+
+        Returns:
+            List of {'from', 'to', 'train', 'status'} dictionaries
+        """
+        if not self.driver:
+            logger.error("Neo4j driver not initialized")
+            return []
+
+        try:
+            edges = [
+                {
+                    "from": source,
+                    "to": target,
+                    "train": train,
+                    "status": status
+                }
+                for source, target, train, status in self.executor.read(ROUTE_EDGES.text)
+            ]
+
+            logger.info(f"✅ Fetched {len(edges)} route relationships from Neo4j")
+            return edges
+
+        except Exception as e:
+            logger.error(f"Error fetching route relationships from Neo4j: {e}")
+            return []
+
 # Global instance
 neo4j_service = Neo4jService()
@@ -0,0 +1,128 @@
+"""
+Cache of pre-serialized JSON responses for datasets that rarely change.
+Keeps the encoded, gzip and (if available) brotli bytes with strong ETags
+and answers If-None-Match revalidation with 304 Not Modified.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+import logging
+
+from flask import Response, request
+
+try:
+    import brotli  # Optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse:
+    def __init__(self, body: bytes):
+        """Encode every representation of a payload once"""
+        self.bodies: Dict[str, bytes] = {'identity': body}
+        if len(body) > 512:
+            self.bodies['gzip'] = gzip.compress(body, compresslevel=6)
+            if brotli is not None:
+                self.bodies['br'] = brotli.compress(body, quality=5)
+
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # Each content-coding is a different representation, so gets its own strong ETag
+        self.etags: Dict[str, str] = {
+            coding: digest if coding == 'identity' else f"{digest}-{coding}"
+            for coding in self.bodies
+        }
+
+
+class ResponseCache:
+    def __init__(self, encode: Callable[[Dict], str] = json.dumps, max_entries: int = 256):
+        """
+        Args:
+            encode: Function turning a payload dict into a JSON string
+            max_entries: Least recently used entries beyond this are evicted
+        """
+        self.encode = encode
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Invalidation counters per prefix (None for invalidate-all); a build only stores its
+        # entry if no invalidation covering its key ran meanwhile, so stale data is never re-cached
+        self._generations: Dict[Optional[str], int] = {}
+
+    def _generation(self, key: str) -> int:
+        """Sum of the invalidation counters covering key; caller holds self._lock"""
+        return sum(count for prefix, count in self._generations.items()
+                   if prefix is None or key.startswith(prefix))
+
+    def get(self, key: str, build: Callable[[], Dict]) -> CachedResponse:
+        """Return the cached entry for key, building and encoding it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            generation = self._generation(key)
+
+        # Build outside the lock; a concurrent miss just builds the same bytes twice
+        entry = CachedResponse(self.encode(build()).encode('utf-8'))
+        with self._lock:
+            if self._generation(key) != generation:
+                # Invalidated while building: serve this response once but don't cache it
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, prefix: Optional[str] = None):
+        """Drop every entry, or only those whose key starts with prefix"""
+        with self._lock:
+            self._generations[prefix] = self._generations.get(prefix, 0) + 1
+            if prefix is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                keys = [key for key in self._entries if key.startswith(prefix)]
+                for key in keys:
+                    del self._entries[key]
+                dropped = len(keys)
+        logger.info(f"Invalidated {dropped} cached responses" + (f" for '{prefix}'" if prefix else ""))
+
+    def respond(self, key: str, build: Callable[[], Dict]) -> Response:
+        """
+        Serve a cached payload for the current request
+
+        Picks brotli or gzip from Accept-Encoding, sets a strong ETag and
+        returns 304 when If-None-Match already names the current version.
+        Exceptions raised by build propagate and nothing is cached.
+        """
+        entry = self.get(key, build)
+
+        matched = next((coding for coding, etag in entry.etags.items()
+                        if request.if_none_match.contains(etag)), None)
+        if matched is not None:
+            coding = matched
+            response = Response(status=304)
+        else:
+            coding = 'identity'
+            for candidate in ('br', 'gzip'):
+                if candidate in entry.bodies and request.accept_encodings[candidate]:
+                    coding = candidate
+                    break
+            response = Response(entry.bodies[coding], mimetype='application/json')
+            if coding != 'identity':
+                response.headers['Content-Encoding'] = coding
+
+        response.set_etag(entry.etags[coding])
+        response.headers['Vary'] = 'Accept-Encoding'
+        # Clients may keep the body but must revalidate (cheap 304) before reuse
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
@@ -0,0 +1,361 @@
+"""
+In-process adjacency-list graph of ROUTE relationships between stations.
+Loaded from Neo4j and swapped in whole on reload, so rerouting runs A* and Yen's
+k-shortest paths locally instead of expanding variable-length paths in Cypher.
+What-if scenarios apply their failed/slowed segments as a SegmentOverlay on top
+of the shared graph snapshot, so nothing is ever written back to the database.
+"""
+
+import heapq
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from spatial_index import haversine_km
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Length assumed for a segment when either end has no known coordinates
+UNKNOWN_SEGMENT_KM = 25.0
+
+# Average running speed and per-stop dwell used to estimate travel time
+DEFAULT_SPEED_KMPH = 60.0
+DWELL_MINUTES = 2.0
+
+WEIGHTS = ('hops', 'distance', 'time')
+
+OPEN_STATUSES = (None, 'OPEN')
+
+# Maps a station code to (lat, lng), or None when the location is unknown
+CoordinateLookup = Callable[[str], Optional[Tuple[float, float]]]
+
+
+class RouteGraph:
+    def __init__(self):
+        """Create an empty graph; call load() with ROUTE edges to populate it"""
+        # (adjacency, every station located) swapped as one snapshot; adjacency maps
+        # station -> neighbour -> {(from, to, train): status}, with each ROUTE relationship stored
+        # under both endpoints since paths treat it as bidirectional
+        self._graph: Tuple[Dict[str, Dict[str, Dict[Tuple[str, str, str], Optional[str]]]], bool] = ({}, False)
+        self._edge_count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def _adjacency(self) -> Dict[str, Dict[str, Dict[Tuple[str, str, str], Optional[str]]]]:
+        return self._graph[0]
+
+    def __len__(self) -> int:
+        return self._edge_count
+
+    def __contains__(self, station_code: str) -> bool:
+        return station_code in self._adjacency
+
+    def load(self, edges: Iterable[Dict], coordinates: Optional[CoordinateLookup] = None):
+        """
+        Replace the graph with a fresh set of ROUTE relationships
+
+        Args:
+            edges: Dicts with 'from', 'to', 'train' and 'status' keys
+            coordinates: Station locations the searches will use; checked once here so the
+                A* heuristic is only used when every station is located (see PathCost.heuristic)
+        """
+        adjacency: Dict[str, Dict[str, Dict[Tuple[str, str, str], Optional[str]]]] = {}
+        count = 0
+        for edge in edges:
+            source, target = edge.get('from'), edge.get('to')
+            if not source or not target:
+                continue
+            key = (source, target, edge.get('train'))
+            adjacency.setdefault(source, {}).setdefault(target, {})[key] = edge.get('status')
+            adjacency.setdefault(target, {}).setdefault(source, {})[key] = edge.get('status')
+            count += 1
+
+        # An unlocated segment costs a flat UNKNOWN_SEGMENT_KM, which can be far less than the straight
+        # line between its neighbours, so one unlocated station anywhere makes the estimate overshoot
+        located = coordinates is not None and all(coordinates(station) is not None for station in adjacency)
+
+        # Swap in one assignment so concurrent searches see either the old or the new graph
+        with self._lock:
+            self._graph = (adjacency, located)
+            self._edge_count = count
+        logger.info(f"✅ Route graph loaded: {len(adjacency)} stations, {count} ROUTE relationships")
+
+    def neighbours(self, station_code: str) -> List[str]:
+        """Stations directly connected to station_code by any ROUTE relationship"""
+        return list(self._adjacency.get(station_code, {}))
+
+    @staticmethod
+    def _is_open(relations: Dict[Tuple[str, str, str], Optional[str]]) -> bool:
+        return any(status in OPEN_STATUSES for status in relations.values())
+
+    def best_path(self, source: str, destination: str, cost: 'PathCost',
+                  max_hops: int = 20) -> Optional[Dict]:
+        """
+        Cheapest path over OPEN (or status-less) segments
+
+        Args:
+            source: Start station code
+            destination: Target station code
+            cost: Weighting to minimise (hops, distance or time)
+            max_hops: Longest path to consider
+
+        Returns:
+            Path description (see PathCost.describe) or None if unreachable
+        """
+        adjacency, located = self._graph
+        found = self._search(adjacency, located, source, destination, cost, max_hops=max_hops)
+        return cost.describe(found[0]) if found else None
+
+    def k_shortest_paths(self, source: str, destination: str, cost: 'PathCost', k: int = 3,
+                         max_hops: int = 20, time_budget_ms: Optional[float] = None) -> Tuple[List[Dict], bool]:
+        """
+        Up to k loopless alternatives, cheapest first, using Yen's algorithm
+
+        Args:
+            source: Start station code
+            destination: Target station code
+            cost: Weighting to minimise (hops, distance or time)
+            k: Number of alternatives wanted
+            max_hops: Longest path to consider
+            time_budget_ms: Stop searching for further alternatives after this long
+
+        Returns:
+            (paths, complete) where complete is False if the time budget cut the search short
+        """
+        deadline = time.monotonic() + time_budget_ms / 1000.0 if time_budget_ms else None
+        # Every spur search runs against the same snapshot even if a reload swaps the graph meanwhile
+        adjacency, located = self._graph
+        first = self._search(adjacency, located, source, destination, cost, max_hops=max_hops)
+        if not first or k <= 0:
+            return [], True
+
+        accepted: List[Tuple[List[str], float]] = [first]
+        candidates: List[Tuple[float, List[str]]] = []
+        seen = {tuple(first[0])}
+        complete = True
+
+        while len(accepted) < k:
+            last_path = accepted[-1][0]
+            for j in range(len(last_path) - 1):
+                if deadline and time.monotonic() > deadline:
+                    complete = False
+                    break
+                spur = last_path[j]
+                root = last_path[:j + 1]
+                # Forbid the next hop of every accepted path sharing this root, and revisiting the root
+                blocked_edges = {frozenset(path[j:j + 2]) for path, _ in accepted if path[:j + 1] == root}
+                blocked_nodes = set(root[:-1])
+                found = self._search(adjacency, located, spur, destination, cost, max_hops=max_hops - j,
+                                     blocked_nodes=blocked_nodes, blocked_edges=blocked_edges)
+                if not found:
+                    continue
+                path = root[:-1] + found[0]
+                if tuple(path) in seen:
+                    continue
+                seen.add(tuple(path))
+                heapq.heappush(candidates, (cost.path_cost(root) + found[1], path))
+            if not complete or not candidates:
+                break
+            total, path = heapq.heappop(candidates)
+            accepted.append((path, total))
+
+        if not complete:
+            logger.info(f"k-shortest search {source}->{destination} hit its {time_budget_ms}ms budget "
+                        f"with {len(accepted)} of {k} paths")
+        return [cost.describe(path) for path, _ in accepted], complete
+
+    def _search(self, adjacency: Dict, located: bool, source: str, destination: str, cost: 'PathCost',
+                max_hops: int = 20,
+                blocked_nodes: Set[str] = frozenset(),
+                blocked_edges: Set[frozenset] = frozenset()) -> Optional[Tuple[List[str], float]]:
+        """
+        A* over open segments, avoiding blocked stations and segments; returns (path, cost)
+
+        The straight-line heuristic is only a lower bound when every station is located,
+        otherwise this falls back to Dijkstra (h = 0).
+        """
+        failed = cost.overlay.failed
+        if source not in adjacency or destination not in adjacency or source in blocked_nodes:
+            return None
+
+        # Labels are (station, hops): a station reached cheaply over many hops must not hide a
+        # costlier route with hops to spare under max_hops. A label is dominated, and skipped, once
+        # the station has been settled with no more hops (it was settled at no greater cost).
+        start = (source, 0)
+        best: Dict[Tuple[str, int], float] = {start: 0.0}
+        parents: Dict[Tuple[str, int], Optional[Tuple[str, int]]] = {start: None}
+        fewest_hops: Dict[str, int] = {}
+        heuristic = cost.heuristic if located else (lambda station, goal: 0.0)
+        queue = [(heuristic(source, destination), 0.0, source, 0)]
+        while queue:
+            _, spent, station, hops = heapq.heappop(queue)
+            if station == destination:
+                return self._unwind(parents, (station, hops)), spent
+            if fewest_hops.get(station, max_hops + 1) <= hops:
+                continue
+            fewest_hops[station] = hops
+            if hops >= max_hops:
+                continue
+            for neighbour, relations in adjacency[station].items():
+                if fewest_hops.get(neighbour, max_hops + 1) <= hops + 1:
+                    continue
+                if neighbour in blocked_nodes or not self._is_open(relations):
+                    continue
+                if blocked_edges or failed:
+                    segment = frozenset((station, neighbour))
+                    if segment in blocked_edges or segment in failed:
+                        continue
+                label = (neighbour, hops + 1)
+                candidate = spent + cost.edge(station, neighbour)
+                if candidate < best.get(label, float('inf')):
+                    best[label] = candidate
+                    parents[label] = (station, hops)
+                    heapq.heappush(queue, (candidate + heuristic(neighbour, destination), candidate, neighbour, hops + 1))
+        return None
+
+    @staticmethod
+    def _unwind(parents: Dict[Tuple[str, int], Optional[Tuple[str, int]]], label: Tuple[str, int]) -> List[str]:
+        path = []
+        current: Optional[Tuple[str, int]] = label
+        while current is not None:
+            path.append(current[0])
+            current = parents[current]
+        path.reverse()
+        return path
+
+
+def segment_km(a: Optional[Tuple[float, float]], b: Optional[Tuple[float, float]]) -> float:
+    """Great-circle length of a segment, or UNKNOWN_SEGMENT_KM if an end is unlocated"""
+    if a is None or b is None:
+        return UNKNOWN_SEGMENT_KM
+    return haversine_km(*a, *b)
+
+
+class SegmentOverlay:
+    def __init__(self, failed: Iterable[Tuple[str, str]] = (),
+                 slowed: Optional[Dict[Tuple[str, str], float]] = None):
+        """
+        Scenario-scoped segment changes layered over the shared route graph
+
+        Segments are undirected station pairs. A failed segment cannot be used by
+        any train; a slowed segment's running time is multiplied by its factor.
+
+        Args:
+            failed: (from, to) station pairs that are out of service
+            slowed: (from, to) -> running-time factor (>= 1; > 1 means slower)
+
+        Raises:
+            ValueError: If a factor is below 1 (a speed-up would break the A* time bound)
+        """
+        self.failed = frozenset(frozenset(segment) for segment in failed)
+        self.slowed = {frozenset(segment): float(factor) for segment, factor in (slowed or {}).items()}
+        if any(not factor >= 1.0 for factor in self.slowed.values()):
+            raise ValueError("slowdown factor must be at least 1")
+
+    def slowdown(self, a: str, b: str) -> float:
+        return self.slowed.get(frozenset((a, b)), 1.0) if self.slowed else 1.0
+
+    @classmethod
+    def from_scenario(cls, scenario: Dict) -> 'SegmentOverlay':
+        """
+        Build an overlay from what-if scenario JSON
+
+        Accepts failed_segment: [from, to], failed_segments: [[from, to], ...] and
+        slowed_segments: [{from, to, factor}] or [[from, to, factor], ...].
+
+        Raises:
+            ValueError: If a segment is malformed
+        """
+        failed = list(scenario.get('failed_segments') or [])
+        if scenario.get('failed_segment'):
+            failed.append(scenario['failed_segment'])
+        for segment in failed:
+            if not isinstance(segment, (list, tuple)) or len(segment) != 2:
+                raise ValueError("failed segments must be [from, to] pairs")
+
+        slowed = {}
+        for segment in scenario.get('slowed_segments') or []:
+            if isinstance(segment, dict):
+                segment = (segment.get('from'), segment.get('to'), segment.get('factor'))
+            if not isinstance(segment, (list, tuple)) or len(segment) != 3 or not segment[0] or not segment[1]:
+                raise ValueError("slowed segments must be {from, to, factor}")
+            factor = float(segment[2])
+            if not factor >= 1.0:
+                raise ValueError("slowdown factor must be at least 1")
+            slowed[(segment[0], segment[1])] = factor
+
+        return cls(failed=[tuple(segment) for segment in failed], slowed=slowed)
+
+
+class PathCost:
+    def __init__(self, coordinates: CoordinateLookup, weight: str = 'hops',
+                 speed_kmph: float = DEFAULT_SPEED_KMPH, overlay: Optional[SegmentOverlay] = None):
+        """
+        Edge weights and A* heuristic for one path search
+
+        Args:
+            coordinates: Lookup from station code to (lat, lng)
+            weight: 'hops', 'distance' (km) or 'time' (minutes incl. dwell at each stop)
+            speed_kmph: Average running speed used for travel time
+            overlay: Scenario failures and slowdowns to apply (none by default)
+        """
+        if weight not in WEIGHTS:
+            raise ValueError(f"weight must be one of {list(WEIGHTS)}")
+        self.weight = weight
+        self.speed_kmph = speed_kmph
+        self.overlay = overlay or SegmentOverlay()
+        self._coordinates = coordinates
+        self._coords: Dict[str, Optional[Tuple[float, float]]] = {}
+        self._segments: Dict[Tuple[str, str], float] = {}
+
+    def coords(self, station: str) -> Optional[Tuple[float, float]]:
+        if station not in self._coords:
+            self._coords[station] = self._coordinates(station)
+        return self._coords[station]
+
+    def segment_km(self, a: str, b: str) -> float:
+        key = (a, b) if a <= b else (b, a)
+        if key not in self._segments:
+            self._segments[key] = segment_km(self.coords(a), self.coords(b))
+        return self._segments[key]
+
+    def segment_minutes(self, a: str, b: str) -> float:
+        return self.segment_km(a, b) / self.speed_kmph * 60.0 * self.overlay.slowdown(a, b)
+
+    def edge(self, a: str, b: str) -> float:
+        if self.weight == 'hops':
+            return 1.0
+        if self.weight == 'distance':
+            return self.segment_km(a, b)
+        return self.segment_minutes(a, b) + DWELL_MINUTES
+
+    def heuristic(self, station: str, destination: str) -> float:
+        """Straight-line distance (or its unslowed running time) to the destination; a lower bound
+        only on graphs whose stations are all located"""
+        if self.weight == 'hops':
+            return 0.0
+        here, goal = self.coords(station), self.coords(destination)
+        if not here or not goal:
+            return 0.0
+        km = haversine_km(*here, *goal)
+        return km if self.weight == 'distance' else km / self.speed_kmph * 60.0
+
+    def path_cost(self, path: List[str]) -> float:
+        return sum(self.edge(a, b) for a, b in zip(path, path[1:]))
+
+    def describe(self, path: List[str]) -> Dict:
+        """Summarise a path with its hop count, length and estimated travel time"""
+        segments = list(zip(path, path[1:]))
+        distance = sum(self.segment_km(a, b) for a, b in segments)
+        hops = len(segments)
+        # Dwell at every intermediate stop, not at the origin or destination
+        minutes = sum(self.segment_minutes(a, b) for a, b in segments) + DWELL_MINUTES * max(0, hops - 1)
+        return {
+            "path": path,
+            "hops": hops,
+            "distance_km": round(distance, 2),
+            "travel_time_min": round(minutes, 1)
+        }
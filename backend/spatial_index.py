@@ -0,0 +1,245 @@
+"""
+Uniform grid spatial index over station coordinates.
+Answers bounding-box, radius and nearest-station queries without scanning every station.
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from station_index import StationIndex
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Clustering grid: cells per 256px web-map tile edge (about one cluster per 64px)
+CLUSTER_CELLS_PER_TILE = 4
+# Deepest web-map zoom level clustering accepts
+MAX_CLUSTER_ZOOM = 22
+
+# Coordinates that mean "unknown" rather than a real location:
+# (0, 0) comes from the station CSV, the India center is station_repository's fallback
+PLACEHOLDER_COORDS = {(0.0, 0.0), (20.5937, 78.9629)}
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def station_coordinates(station: Dict) -> Optional[Tuple[float, float]]:
+    """Return (lat, lng) for a station, or None if it has no real location"""
+    position = station.get('position') or {}
+    lat = position.get('latitude')
+    lng = position.get('longitude')
+    if lat is None or lng is None:
+        return None
+    try:
+        coords = (float(lat), float(lng))
+    except (TypeError, ValueError):
+        return None
+    if coords in PLACEHOLDER_COORDS:
+        return None
+    return coords
+
+
+class SpatialIndex:
+    def __init__(self, index: StationIndex, cell_size_deg: float = 0.5):
+        """
+        Bucket every located station into a lat/lng grid
+
+        Args:
+            index: The shared StationIndex
+            cell_size_deg: Grid cell edge in degrees (0.5° is roughly 55 km)
+        """
+        self.index = index
+        self.cell_size = cell_size_deg
+        self._coords: Dict[int, Tuple[float, float]] = {}
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+
+        # Read the store's coordinate columns directly instead of materializing stations
+        for row, coords in enumerate(zip(index.store.lat.tolist(), index.store.lng.tolist())):
+            if coords[0] != coords[0] or coords[1] != coords[1] or coords in PLACEHOLDER_COORDS:
+                continue  # NaN (no location) or a placeholder
+            self._coords[row] = coords
+            self._cells.setdefault(self._cell(*coords), []).append(row)
+
+        xs = [x for x, _ in self._cells] or [0]
+        ys = [y for _, y in self._cells] or [0]
+        self._bounds = (min(xs), min(ys), max(xs), max(ys))
+        self._max_abs_lat = max((abs(lat) for lat, _ in self._coords.values()), default=0.0)
+
+        logger.info(f"✅ Spatial index: {len(self._coords)} located stations in {len(self._cells)} cells")
+
+    def __len__(self) -> int:
+        return len(self._coords)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_size), math.floor(lng / self.cell_size))
+
+    @staticmethod
+    def _ring_cells(cx: int, cy: int, ring: int):
+        """Yield the cells on the square perimeter `ring` steps away from (cx, cy)"""
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for x in range(cx - ring, cx + ring + 1):
+            yield (x, cy - ring)
+            yield (x, cy + ring)
+        for y in range(cy - ring + 1, cy + ring):
+            yield (cx - ring, y)
+            yield (cx + ring, y)
+
+    def coordinates(self, row: int) -> Optional[Tuple[float, float]]:
+        """Coordinates of an indexed row, or None if the station has no location"""
+        return self._coords.get(row)
+
+    def rows_in_bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List[int]:
+        """
+        Rows of stations inside a bounding box (inclusive), in load order
+
+        Args:
+            min_lat, min_lng: South-west corner
+            max_lat, max_lng: North-east corner
+        """
+        if min_lat > max_lat or min_lng > max_lng:
+            return []
+        lo_x, lo_y = self._cell(min_lat, min_lng)
+        hi_x, hi_y = self._cell(max_lat, max_lng)
+
+        rows: List[int] = []
+        if (hi_x - lo_x + 1) * (hi_y - lo_y + 1) > len(self._cells):
+            # Viewport spans more cells than are populated; walk the populated ones
+            cells = [rows_ for (x, y), rows_ in self._cells.items()
+                     if lo_x <= x <= hi_x and lo_y <= y <= hi_y]
+        else:
+            cells = [self._cells[(x, y)] for x in range(lo_x, hi_x + 1)
+                     for y in range(lo_y, hi_y + 1) if (x, y) in self._cells]
+
+        for cell_rows in cells:
+            for row in cell_rows:
+                lat, lng = self._coords[row]
+                if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                    rows.append(row)
+        rows.sort()
+        return rows
+
+    def within_bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List[Dict]:
+        """Stations inside a bounding box"""
+        return [self.index.station(row) for row in self.rows_in_bbox(min_lat, min_lng, max_lat, max_lng)]
+
+    def nearby(self, lat: float, lng: float, radius_km: float, limit: Optional[int] = None) -> List[Tuple[Dict, float]]:
+        """
+        Stations within radius_km of a point, nearest first
+
+        Returns:
+            List of (station, distance_km) tuples
+
+        Raises:
+            ValueError: If limit is given and less than 1
+        """
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be at least 1")
+        if radius_km < 0:
+            return []
+        # Degrees of latitude/longitude covered by the radius at this latitude
+        dlat = radius_km / 111.0
+        dlng = radius_km / max(1e-6, 111.0 * math.cos(math.radians(lat)))
+        hits = []
+        for row in self.rows_in_bbox(lat - dlat, lng - dlng, lat + dlat, lng + dlng):
+            distance = haversine_km(lat, lng, *self._coords[row])
+            if distance <= radius_km:
+                hits.append((distance, row))
+        hits.sort()
+        if limit is not None:
+            hits = hits[:limit]
+        return [(self.index.station(row), distance) for distance, row in hits]
+
+    def nearest(self, lat: float, lng: float, k: int = 1) -> List[Tuple[Dict, float]]:
+        """
+        The k stations closest to a point, searching outward ring by ring
+
+        Returns:
+            List of (station, distance_km) tuples, nearest first
+        """
+        if k <= 0 or not self._coords:
+            return []
+        cx, cy = self._cell(lat, lng)
+        # Narrowest a cell can be: longitude degrees shrink towards the poles
+        widest_lat = min(89.0, max(abs(lat), self._max_abs_lat))
+        ring_km = self.cell_size * 111.0 * max(0.05, math.cos(math.radians(widest_lat)))
+        min_x, min_y, max_x, max_y = self._bounds
+        max_ring = max(abs(cx - min_x), abs(cx - max_x), abs(cy - min_y), abs(cy - max_y))
+
+        hits: List[Tuple[float, int]] = []
+        for ring in range(max_ring + 1):
+            if 8 * ring > len(self._cells):
+                # The ring has more cells than are populated (e.g. a point far from every station):
+                # finish with the populated cells from this ring outward instead of walking empty ones
+                for (x, y), rows in self._cells.items():
+                    if max(abs(x - cx), abs(y - cy)) >= ring:
+                        hits.extend((haversine_km(lat, lng, *self._coords[row]), row) for row in rows)
+                break
+            for cell in self._ring_cells(cx, cy, ring):
+                for row in self._cells.get(cell, ()):
+                    hits.append((haversine_km(lat, lng, *self._coords[row]), row))
+            if len(hits) >= k:
+                hits.sort()
+                # Anything outside the rings searched so far is at least ring * ring_km away
+                if hits[k - 1][0] <= ring * ring_km:
+                    break
+        hits.sort()
+        return [(self.index.station(row), distance) for distance, row in hits[:k]]
+
+    def cluster_rows(self, rows: Iterable[int], zoom: int) -> List[Tuple[Optional[int], Optional[Dict]]]:
+        """
+        Group located stations into grid clusters sized for a web-map zoom level
+
+        Cells holding a single station are returned as (row, None); cells with
+        several stations are returned as (None, cluster) where cluster carries the
+        member count, centroid position and bounding box.
+
+        Args:
+            rows: Station rows to cluster (rows without a location are skipped)
+            zoom: Web-map zoom level (0 = whole world in one tile, up to MAX_CLUSTER_ZOOM)
+
+        Returns:
+            List of (row, cluster) tuples ordered by cell
+        """
+        if not 0 <= zoom <= MAX_CLUSTER_ZOOM:
+            raise ValueError(f"zoom must be between 0 and {MAX_CLUSTER_ZOOM}")
+        cell = 360.0 / (2 ** zoom) / CLUSTER_CELLS_PER_TILE
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for row in rows:
+            coords = self._coords.get(row)
+            if coords is None:
+                continue
+            key = (math.floor(coords[0] / cell), math.floor(coords[1] / cell))
+            groups.setdefault(key, []).append(row)
+
+        clusters = []
+        for (x, y), members in sorted(groups.items()):
+            if len(members) == 1:
+                clusters.append((members[0], None))
+                continue
+            lats = [self._coords[row][0] for row in members]
+            lngs = [self._coords[row][1] for row in members]
+            clusters.append((None, {
+                "id": f"cluster:{zoom}:{x}:{y}",
+                "cluster": True,
+                "count": len(members),
+                "position": {
+                    "latitude": sum(lats) / len(lats),
+                    "longitude": sum(lngs) / len(lngs)
+                },
+                "bounds": [min(lats), min(lngs), max(lats), max(lngs)]
+            }))
+        return clusters
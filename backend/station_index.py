@@ -0,0 +1,175 @@
+"""
+Station index over the columnar StationStore.
+Provides lookups by code, zone, state and division; station dictionaries
+are materialized from the store on demand.
+"""
+
+import base64
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+import logging
+
+from station_store import StationStore
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Fields a client may request through a `fields=` projection
+STATION_FIELDS = ('id', 'name', 'position', 'type', 'platforms', 'zone', 'state', 'division')
+
+
+def project(station: Dict, fields: Optional[Iterable[str]]) -> Dict:
+    """Return only the requested fields of a station (all fields if None)"""
+    if fields is None:
+        return station
+    return {field: station[field] for field in fields if field in station}
+
+
+def _normalize_key(value) -> str:
+    """Normalize a zone/state/division value for case-insensitive lookup"""
+    return str(value or '').strip().lower()
+
+
+class StationIndex:
+    def __init__(self, stations: Union[StationStore, List[Dict]]):
+        """
+        Index a station store
+
+        Args:
+            stations: A StationStore, or station dictionaries as returned by
+                Neo4jService.get_stations() (packed into a private in-memory store)
+        """
+        self.store = stations if isinstance(stations, StationStore) else StationStore.from_stations(stations)
+
+        # Content-derived version so cursors stay valid across workers holding the same data
+        codes = dict.fromkeys(code for code in (self.store.code(row).upper() for row in range(len(self.store))) if code)
+        self.version = f"{zlib.crc32(','.join(codes).encode('utf-8')) & 0xffffffff:08x}"
+
+        # Normalized value -> rows (load order) per field, so region lookups are O(1) plus the result size
+        self._category_rows: Dict[str, Dict[str, List[int]]] = {}
+        for field in ('zone', 'state', 'division'):
+            table: Dict[str, List[int]] = {}
+            for value, rows in zip(self.store.vocabularies[field], self.store.category_rows(field)):
+                key = _normalize_key(value)
+                if key:
+                    table.setdefault(key, []).extend(rows.tolist())
+            for rows in table.values():
+                rows.sort()
+            self._category_rows[field] = table
+
+        counts = [len(self._category_rows[field]) for field in ('zone', 'state', 'division')]
+        logger.info(f"✅ Indexed {len(self.store)} stations "
+                    f"({counts[0]} zones, {counts[1]} states, {counts[2]} divisions)")
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.store)
+
+    def __contains__(self, station_code: str) -> bool:
+        return self.store.row_of(station_code) is not None
+
+    @property
+    def stations(self) -> List[Dict]:
+        """All stations in load order (materializes every station)"""
+        return list(self.store)
+
+    def station(self, row: int) -> Dict:
+        """Return the station stored at a given row"""
+        return self.store.station(row)
+
+    def row_of(self, station_code: str) -> Optional[int]:
+        """Return the row of a station code, or None if unknown"""
+        return self.store.row_of(station_code)
+
+    def get(self, station_code: str) -> Optional[Dict]:
+        """
+        Look up a station by its code
+
+        Args:
+            station_code: The station code (case-insensitive)
+
+        Returns:
+            Station dictionary or None if not found
+        """
+        row = self.row_of(station_code)
+        return self.store.station(row) if row is not None else None
+
+    def _rows(self, field: str, value) -> List[int]:
+        """Rows whose field matches value case-insensitively, in load order"""
+        return self._category_rows[field].get(_normalize_key(value), [])
+
+    def by_zone(self, zone: str) -> List[Dict]:
+        """Stations in a railway zone (case-insensitive)"""
+        return [self.store.station(row) for row in self._rows('zone', zone)]
+
+    def by_state(self, state: str) -> List[Dict]:
+        """Stations in a state (case-insensitive)"""
+        return [self.store.station(row) for row in self._rows('state', state)]
+
+    def by_division(self, division: str) -> List[Dict]:
+        """Stations in a railway division (case-insensitive)"""
+        return [self.store.station(row) for row in self._rows('division', division)]
+
+    def filter_rows(self, zone: Optional[str] = None, state: Optional[str] = None,
+                    division: Optional[str] = None) -> Optional[List[int]]:
+        """
+        Rows matching all of the given zone/state/division filters
+
+        Returns:
+            Matching rows in load order, or None if no filter is given
+        """
+        selected: Optional[List[int]] = None
+        for field, value in (('zone', zone), ('state', state), ('division', division)):
+            if not value:
+                continue
+            rows = self._rows(field, value)
+            if selected is None:
+                selected = list(rows)
+            else:
+                keep = set(rows)
+                selected = [row for row in selected if row in keep]
+        return selected
+
+    def filter(self, zone: Optional[str] = None, state: Optional[str] = None,
+               division: Optional[str] = None) -> List[Dict]:
+        """
+        Stations matching all of the given zone/state/division filters
+
+        Args:
+            zone: Railway zone to match (optional)
+            state: State to match (optional)
+            division: Railway division to match (optional)
+
+        Returns:
+            Matching stations in load order; all stations if no filter is given
+        """
+        rows = self.filter_rows(zone=zone, state=state, division=division)
+        if rows is None:
+            return self.stations
+        return [self.store.station(row) for row in rows]
+
+    def encode_cursor(self, offset: int) -> str:
+        """Encode a pagination offset as an opaque cursor bound to this index version"""
+        return base64.urlsafe_b64encode(f"{self.version}:{offset}".encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, cursor: str) -> int:
+        """
+        Decode a cursor produced by encode_cursor()
+
+        Raises:
+            ValueError: If the cursor is malformed or was issued for a different station set
+        """
+        try:
+            version, offset = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').split(':')
+            offset = int(offset)
+        except Exception:
+            raise ValueError("Malformed cursor")
+        if version != self.version:
+            raise ValueError("Cursor is stale; the station set has been reloaded")
+        if offset < 0:
+            raise ValueError("Malformed cursor")
+        return offset
@@ -0,0 +1,271 @@
+"""
+Storage interface for stations and ROUTE relationships, with an embedded backend.
+StationRepository is what app.py loads data through; Neo4jService implements it
+against AuraDB and EmbeddedRepository serves the same queries from an in-memory
+graph built from the station CSV/JSON (and an optional routes file), so the
+backend can run, be benchmarked and be tested without a database.
+"""
+
+import bisect
+import csv
+from abc import ABC, abstractmethod
+import json
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'indian_railway_stations.csv')
+
+# Real coordinates for major stations whose nodes have no lat/lng
+REAL_COORDS = {
+    "NDLS": (28.6448, 77.2167),  # New Delhi
+    "MTJ": (27.4924, 77.6739),   # Mathura Junction
+    "AGC": (27.1767, 78.0081),   # Agra Cantt
+    "NZM": (28.5849, 77.2197),   # Hazrat Nizamuddin
+    "MAS": (13.0827, 80.2707),   # Chennai Central
+    "CSTM": (18.9404, 72.8354),  # Mumbai CST
+    "HWH": (22.5851, 88.3468),   # Howrah
+    "SBC": (12.9716, 77.5946),   # Bangalore City
+    "ADI": (23.0225, 72.5714),   # Ahmedabad
+    "BCT": (19.0176, 72.8562),   # Mumbai Central
+}
+# Default India center for every other station without coordinates
+INDIA_CENTER = (20.5937, 78.9629)
+
+
+def station_from_values(values: Sequence) -> Dict:
+    """
+    Map one row of station_projection() values to a station dictionary
+
+    Args:
+        values: (code, name, lat, lng, zone, state, division, type, platforms), e.g. a neo4j Record
+
+    Returns:
+        Station dictionary with coordinates filled from REAL_COORDS / INDIA_CENTER when missing
+    """
+    code, name, lat, lng, zone, state, division, station_type, platforms = values
+    if lat is None or lng is None:
+        lat, lng = REAL_COORDS.get(code, INDIA_CENTER)
+    return {
+        "id": code,
+        "name": name,
+        "position": {
+            "latitude": lat,
+            "longitude": lng
+        },
+        "type": station_type,
+        "platforms": platforms,
+        "zone": zone,
+        "state": state,
+        "division": division
+    }
+
+
+def _text(value) -> Optional[str]:
+    value = str(value or '').strip()
+    return value or None
+
+
+def _coordinate(value) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value else None
+
+
+def normalize_row(row: Dict) -> Optional[Dict]:
+    """Turn a CSV/JSON station record into Station node properties, or None if it has no code"""
+    code = _text(row.get('code'))
+    if not code:
+        return None
+    lat = _coordinate(row.get('latitude'))
+    lng = _coordinate(row.get('longitude'))
+    if lat is None or lng is None:
+        # A location needs both halves; (0, 0) and partial pairs mean "unknown"
+        lat = lng = None
+    return {
+        'code': code,
+        'name': _text(row.get('name')),
+        'nameHindi': _text(row.get('nameHindi')),
+        'lat': lat,
+        'lng': lng,
+        'zone': _text(row.get('zone')),
+        'state': _text(row.get('state')),
+        'division': _text(row.get('division')),
+    }
+
+
+def _read_records(path: str) -> Iterator[Dict]:
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            yield from json.load(f)
+        return
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+
+def read_stations(path: str) -> Iterator[Dict]:
+    """Yield normalized station rows from a .csv (read row by row) or .json file"""
+    for record in _read_records(path):
+        row = normalize_row(record)
+        if row:
+            yield row
+
+
+def read_routes(path: str) -> List[Dict]:
+    """Read ROUTE edges ({'from', 'to', 'train', 'status'}) from a .csv or .json file"""
+    return [
+        {"from": _text(record.get('from')), "to": _text(record.get('to')),
+         "train": _text(record.get('train')), "status": _text(record.get('status'))}
+        for record in _read_records(path)
+        if _text(record.get('from')) and _text(record.get('to'))
+    ]
+
+
+class StationRepository(ABC):
+    """Station and route queries app.py needs from a storage backend"""
+
+    name = 'abstract'
+    # Remote backends are slow to load from, so app.py keeps a local snapshot of their data
+    remote = False
+
+    @abstractmethod
+    def configured(self) -> bool:
+        """Whether the backend can serve queries at all (no round trip)"""
+
+    @abstractmethod
+    def test_connection(self) -> bool:
+        """Whether the backend is reachable right now"""
+
+    def warm_up(self) -> int:
+        """Prepare for the first queries; returns the number of items prepared"""
+        return 0
+
+    @abstractmethod
+    def get_stations(self, limit: Optional[int] = None) -> List[Dict]:
+        """Every station (or the first limit), ordered by name"""
+
+    @abstractmethod
+    def get_station_by_code(self, station_code: str) -> Optional[Dict]:
+        """One station by its code, or None"""
+
+    @abstractmethod
+    def get_connected_stations(self, station_code: str) -> List[Dict]:
+        """The station itself plus every station sharing a ROUTE with it, ordered by name"""
+
+    @abstractmethod
+    def search_stations(self, search_term: str, limit: int = 100) -> List[Dict]:
+        """Stations whose name, code, state or zone has a word starting with each search word"""
+
+    @abstractmethod
+    def get_route_edges(self) -> List[Dict]:
+        """Every ROUTE relationship as {'from', 'to', 'train', 'status'}"""
+
+    def close(self):
+        pass
+
+
+def _by_name(station: Dict) -> Tuple[bool, str]:
+    # Same order as Cypher's ORDER BY name: nulls last
+    return station['name'] is None, station['name'] or ''
+
+
+_WORD = re.compile(r'\w+')
+
+
+class EmbeddedRepository(StationRepository):
+    name = 'embedded'
+
+    def __init__(self, rows: Iterable[Dict], edges: Iterable[Dict] = ()):
+        """
+        Build the in-memory graph
+
+        Args:
+            rows: Normalized station rows (see normalize_row); repeated codes merge like Neo4j MERGE
+            edges: ROUTE edges as {'from', 'to', 'train', 'status'}
+        """
+        nodes: Dict[str, Dict] = {}
+        for row in rows:
+            node = nodes.setdefault(row['code'], {})
+            # Later values only fill or replace, never blank, like the importer's coalesce()
+            node.update({key: value for key, value in row.items() if value is not None})
+
+        self._stations: Dict[str, Dict] = {
+            code: station_from_values((code, node.get('name'), node.get('lat'), node.get('lng'),
+                                       node.get('zone'), node.get('state'), node.get('division'),
+                                       node.get('type'), node.get('platforms')))
+            for code, node in nodes.items()
+        }
+        self._ordered = sorted(self._stations.values(), key=_by_name)
+        self._rank = {station['id']: rank for rank, station in enumerate(self._ordered)}
+
+        # ROUTE relationships whose endpoints both exist, as MATCH (a:Station)-[r:ROUTE]->(b:Station) returns them
+        self._edges = [edge for edge in edges if edge['from'] in self._stations and edge['to'] in self._stations]
+        self._neighbours: Dict[str, Set[str]] = {}
+        for edge in self._edges:
+            self._neighbours.setdefault(edge['from'], set()).add(edge['to'])
+            self._neighbours.setdefault(edge['to'], set()).add(edge['from'])
+
+        # Sorted (word, rank) pairs: every word prefix is one contiguous range
+        self._words: List[Tuple[str, int]] = sorted({
+            (word, self._rank[code])
+            for code, station in self._stations.items()
+            for field in ('name', 'id', 'state', 'zone')
+            for word in _WORD.findall((station[field] or '').lower())
+        })
+        logger.info(f"✅ Embedded graph loaded: {len(self._stations)} stations, {len(self._edges)} ROUTE relationships")
+
+    @classmethod
+    def from_files(cls, stations_path: str = DEFAULT_STATIONS_FILE,
+                   routes_path: Optional[str] = None) -> 'EmbeddedRepository':
+        """
+        Load stations from a .csv/.json file and, if given, ROUTE edges from another
+
+        Without routes_path the graph has no ROUTE edges: connected stations are only the
+        station itself and rerouting has nothing to search.
+        """
+        return cls(read_stations(stations_path), read_routes(routes_path) if routes_path else ())
+
+    def configured(self) -> bool:
+        return True
+
+    def test_connection(self) -> bool:
+        return True
+
+    def get_stations(self, limit: Optional[int] = None) -> List[Dict]:
+        return list(self._ordered[:limit] if limit else self._ordered)
+
+    def get_station_by_code(self, station_code: str) -> Optional[Dict]:
+        return self._stations.get(station_code)
+
+    def get_connected_stations(self, station_code: str) -> List[Dict]:
+        if station_code not in self._stations:
+            return []
+        codes = {station_code} | self._neighbours.get(station_code, set())
+        return sorted((self._stations[code] for code in codes), key=_by_name)
+
+    def search_stations(self, search_term: str, limit: int = 100) -> List[Dict]:
+        words = _WORD.findall(search_term.lower())
+        if not words:
+            return []
+        matches: Optional[Set[int]] = None
+        for word in words:
+            start = bisect.bisect_left(self._words, (word, -1))
+            ranks = set()
+            for entry, rank in self._words[start:]:
+                if not entry.startswith(word):
+                    break
+                ranks.add(rank)
+            matches = ranks if matches is None else matches & ranks
+            if not matches:
+                return []
+        return [self._ordered[rank] for rank in sorted(matches)[:limit]]
+
+    def get_route_edges(self) -> List[Dict]:
+        return list(self._edges)
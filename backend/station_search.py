@@ -0,0 +1,149 @@
+"""
+In-memory station search engine for typeahead queries.
+Uses sorted prefix tables and a trigram index built once from the StationIndex.
+"""
+
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+import logging
+
+from station_index import StationIndex
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Minimum share of the query's trigrams a station must contain to count as a fuzzy match
+FUZZY_THRESHOLD = 0.5
+
+
+def _trigrams(text: str, padded: bool = True) -> Set[str]:
+    """Return the set of 3-character substrings of text (word-boundary padded by default)"""
+    if padded:
+        text = f" {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _prefix_range(keys: List[Tuple[str, int]], prefix: str) -> Iterable[int]:
+    """Yield rows whose key starts with prefix from a sorted (key, row) list"""
+    for i in range(bisect_left(keys, (prefix, -1)), len(keys)):
+        key, row = keys[i]
+        if not key.startswith(prefix):
+            break
+        yield row
+
+
+class StationSearchEngine:
+    def __init__(self, index: StationIndex):
+        """
+        Build prefix and trigram tables over every station in the index
+
+        Args:
+            index: The shared StationIndex to search
+        """
+        self.index = index
+        self._names: List[str] = []
+        self._codes: List[str] = []
+        self._code_rows: Dict[str, int] = {}
+        self._exact_names: Dict[str, List[int]] = {}
+        self._regions: Dict[str, List[int]] = {}
+        self._name_keys: List[Tuple[str, int]] = []
+        self._code_keys: List[Tuple[str, int]] = []
+        self._word_keys: List[Tuple[str, int]] = []
+        self._grams: Dict[str, Set[int]] = {}
+
+        for row, station in enumerate(index):
+            name = str(station.get('name') or '').lower()
+            code = str(station.get('id') or '').lower()
+            self._names.append(name)
+            self._codes.append(code)
+            self._code_rows.setdefault(code, row)
+            self._exact_names.setdefault(name, []).append(row)
+            self._name_keys.append((name, row))
+            self._code_keys.append((code, row))
+            for word in name.split()[1:]:
+                self._word_keys.append((word, row))
+
+            fields = [name, code]
+            for field in ('zone', 'state'):
+                value = str(station.get(field) or '').lower()
+                if value:
+                    fields.append(value)
+                    self._regions.setdefault(value, []).append(row)
+            for value in fields:
+                for gram in _trigrams(value):
+                    self._grams.setdefault(gram, set()).add(row)
+
+        self._name_keys.sort()
+        self._code_keys.sort()
+        self._word_keys.sort()
+        logger.info(f"✅ Built search index over {len(self._names)} stations "
+                    f"({len(self._grams)} trigrams)")
+
+    def search(self, query: str, limit: int = 100) -> List[Dict]:
+        """
+        Search stations by name, code, zone, or state
+
+        Results are ranked: exact code, exact name, code prefix, name prefix,
+        word prefix within the name, substring of name/code, zone/state match,
+        then fuzzy trigram matches.
+
+        Args:
+            query: The search term
+            limit: Maximum number of results
+
+        Returns:
+            List of matching station dictionaries, best match first
+        """
+        q = ' '.join(str(query or '').lower().split())
+        if not q or limit <= 0:
+            return []
+
+        results: List[int] = []
+        seen: Set[int] = set()
+        for row in self._ranked_rows(q, seen):
+            if row not in seen:
+                seen.add(row)
+                results.append(row)
+                if len(results) >= limit:
+                    break
+        return [self.index.station(row) for row in results]
+
+    def _ranked_rows(self, q: str, seen: Set[int]) -> Iterator[int]:
+        """Lazily yield candidate rows in rank order (may repeat rows across tiers)"""
+        by_name = lambda row: self._names[row]
+
+        code_row = self._code_rows.get(q)
+        if code_row is not None:
+            yield code_row
+        yield from self._exact_names.get(q, [])
+        yield from _prefix_range(self._code_keys, q)
+        yield from _prefix_range(self._name_keys, q)
+        yield from sorted(set(_prefix_range(self._word_keys, q)), key=by_name)
+
+        if len(q) >= 3:
+            # Substring matches: every trigram of the query must be present
+            postings = [self._grams.get(gram, set()) for gram in _trigrams(q, padded=False)]
+            postings.sort(key=len)
+            candidates = set.intersection(*postings)
+            yield from sorted((row for row in candidates
+                               if row not in seen and (q in self._names[row] or q in self._codes[row])),
+                              key=by_name)
+
+        yield from sorted(self._regions.get(q, []), key=by_name)
+
+        if len(q) >= 3:
+            yield from self._fuzzy(q, seen)
+
+    def _fuzzy(self, q: str, seen: Set[int]) -> List[int]:
+        """Rows sharing at least FUZZY_THRESHOLD of the query's trigrams, most similar first"""
+        grams = _trigrams(q)
+        counts: Counter = Counter()
+        for gram in grams:
+            counts.update(self._grams.get(gram, ()))
+        needed = FUZZY_THRESHOLD * len(grams)
+        matches = [(-count, self._names[row], row) for row, count in counts.items()
+                   if count >= needed and row not in seen]
+        matches.sort()
+        return [row for _, _, row in matches]
@@ -0,0 +1,303 @@
+"""
+Compact columnar station store.
+Coordinates and platform counts are fixed-width numeric columns, codes and names
+are packed UTF-8 with offsets, zone/state/division/type are dictionary-encoded,
+and a code-sorted row order serves as the code -> row index. ROUTE edges are
+stored alongside as packed strings. The whole store is one flat buffer that can
+be memory-mapped, so worker processes opening the same file share a single
+physical copy through the page cache; the newest store file also serves as the
+startup snapshot of the last data loaded from the backend.
+"""
+
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAGIC = b'STNSTORE'
+STORE_VERSION = 2
+_PREAMBLE = struct.Struct('<8sII')  # magic, version, header length
+
+# Dictionary-encoded text fields (few distinct values repeated across stations)
+CATEGORY_FIELDS = ('zone', 'state', 'division', 'type')
+MAX_CATEGORY_VALUES = 1 << 16  # Ids are stored as uint16
+
+# ROUTE edge fields, stored as packed strings ('' for a missing train/status)
+EDGE_FIELDS = ('from', 'to', 'train', 'status')
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _pack_strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenate strings as UTF-8 and return (offsets[n + 1], bytes)"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def encode_stations(stations: Iterable[Dict], edges: Iterable[Dict] = (), source: Optional[str] = None) -> bytes:
+    """
+    Serialize station dictionaries (Neo4jService.get_stations() format) into the store layout
+
+    Args:
+        stations: Station dictionaries
+        edges: ROUTE edges as {'from', 'to', 'train', 'status'} (Neo4jService.get_route_edges() format)
+        source: Name of the backend the data came from
+
+    Raises:
+        ValueError: If a dictionary-encoded field has more distinct values than fit in uint16
+    """
+    stations = list(stations)
+    edges = list(edges)
+    n = len(stations)
+    codes = [str(s.get('id') or '') for s in stations]
+    names = [str(s.get('name') or '') for s in stations]
+
+    columns: Dict[str, np.ndarray] = {}
+    for field, key in (('lat', 'latitude'), ('lng', 'longitude')):
+        values = [(s.get('position') or {}).get(key) for s in stations]
+        columns[field] = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    columns['platforms'] = np.array([-1 if s.get('platforms') is None else int(s['platforms'])
+                                     for s in stations], dtype=np.int32)
+    columns['code_offsets'], columns['code_bytes'] = _pack_strings(codes)
+    columns['name_offsets'], columns['name_bytes'] = _pack_strings(names)
+
+    vocabularies: Dict[str, List[Optional[str]]] = {}
+    for field in CATEGORY_FIELDS:
+        ids: Dict[Optional[str], int] = {}
+        column = np.empty(n, dtype=np.uint16)
+        for row, station in enumerate(stations):
+            value = station.get(field)
+            value = None if value is None else str(value)
+            category = ids.setdefault(value, len(ids))
+            if category >= MAX_CATEGORY_VALUES:
+                raise ValueError(f"More than {MAX_CATEGORY_VALUES} distinct '{field}' values")
+            column[row] = category
+        columns[field] = column
+        vocabularies[field] = list(ids)
+
+    # Code index: rows sorted by upper-cased code, ties in load order
+    columns['code_order'] = np.array(sorted(range(n), key=lambda row: (codes[row].upper().encode('utf-8'), row)),
+                                     dtype=np.int32)
+
+    for field in EDGE_FIELDS:
+        values = ['' if edge.get(field) is None else str(edge[field]) for edge in edges]
+        columns[f'edge_{field}_offsets'], columns[f'edge_{field}_bytes'] = _pack_strings(values)
+
+    layout = {}
+    offset = 0
+    for name, array in columns.items():
+        offset = _align(offset)
+        layout[name] = [array.dtype.str, offset, int(array.size)]
+        offset += array.nbytes
+    header = json.dumps({'count': n, 'edge_count': len(edges), 'source': source,
+                         'columns': layout, 'vocabularies': vocabularies},
+                        separators=(',', ':')).encode('utf-8')
+    data_start = _align(_PREAMBLE.size + len(header))
+
+    buffer = bytearray(data_start + _align(offset))
+    _PREAMBLE.pack_into(buffer, 0, MAGIC, STORE_VERSION, len(header))
+    buffer[_PREAMBLE.size:_PREAMBLE.size + len(header)] = header
+    for name, array in columns.items():
+        start = data_start + layout[name][1]
+        buffer[start:start + array.nbytes] = array.tobytes()
+    return bytes(buffer)
+
+
+class StationStore:
+    def __init__(self, buffer, path: Optional[str] = None):
+        """
+        Wrap a buffer produced by encode_stations() (bytes or an mmap) without copying it
+
+        Args:
+            buffer: Store bytes or a read-only mmap of a store file
+            path: File the buffer was mapped from, if any
+        """
+        magic, version, header_length = _PREAMBLE.unpack_from(buffer, 0)
+        if magic != MAGIC or version != STORE_VERSION:
+            raise ValueError(f"Not a station store (version {STORE_VERSION})")
+        header = json.loads(bytes(buffer[_PREAMBLE.size:_PREAMBLE.size + header_length]))
+        data_start = _align(_PREAMBLE.size + header_length)
+
+        self.path = path
+        self._buffer = buffer
+        self._count = header['count']
+        self.edge_count = header['edge_count']
+        self.source: Optional[str] = header['source']
+        self.vocabularies: Dict[str, List[Optional[str]]] = header['vocabularies']
+        for name, (dtype, offset, size) in header['columns'].items():
+            setattr(self, name, np.frombuffer(buffer, dtype=np.dtype(dtype), count=size, offset=data_start + offset))
+
+        # Plain memoryviews for the code index: per-element access is much cheaper than NumPy scalars
+        self._order_view = memoryview(self.code_order).cast('B').cast('i')
+        self._offset_view = memoryview(self.code_offsets).cast('B').cast('I')
+        self._code_view = memoryview(self.code_bytes)
+        self._name_offset_view = memoryview(self.name_offsets).cast('B').cast('I')
+        self._name_view = memoryview(self.name_bytes)
+        # field -> rows per category id, built on first use
+        self._category_rows: Dict[str, List[np.ndarray]] = {}
+
+    @classmethod
+    def from_stations(cls, stations: Iterable[Dict], edges: Iterable[Dict] = (),
+                      source: Optional[str] = None) -> 'StationStore':
+        """Build a private in-memory store"""
+        return cls(encode_stations(stations, edges, source))
+
+    @classmethod
+    def open(cls, path: str) -> 'StationStore':
+        """Memory-map a store file read-only"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, path=path)
+
+    @classmethod
+    def shared(cls, stations: Iterable[Dict], directory: str, edges: Iterable[Dict] = (),
+               source: Optional[str] = None) -> 'StationStore':
+        """
+        Memory-map a content-addressed store file in directory, writing it if absent
+
+        Processes loading the same stations map the same file and so share its pages.
+        Store files for other content are removed (existing mappings stay valid), so the
+        directory holds only the latest data, which latest() reopens at the next startup.
+        """
+        data = encode_stations(stations, edges, source)
+        path = os.path.join(directory, f"stations-{hashlib.sha1(data).hexdigest()[:16]}.bin")
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.bin.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            for stale in glob.glob(os.path.join(directory, 'stations-*.bin')):
+                if stale != path:
+                    try:
+                        os.unlink(stale)
+                    except OSError:
+                        pass
+            logger.info(f"✅ Wrote station store {path} ({len(data)} bytes)")
+        else:
+            # Touch so latest() treats the reused file as the most recent load
+            os.utime(path)
+        return cls.open(path)
+
+    @classmethod
+    def latest(cls, directory: str) -> Optional['StationStore']:
+        """
+        Memory-map the most recently written readable store file in directory
+
+        Files that cannot be read or are from another format version are skipped.
+
+        Returns:
+            The store, or None if there is none
+        """
+        paths = glob.glob(os.path.join(directory, 'stations-*.bin'))
+        for path in sorted(paths, key=os.path.getmtime, reverse=True):
+            try:
+                return cls.open(path)
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"⚠️ Ignoring station store {path}: {e}")
+        return None
+
+    @property
+    def saved_at(self) -> Optional[datetime]:
+        """When the backing file was last written, for file-backed stores"""
+        return datetime.fromtimestamp(os.path.getmtime(self.path)) if self.path else None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def code(self, row: int) -> str:
+        offsets = self._offset_view
+        return self._code_view[offsets[row]:offsets[row + 1]].tobytes().decode('utf-8')
+
+    def name(self, row: int) -> str:
+        offsets = self._name_offset_view
+        return self._name_view[offsets[row]:offsets[row + 1]].tobytes().decode('utf-8')
+
+    def category(self, field: str, row: int) -> Optional[str]:
+        return self.vocabularies[field][getattr(self, field)[row]]
+
+    def row_of(self, station_code: str) -> Optional[int]:
+        """Binary search the code index (case-insensitive); first row in load order wins"""
+        key = str(station_code or '').upper().encode('utf-8')
+        if not key:
+            return None
+        order, offsets, codes = self._order_view, self._offset_view, self._code_view
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            row = order[mid]
+            if codes[offsets[row]:offsets[row + 1]].tobytes().upper() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(order):
+            row = order[lo]
+            if codes[offsets[row]:offsets[row + 1]].tobytes().upper() == key:
+                return row
+        return None
+
+    def category_rows(self, field: str) -> List[np.ndarray]:
+        """Rows (ascending) for each id of a dictionary-encoded field, indexed by id"""
+        groups = self._category_rows.get(field)
+        if groups is None:
+            column = getattr(self, field)
+            order = np.argsort(column, kind='stable')
+            bounds = np.searchsorted(column[order], np.arange(len(self.vocabularies[field]) + 1))
+            groups = [order[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+            self._category_rows[field] = groups
+        return groups
+
+    def station(self, row: int) -> Dict:
+        """Materialize one station dictionary in the Neo4jService.get_stations() format"""
+        lat = float(self.lat[row])
+        lng = float(self.lng[row])
+        platforms = int(self.platforms[row])
+        return {
+            "id": self.code(row),
+            "name": self.name(row),
+            "position": {
+                "latitude": None if lat != lat else lat,
+                "longitude": None if lng != lng else lng
+            },
+            "type": self.category('type', row),
+            "platforms": None if platforms < 0 else platforms,
+            "zone": self.category('zone', row),
+            "state": self.category('state', row),
+            "division": self.category('division', row)
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        for row in range(self._count):
+            yield self.station(row)
+
+    def edges(self) -> List[Dict]:
+        """Materialize the stored ROUTE edges in the Neo4jService.get_route_edges() format"""
+        columns = []
+        for field in EDGE_FIELDS:
+            offsets = getattr(self, f'edge_{field}_offsets').tolist()
+            data = getattr(self, f'edge_{field}_bytes').tobytes()
+            columns.append([data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(self.edge_count)])
+        return [
+            {"from": source, "to": target, "train": train or None, "status": status or None}
+            for source, target, train, status in zip(*columns)
+        ]
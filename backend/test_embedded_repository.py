@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the embedded (Neo4j-free) station repository and rerouting on its routes
+"""
+
+import os
+import tempfile
+
+from route_graph import PathCost, RouteGraph
+from station_repository import INDIA_CENTER, EmbeddedRepository, read_routes, read_stations
+
+STATIONS_CSV = """code,name,nameHindi,latitude,longitude,zone,state,division
+NDLS,New Delhi,,28.6418,77.2203,NR,Delhi,Delhi
+MTJ,Mathura Junction,,27.4924,77.6739,NCR,Uttar Pradesh,Agra
+AGC,Agra Cantt,,27.1591,77.9906,NCR,Uttar Pradesh,Agra
+NZM,Hazrat Nizamuddin,,28.5884,77.2507,NR,Delhi,Delhi
+XYZ,,,0,0,,,
+NDLS,,,,,,,New Delhi
+"""
+
+ROUTES_CSV = """from,to,train,status
+NDLS,MTJ,12002,OPEN
+MTJ,AGC,12002,
+NDLS,NZM,,
+NZM,AGC,12280,CLOSED
+AGC,NOWHERE,1,OPEN
+"""
+
+
+def _write(directory, name, text):
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def test_embedded_repository():
+    with tempfile.TemporaryDirectory() as directory:
+        repository = EmbeddedRepository.from_files(_write(directory, 'stations.csv', STATIONS_CSV),
+                                                   _write(directory, 'routes.csv', ROUTES_CSV))
+
+    # Ordered by name with nulls last; the repeated NDLS row only fills in its division
+    stations = repository.get_stations()
+    assert [s['id'] for s in stations] == ['AGC', 'NZM', 'MTJ', 'NDLS', 'XYZ']
+    assert repository.get_stations(limit=2) == stations[:2]
+    ndls = repository.get_station_by_code('NDLS')
+    assert ndls['position'] == {'latitude': 28.6418, 'longitude': 77.2203}
+    assert (ndls['zone'], ndls['division']) == ('NR', 'New Delhi')
+    # Placeholder coordinates get the same fallback Neo4jService uses
+    xyz = repository.get_station_by_code('XYZ')
+    assert (xyz['position']['latitude'], xyz['position']['longitude']) == INDIA_CENTER
+    assert repository.get_station_by_code('NOPE') is None
+
+    assert [s['id'] for s in repository.get_connected_stations('NDLS')] == ['NZM', 'MTJ', 'NDLS']
+    assert repository.get_connected_stations('NOPE') == []
+
+    # Every word prefix-matches a word of name, code, state or zone
+    assert [s['id'] for s in repository.search_stations('new del')] == ['NDLS']
+    assert [s['id'] for s in repository.search_stations('uttar')] == ['AGC', 'MTJ']
+    assert [s['id'] for s in repository.search_stations('NR')] == ['NZM', 'NDLS']
+    assert repository.search_stations('agra delhi') == []
+    assert repository.search_stations('  ') == []
+
+    # Edges to unknown stations are dropped, as MATCH (a:Station)-[r:ROUTE]->(b:Station) would
+    edges = repository.get_route_edges()
+    assert len(edges) == 4
+
+    # Rerouting runs on the same edges the backend serves
+    graph = RouteGraph()
+    graph.load(edges)
+
+    def position(code):
+        station = repository.get_station_by_code(code)
+        return station['position']['latitude'], station['position']['longitude']
+
+    paths, complete = graph.k_shortest_paths('NZM', 'AGC', PathCost(position, weight='hops'), k=2)
+    assert complete
+    assert paths[0]['path'] == ['NZM', 'NDLS', 'MTJ', 'AGC'], paths
+    print(f"✅ Embedded repository serves {len(stations)} stations and {len(edges)} routes")
+
+
+def test_json_and_bundled_files_load():
+    with tempfile.TemporaryDirectory() as directory:
+        path = _write(directory, 'routes.json', '[{"from": "A", "to": "B", "train": 7, "status": "OPEN"}]')
+        assert read_routes(path) == [{'from': 'A', 'to': 'B', 'train': '7', 'status': 'OPEN'}]
+
+    backend = os.path.dirname(os.path.abspath(__file__))
+    csv_codes = {row['code'] for row in read_stations(os.path.join(backend, 'indian_railway_stations.csv'))}
+    json_codes = {row['code'] for row in read_stations(os.path.join(backend, 'indian_railway_stations.json'))}
+    assert csv_codes == json_codes
+    assert len(EmbeddedRepository.from_files().get_stations()) == len(csv_codes)
+    print(f"✅ Bundled station files load {len(csv_codes)} stations")
+
+
+if __name__ == "__main__":
+    test_embedded_repository()
+    test_json_and_bundled_files_load()
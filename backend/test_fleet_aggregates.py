@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test that the running fleet aggregates stay equal to a full recomputation
+after disruptions and schedule optimization
+"""
+
+import os
+import tempfile
+from collections import Counter
+
+# Serve stations from the bundled file and keep store files out of the source tree
+os.environ['STATION_BACKEND'] = 'embedded'
+os.environ.setdefault('STATION_STORE_DIR', tempfile.mkdtemp(prefix='station_store_'))
+
+import app  # noqa: E402
+from kpi_aggregates import FleetAggregates  # noqa: E402
+
+
+def _assert_matches_full_scan():
+    trains = app.TRAINS_DATA
+    assert app.kpi_calculator.kpis_from_totals(app.fleet_stats.totals()) == app.kpi_calculator.calculate_kpis(trains)
+    assert app.fleet_stats.status_counts() == dict(Counter(train['status'] for train in trains))
+    assert app.fleet_stats.hourly_trends() == FleetAggregates(trains).hourly_trends()
+
+
+def test_aggregates_track_disruptions_and_optimize():
+    client = app.app.test_client()
+    original = [dict(train) for train in app.TRAINS_DATA]
+    try:
+        _assert_matches_full_scan()
+        running = [t['id'] for t in app.TRAINS_DATA if t['status'] == 'running']
+        events = [
+            {'type': 'delay', 'train_id': running[0], 'delay_minutes': 25},
+            {'type': 'delay', 'train_id': running[0], 'delay_minutes': 5},
+            {'type': 'cancel', 'train_id': running[-1]},
+            {'type': 'delay', 'train_id': 'NO-SUCH-TRAIN', 'delay_minutes': 10},
+        ]
+        for event in events:
+            assert client.post('/api/disruption', json=event).status_code == 200
+            _assert_matches_full_scan()
+
+        for _ in range(3):
+            response = client.post('/api/schedule/optimize')
+            assert response.status_code == 200
+            assert response.get_json()['data']['kpis'] == app.kpi_calculator.calculate_kpis(app.TRAINS_DATA)
+            _assert_matches_full_scan()
+
+        stats = client.get('/api/dashboard/stats').get_json()['data']
+        assert stats['punctuality_rate'] == app.kpi_calculator.calculate_kpis(app.TRAINS_DATA)['punctuality_rate']
+        performance = client.get('/api/performance').get_json()['data']
+        assert performance['kpis'] == app.kpi_calculator.calculate_kpis(app.TRAINS_DATA)
+        print("✅ Fleet aggregates match calculate_kpis after disruptions and optimization")
+    finally:
+        app.TRAINS_DATA = original
+        app.fleet_stats.rebuild(original)
+
+
+if __name__ == "__main__":
+    test_aggregates_track_disruptions_and_optimize()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test the live positions SSE feed: the first snapshot frame, delta contents,
+station filters, Last-Event-ID resumes and subscribers that fall behind
+"""
+
+import itertools
+import json
+
+from live_feed import COORD_DECIMALS, DELTA_FIELDS, LiveFeed
+from train_tracker import TrainTracker
+
+
+def _stepped_tracker(start=1_700_000_000.0, step_s=7.3):
+    """A tracker whose _advance() moves the fleet step_s seconds per call instead of following wall time"""
+    tracker = TrainTracker('test-key')
+    ticks = itertools.count(start, step_s)
+    tracker._update_positions = lambda trains: TrainTracker._update_positions(tracker, trains, now=next(ticks))
+    return tracker
+
+
+def _advance(tracker):
+    with tracker._clock_lock:
+        tracker._advance()
+    return tracker._snapshot
+
+
+def _feed(tracker):
+    """A LiveFeed whose source steps the tracker's clock once whenever a subscriber asks for a newer tick"""
+    def source(after_seq, timeout):
+        snapshot = tracker._snapshot
+        return snapshot if snapshot is not None and snapshot.seq > after_seq else _advance(tracker)
+    return LiveFeed(source)
+
+
+def _parse(frame):
+    """(id, event, payload) of an SSE frame"""
+    fields = dict(line.split(': ', 1) for line in frame.strip().split('\n'))
+    return int(fields['id']), fields['event'], json.loads(fields['data'])
+
+
+def _rounded(value):
+    return round(value, COORD_DECIMALS) if isinstance(value, float) else value
+
+
+def _expected_changes(before, after):
+    changes = {}
+    for old, new in zip(before.trains, after.trains):
+        changed = {field: _rounded(new.get(field)) for field in DELTA_FIELDS
+                   if _rounded(new.get(field)) != _rounded(old.get(field))}
+        if changed:
+            changes[new['train_number']] = changed
+    return changes
+
+
+def test_snapshot_then_deltas():
+    tracker = _stepped_tracker()
+    stream = _feed(tracker).stream()
+
+    seq, event, payload = _parse(next(stream))
+    first = tracker._snapshot
+    assert (seq, event) == (1, 'snapshot') == (first.seq, 'snapshot')
+    assert payload['seq'] == 1 and payload['timestamp'] == first.timestamp
+    assert payload['trains'] == json.loads(json.dumps(list(first.trains))) and payload['count'] == len(first.trains)
+
+    previous = first
+    for expected_seq in (2, 3, 4):
+        seq, event, payload = _parse(next(stream))
+        current = tracker._snapshot
+        assert (seq, event, payload['seq']) == (expected_seq, 'delta', expected_seq) == (current.seq, 'delta', current.seq)
+        changes = _expected_changes(previous, current)
+        assert changes and payload['changed'] == changes
+        # Only moving fields are sent; fixed details such as names and colours never appear
+        assert all(set(fields) <= set(DELTA_FIELDS) for fields in payload['changed'].values())
+        assert payload['added'] == [] and payload['removed'] == []
+        previous = current
+    print("✅ The first frame is a full snapshot and each tick after it a delta of changed fields")
+
+
+def test_station_filter_and_resume():
+    tracker = _stepped_tracker()
+    feed = _feed(tracker)
+    _, _, payload = _parse(next(feed.stream(stations=['ndls'])))
+    routes = {(t['route_from'], t['route_to']) for t in payload['trains']}
+    assert routes and all('NDLS' in route for route in routes)
+    assert payload['count'] == len(payload['trains']) < len(tracker._snapshot.trains)
+
+    # A client reconnecting with the current seq skips the snapshot and continues with deltas
+    current = tracker._snapshot.seq
+    seq, event, payload = _parse(next(feed.stream(last_event_id=str(current))))
+    assert (seq, event) == (current + 1, 'delta')
+    # A stale Last-Event-ID gets a fresh snapshot instead
+    seq, event, _ = _parse(next(feed.stream(last_event_id=str(current - 1))))
+    assert (seq, event) == (current + 1, 'snapshot')
+    print("✅ Station filters apply to snapshots, and resumes with a current Last-Event-ID skip the snapshot")
+
+
+def test_lagging_subscriber_gets_a_snapshot():
+    tracker = _stepped_tracker()
+    feed = _feed(tracker)
+    slow = feed.stream()
+    assert _parse(next(slow))[:2] == (1, 'snapshot')
+
+    # Another subscriber moves the feed on twice while the slow one is not reading
+    fast = feed.stream()
+    assert _parse(next(fast))[:2] == (1, 'snapshot')
+    assert _parse(next(fast))[:2] == (2, 'delta')
+    _advance(tracker)
+    assert _parse(next(fast))[:2] == (3, 'delta')
+
+    # The delta for 3 applies on top of 2, which the slow subscriber never saw
+    seq, event, payload = _parse(next(slow))
+    assert (seq, event) == (3, 'snapshot') and payload['count'] == len(tracker._snapshot.trains)
+    assert _parse(next(slow))[:2] == _parse(next(fast))[:2] == (4, 'delta')
+    print("✅ A subscriber that misses a tick is resynchronized with a snapshot")
+
+
+if __name__ == "__main__":
+    test_snapshot_then_deltas()
+    test_station_filter_and_resume()
+    test_lagging_subscriber_gets_a_snapshot()
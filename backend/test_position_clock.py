@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test the shared train position clock: snapshot sequence numbers, positions per tick
+and waiting for the next tick
+"""
+
+import itertools
+import time
+
+from train_tracker import LiveSnapshot, TrainTracker
+
+
+def _stepped_tracker(start=1_700_000_000.0, step_s=7.3):
+    """A tracker whose _advance() moves the fleet step_s seconds per call instead of following wall time"""
+    tracker = TrainTracker('test-key')
+    ticks = itertools.count(start, step_s)
+    tracker._update_positions = lambda trains: TrainTracker._update_positions(tracker, trains, now=next(ticks))
+    return tracker
+
+
+def _advance(tracker):
+    with tracker._clock_lock:
+        tracker._advance()
+    return tracker._snapshot
+
+
+def test_advance_publishes_numbered_snapshots():
+    tracker = _stepped_tracker()
+    snapshots = [_advance(tracker) for _ in range(4)]
+    assert [s.seq for s in snapshots] == [1, 2, 3, 4]
+    assert all(isinstance(s, LiveSnapshot) and isinstance(s.trains, tuple) for s in snapshots)
+
+    # The same trains every tick, in the same order; only their positions move
+    ids = [t['train_number'] for t in snapshots[0].trains]
+    assert ids and all([t['train_number'] for t in s.trains] == ids for s in snapshots)
+    first, second = snapshots[0].trains, snapshots[1].trains
+    assert any((a['current_lat'], a['current_lng']) != (b['current_lat'], b['current_lng'])
+               for a, b in zip(first, second))
+    assert all(a['train_name'] == b['train_name'] and a['route_from'] == b['route_from'] for a, b in zip(first, second))
+    # Published snapshots are not touched by later ticks
+    assert snapshots[0].trains is first and snapshots[0].trains[0] is not snapshots[1].trains[0]
+    print("✅ Each _advance() publishes the next seq with the same trains at new positions")
+
+
+def test_next_snapshot_waits_for_a_newer_tick():
+    tracker = TrainTracker('test-key', tick_hz=50.0, idle_timeout_s=0.5)
+    first = tracker.next_snapshot(0, 1.0)
+    assert first.seq >= 1
+    newer = tracker.next_snapshot(first.seq, 1.0)
+    assert newer.seq > first.seq
+
+    # Asking past the latest seq times out and returns the latest snapshot unchanged
+    started = time.monotonic()
+    latest = tracker.next_snapshot(10 ** 9, 0.05)
+    assert latest.seq < 10 ** 9 and time.monotonic() - started < 0.5
+
+    # Without readers the clock stops, and the next read restarts it from the last seq
+    time.sleep(0.8)
+    assert tracker._clock_thread is None
+    stopped_at = tracker._snapshot.seq
+    assert tracker.live_snapshot().seq == stopped_at + 1
+    print("✅ next_snapshot() waits for the clock and the idle clock restarts where it stopped")
+
+
+if __name__ == "__main__":
+    test_advance_publishes_numbered_snapshots()
+    test_next_snapshot_waits_for_a_newer_tick()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test concurrent RailRadar fetching against a local stub HTTP server
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from train_tracker import TrainTracker
+
+STUB_DELAY = 0.2  # Seconds each stub response takes
+
+
+class StubRailRadar(BaseHTTPRequestHandler):
+    """Serves /api/v1/trains/list; station PAGED has 2.5 pages, FLAKY fails once with 503"""
+    failures = {}
+    hits = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        station = query.get('search', '')
+        page = int(query.get('page', 1))
+        limit = int(query.get('limit', 100))
+        with self.lock:
+            self.hits[station] = self.hits.get(station, 0) + 1
+        time.sleep(STUB_DELAY)
+
+        if url.path != '/api/v1/trains/list' or self.headers.get('x-api-key') != 'test-key':
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        if station == 'FLAKY':
+            with self.lock:
+                failed = self.failures.get(station, 0)
+                self.failures[station] = failed + 1
+            if not failed:
+                self.send_response(503)
+                self.end_headers()
+                return
+
+        count = {'PAGED': limit if page <= 2 else limit // 2}.get(station, 2 if page == 1 else 0)
+        trains = [{
+            'train_number': f"{station}-{page}-{i}",
+            'train_name': f"{station} Express",
+            'source_station_code': station,
+            'destination_station_code': 'NDLS'
+        } for i in range(count)]
+
+        body = json.dumps({'success': True, 'data': {'trains': trains}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_concurrent_fetch():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubRailRadar)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        tracker = TrainTracker('test-key', base_url=f"http://127.0.0.1:{server.server_port}/api/v1",
+                               max_workers=16, backoff_factor=0)
+        stations = [f"S{i}" for i in range(30)] + ['PAGED', 'FLAKY']
+
+        started = time.monotonic()
+        trains = tracker.get_trains_by_stations(stations, limit=10)
+        elapsed = time.monotonic() - started
+        print(f"Fetched {len(trains)} trains for {len(stations)} stations in {elapsed:.2f}s")
+
+        assert len([t for t in trains if t['source_station_code'].startswith('S')]) == 60
+        # PAGED: two full pages and a short third page
+        assert len([t for t in trains if t['source_station_code'] == 'PAGED']) == 25
+        # FLAKY: retried after the 503
+        assert len([t for t in trains if t['source_station_code'] == 'FLAKY']) == 2
+        # 32 stations plus extra pages sequentially would take over 7s
+        assert elapsed < STUB_DELAY * 10, f"fetch took {elapsed:.2f}s"
+        print("✅ Concurrent paged fetch with retries works")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_cached_fetch_coalesces_bursts():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubRailRadar)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        tracker = TrainTracker('test-key', base_url=f"http://127.0.0.1:{server.server_port}/api/v1")
+        stations = ['C1', 'C2', 'C3']
+        StubRailRadar.hits.clear()
+
+        # A burst of identical requests shares one upstream call per station
+        results = []
+        burst = [threading.Thread(target=lambda: results.append(tracker.get_trains_by_stations(stations)))
+                 for _ in range(10)]
+        for thread in burst:
+            thread.start()
+        for thread in burst:
+            thread.join()
+        assert all(len(trains) == 6 for trains in results)
+        assert StubRailRadar.hits == {'C1': 1, 'C2': 1, 'C3': 1}, StubRailRadar.hits
+
+        # Within the TTL, overlapping station sets are served from cache
+        started = time.monotonic()
+        assert len(tracker.get_trains_by_stations(['C2', 'C3'])) == 4
+        assert time.monotonic() - started < STUB_DELAY
+        assert StubRailRadar.hits == {'C1': 1, 'C2': 1, 'C3': 1}
+        print(f"✅ 10 concurrent requests made {sum(StubRailRadar.hits.values())} upstream calls")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_concurrent_fetch()
+    test_cached_fetch_coalesces_bursts()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test pre-serialized responses: strong ETags, 304 revalidation and gzip bodies
+"""
+
+import gzip
+import json
+
+from flask import Flask
+
+from response_cache import ResponseCache
+
+app = Flask(__name__)
+
+
+def _respond(cache, key, build, **headers):
+    with app.test_request_context(headers=headers):
+        return cache.respond(key, build)
+
+
+def test_etag_and_304():
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"success": True, "data": list(range(10))}
+
+    cache = ResponseCache()
+    first = _respond(cache, 'stations', build)
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert json.loads(first.get_data()) == {"success": True, "data": list(range(10))}
+    assert not etag.startswith('W/')
+    assert first.headers['Vary'] == 'Accept-Encoding'
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    # Revalidation with the current tag: 304, no body, same tag, nothing rebuilt
+    revalidated = _respond(cache, 'stations', build, **{'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.get_data() == b''
+    assert revalidated.headers['ETag'] == etag
+    assert _respond(cache, 'stations', build, **{'If-None-Match': f'"stale", {etag}'}).status_code == 304
+    assert _respond(cache, 'stations', build, **{'If-None-Match': '"stale"'}).status_code == 200
+    assert len(builds) == 1
+
+    # After invalidation the payload is rebuilt; unchanged data keeps its tag
+    cache.invalidate('stat')
+    assert _respond(cache, 'stations', build, **{'If-None-Match': etag}).status_code == 304
+    assert len(builds) == 2
+    cache.invalidate()
+    changed = _respond(cache, 'stations', lambda: {"success": True, "data": []}, **{'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+    print("✅ Strong ETags answer If-None-Match with 304")
+
+
+def test_gzip_bodies():
+    payload = {"data": [{"id": f"S{i}", "name": "Station"} for i in range(200)]}
+    cache = ResponseCache()
+    plain = _respond(cache, 'big', lambda: payload)
+    zipped = _respond(cache, 'big', lambda: payload, **{'Accept-Encoding': 'gzip, deflate'})
+    assert 'Content-Encoding' not in plain.headers
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(zipped.get_data()) == plain.get_data()
+    assert len(zipped.get_data()) < len(plain.get_data())
+    # Each coding is its own representation with its own tag, and revalidates as that coding
+    assert zipped.headers['ETag'] != plain.headers['ETag']
+    revalidated = _respond(cache, 'big', lambda: payload, **{'If-None-Match': zipped.headers['ETag']})
+    assert revalidated.status_code == 304 and revalidated.headers['ETag'] == zipped.headers['ETag']
+    # Declined gzip (q=0) gets the identity body
+    assert 'Content-Encoding' not in _respond(cache, 'big', lambda: payload, **{'Accept-Encoding': 'gzip;q=0'}).headers
+
+    # Small bodies are not worth compressing
+    small = _respond(cache, 'small', lambda: {"ok": True}, **{'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+    print("✅ gzip bodies are precompressed and tagged separately")
+
+
+def test_build_errors_are_not_cached():
+    cache = ResponseCache()
+
+    def failing():
+        raise ValueError("bad query")
+
+    try:
+        _respond(cache, 'key', failing)
+        raise AssertionError("build error was swallowed")
+    except ValueError:
+        pass
+    assert _respond(cache, 'key', lambda: {"ok": True}).status_code == 200
+    print("✅ Failed builds propagate and leave nothing cached")
+
+
+def test_invalidate_during_build_is_not_overwritten():
+    cache = ResponseCache()
+    data = {"version": 1}
+
+    def reload_while_building(prefix):
+        def build():
+            # A reload swaps the data and invalidates after this build read the old version
+            payload = dict(data)
+            data["version"] += 1
+            cache.invalidate(prefix)
+            return payload
+        return build
+
+    for prefix in ('stations', None):
+        key = f"stations?invalidated={prefix}"
+        stale = _respond(cache, key, reload_while_building(prefix))
+        assert json.loads(stale.get_data())["version"] == data["version"] - 1
+        fresh = _respond(cache, key, lambda: dict(data))
+        assert json.loads(fresh.get_data()) == data, prefix
+        assert fresh.headers['ETag'] != stale.headers['ETag']
+
+    # Invalidating an unrelated prefix does not stop the entry from being cached
+    builds = []
+
+    def build():
+        builds.append(1)
+        cache.invalidate('routes')
+        return {"ok": True}
+
+    _respond(cache, 'stations', build)
+    _respond(cache, 'stations', build)
+    assert len(builds) == 1
+    print("✅ Builds overlapping an invalidation are not cached")
+
+
+if __name__ == "__main__":
+    test_etag_and_304()
+    test_gzip_bodies()
+    test_build_errors_are_not_cached()
+    test_invalidate_during_build_is_not_overwritten()
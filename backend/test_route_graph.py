@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test in-process route search: A*/Yen ordering and segment overlays
+"""
+
+import random
+
+from route_graph import PathCost, RouteGraph, SegmentOverlay
+
+# X has no known location, like the CSV's 0,0 rows or Neo4j's INDIA_CENTER placeholder
+COORDS = {'A': (20.0, 75.0), 'Y': (19.9, 75.0), 'B': (24.0, 75.0), 'X': None}
+
+
+def _graph(pairs):
+    graph = RouteGraph()
+    graph.load(({'from': a, 'to': b, 'train': None, 'status': None} for a, b in pairs), COORDS.get)
+    return graph
+
+
+def test_unlocated_station_does_not_break_distance_ordering():
+    graph = _graph([('A', 'B'), ('A', 'Y'), ('Y', 'X'), ('X', 'B')])
+    paths, complete = graph.k_shortest_paths('A', 'B', PathCost(COORDS.get, weight='distance'), k=2)
+    assert complete
+    # A-Y is ~11 km and both X segments count 25 km, far shorter than the 445 km direct line
+    assert [p['path'] for p in paths] == [['A', 'Y', 'X', 'B'], ['A', 'B']], paths
+    assert paths[0]['distance_km'] < paths[1]['distance_km']
+    best = graph.best_path('A', 'B', PathCost(COORDS.get, weight='time'))
+    assert best['path'] == ['A', 'Y', 'X', 'B']
+    print("✅ Unlocated stations fall back to Dijkstra ordering")
+
+
+def test_cheap_detour_does_not_hide_route_within_hop_limit():
+    # S-M is slow (time) or the detour runs through unlocated stations (distance, 25 km each),
+    # so M is first reached cheaply over three hops; S-M-D is the only route within three hops
+    coords = {'S': (20.0, 75.0), 'a': (20.3, 75.05), 'b': (20.6, 75.05), 'M': (21.0, 75.0), 'D': (21.5, 75.0),
+              'u': None, 'v': None}
+    graph = RouteGraph()
+    graph.load(({'from': x, 'to': y, 'train': None, 'status': None}
+                for x, y in [('S', 'M'), ('M', 'D'), ('S', 'a'), ('a', 'b'), ('b', 'M'), ('S', 'u'), ('u', 'v'),
+                             ('v', 'M')]), coords.get)
+    slowed = SegmentOverlay(slowed={('S', 'M'): 5.0})
+    for weight, overlay in (('time', slowed), ('distance', None), ('hops', None)):
+        cost = PathCost(coords.get, weight=weight, overlay=overlay)
+        assert graph.best_path('S', 'D', cost, max_hops=3)['path'] == ['S', 'M', 'D'], weight
+        paths, complete = graph.k_shortest_paths('S', 'D', cost, k=3, max_hops=3)
+        assert complete and [p['path'] for p in paths] == [['S', 'M', 'D']], (weight, paths)
+    # With hops to spare the detour wins
+    cost = PathCost(coords.get, weight='distance')
+    assert graph.best_path('S', 'D', cost, max_hops=4)['path'] == ['S', 'u', 'v', 'M', 'D']
+    paths, _ = graph.k_shortest_paths('S', 'D', PathCost(coords.get, weight='time', overlay=slowed), k=3, max_hops=4)
+    assert [p['path'] for p in paths] == [['S', 'u', 'v', 'M', 'D'], ['S', 'a', 'b', 'M', 'D'], ['S', 'M', 'D']], paths
+    print("✅ Hop limits keep costlier short routes reachable")
+
+
+def test_heuristic_flag_is_computed_once_per_load():
+    lookups = []
+
+    def lookup(station):
+        lookups.append(station)
+        return COORDS.get(station)
+
+    graph = RouteGraph()
+    graph.load([{'from': 'A', 'to': 'B', 'train': None, 'status': None},
+                {'from': 'B', 'to': 'Y', 'train': None, 'status': None}], lookup)
+    assert graph._graph[1] and sorted(lookups) == ['A', 'B', 'Y']
+    del lookups[:]
+    # Searches never rescan the graph: only stations the search touches are looked up, once per cost
+    cost = PathCost(lookup, weight='distance')
+    graph.k_shortest_paths('A', 'Y', cost, k=2)
+    assert len(lookups) == len(set(lookups)) <= 3
+
+    graph.load([{'from': 'A', 'to': 'X', 'train': None, 'status': None}], COORDS.get)
+    assert not graph._graph[1]
+    graph.load([{'from': 'A', 'to': 'B', 'train': None, 'status': None}])
+    assert not graph._graph[1]  # Locations unknown: no heuristic
+    print("✅ The A* heuristic flag is computed when the graph is loaded")
+
+
+def _simple_paths(edges, source, destination, failed=()):
+    """Every loopless path over OPEN/status-less edges, by brute force"""
+    blocked = {frozenset(segment) for segment in failed}
+    neighbours = {}
+    for edge in edges:
+        if edge['status'] not in (None, 'OPEN') or frozenset((edge['from'], edge['to'])) in blocked:
+            continue
+        neighbours.setdefault(edge['from'], set()).add(edge['to'])
+        neighbours.setdefault(edge['to'], set()).add(edge['from'])
+    paths, stack = [], [[source]]
+    while stack:
+        path = stack.pop()
+        if path[-1] == destination:
+            paths.append(path)
+            continue
+        stack.extend(path + [station] for station in neighbours.get(path[-1], ()) if station not in path)
+    return paths
+
+
+def test_yen_matches_brute_force_with_unlocated_stations():
+    rng = random.Random(5)
+    stations = [f"S{i}" for i in range(9)]
+    # Every third station has no location
+    coords = {code: None if i % 3 == 2 else (20 + rng.uniform(-3, 3), 78 + rng.uniform(-3, 3))
+              for i, code in enumerate(stations)}
+    edges = [{'from': a, 'to': b, 'train': None, 'status': rng.choice([None, 'OPEN', 'OPEN', 'CLOSED'])}
+             for i, a in enumerate(stations) for b in stations[i + 1:] if rng.random() < 0.45]
+    graph = RouteGraph()
+    graph.load(edges, coords.get)
+
+    for weight in ('hops', 'distance', 'time'):
+        for failed in ((), (('S0', stations[-1]), ('S1', 'S3'))):
+            overlay = SegmentOverlay(failed=failed)
+            cost = PathCost(coords.get, weight=weight, overlay=overlay)
+            expected = sorted(cost.path_cost(path) for path in _simple_paths(edges, 'S0', stations[-1], failed))
+            paths, complete = graph.k_shortest_paths('S0', stations[-1], cost, k=6)
+            assert complete
+            found = [cost.path_cost(p['path']) for p in paths]
+            assert len({tuple(p['path']) for p in paths}) == len(paths)
+            assert all(len(set(p['path'])) == len(p['path']) for p in paths)
+            assert [round(c, 6) for c in found] == [round(c, 6) for c in expected[:6]], (weight, failed, found)
+    print("✅ Yen alternatives match brute force with unlocated stations, closed and failed segments")
+
+
+def test_unreachable_and_unknown_stations():
+    graph = _graph([('A', 'B'), ('C', 'D')])
+    cost = PathCost(COORDS.get, weight='distance')
+    assert graph.k_shortest_paths('A', 'D', cost) == ([], True)
+    assert graph.k_shortest_paths('A', 'NOPE', cost) == ([], True)
+    assert graph.best_path('A', 'NOPE', cost) is None
+    print("✅ Unreachable destinations return no alternatives")
+
+
+def test_speedup_factors_are_rejected():
+    for factor in (0.5, 0, -1, float('nan')):
+        try:
+            SegmentOverlay.from_scenario({'slowed_segments': [{'from': 'A', 'to': 'B', 'factor': factor}]})
+        except ValueError:
+            continue
+        raise AssertionError(f"factor {factor} was accepted")
+    try:
+        SegmentOverlay(slowed={('A', 'B'): 0.9})
+        raise AssertionError("factor 0.9 was accepted")
+    except ValueError:
+        pass
+    print("✅ Slowdown factors below 1 are rejected")
+
+
+if __name__ == "__main__":
+    test_unlocated_station_does_not_break_distance_ordering()
+    test_cheap_detour_does_not_hide_route_within_hop_limit()
+    test_heuristic_flag_is_computed_once_per_load()
+    test_yen_matches_brute_force_with_unlocated_stations()
+    test_unreachable_and_unknown_stations()
+    test_speedup_factors_are_rejected()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test the station grid index: nearest/nearby against brute force and bounding-box edges
+"""
+
+import random
+
+from spatial_index import MAX_CLUSTER_ZOOM, SpatialIndex, haversine_km
+from station_index import StationIndex
+
+
+def _station(code, lat, lng):
+    return {'id': code, 'name': code, 'position': {'latitude': lat, 'longitude': lng},
+            'type': None, 'platforms': None, 'zone': None, 'state': None, 'division': None}
+
+
+def _index(points):
+    stations = [_station(f"S{i}", lat, lng) for i, (lat, lng) in enumerate(points)]
+    # Stations with no location or a placeholder location are never indexed
+    stations += [_station('NOLOC', None, None), _station('ZERO', 0.0, 0.0), _station('CENTER', 20.5937, 78.9629)]
+    return SpatialIndex(StationIndex(stations), cell_size_deg=0.5)
+
+
+def _brute_nearest(points, lat, lng, k):
+    distances = sorted((haversine_km(lat, lng, *point), f"S{i}") for i, point in enumerate(points))
+    return distances[:k]
+
+
+def test_nearest_matches_brute_force():
+    rng = random.Random(3)
+    points = [(rng.uniform(8, 35), rng.uniform(68, 97)) for _ in range(400)]
+    spatial = _index(points)
+    assert len(spatial) == len(points)
+
+    queries = [(rng.uniform(8, 35), rng.uniform(68, 97)) for _ in range(100)]
+    # Far from every station, across the antimeridian and at the poles
+    queries += [(-45.0, -120.0), (89.9, 0.0), (-90.0, 180.0), (0.0, 0.0), (20.5937, 78.9629)]
+    for lat, lng in queries:
+        for k in (1, 5):
+            found = [(round(distance, 6), station['id']) for station, distance in spatial.nearest(lat, lng, k)]
+            expected = [(round(distance, 6), code) for distance, code in _brute_nearest(points, lat, lng, k)]
+            assert found == expected, (lat, lng, k)
+
+    assert len(spatial.nearest(20.0, 78.0, k=len(points) + 10)) == len(points)
+    assert spatial.nearest(20.0, 78.0, k=0) == []
+    assert _index([]).nearest(20.0, 78.0) == []
+    print("✅ nearest() matches brute force, including far-away points")
+
+
+def test_nearby_radius_and_limit():
+    rng = random.Random(4)
+    points = [(rng.uniform(27, 30), rng.uniform(76, 79)) for _ in range(300)]
+    spatial = _index(points)
+    lat, lng = 28.6, 77.2
+    for radius in (0, 5, 40, 150):
+        found = [station['id'] for station, _ in spatial.nearby(lat, lng, radius)]
+        expected = [code for distance, code in _brute_nearest(points, lat, lng, len(points)) if distance <= radius]
+        assert found == expected, radius
+    hits = spatial.nearby(lat, lng, 150, limit=10)
+    assert len(hits) == 10 and [d for _, d in hits] == sorted(d for _, d in hits)
+    assert spatial.nearby(lat, lng, -1) == []
+    # A non-positive limit is an error, not a slice that silently drops the farthest hits
+    for limit in (0, -2):
+        try:
+            spatial.nearby(lat, lng, 150, limit=limit)
+        except ValueError:
+            continue
+        raise AssertionError(f"limit {limit} was accepted")
+    print("✅ nearby() returns every station in the radius, nearest first")
+
+
+def test_bbox_edges():
+    # On cell boundaries (multiples of 0.5) and on both sides of the equator/prime meridian
+    points = [(28.0, 77.0), (28.5, 77.5), (29.0, 78.0), (-0.5, -0.5), (0.5, 0.25), (-1.25, 1.0)]
+    spatial = _index(points)
+
+    def codes(*bbox):
+        return [station['id'] for station in spatial.within_bbox(*bbox)]
+
+    # Inclusive on every side, in load order
+    assert codes(28.0, 77.0, 29.0, 78.0) == ['S0', 'S1', 'S2']
+    assert codes(28.5, 77.5, 28.5, 77.5) == ['S1']
+    assert codes(28.0000001, 77.0, 29.0, 77.9999999) == ['S1']
+    assert codes(-2.0, -1.0, 1.0, 1.0) == ['S3', 'S4', 'S5']
+    # Inverted or empty boxes select nothing
+    assert codes(29.0, 77.0, 28.0, 78.0) == []
+    assert codes(28.0, 78.0, 29.0, 77.0) == []
+    assert codes(10.0, 10.0, 11.0, 11.0) == []
+    # The whole world takes the populated-cell path and still excludes placeholders
+    assert codes(-90.0, -180.0, 90.0, 180.0) == [f"S{i}" for i in range(len(points))]
+    print("✅ Bounding boxes are inclusive and skip unlocated stations")
+
+
+def test_cluster_zoom_range():
+    spatial = _index([(28.0, 77.0), (28.01, 77.01), (19.0, 72.8)])
+    rows = range(len(spatial.index))
+    clusters = spatial.cluster_rows(rows, 5)
+    assert [(row, cluster['count'] if cluster else None) for row, cluster in clusters] == [(2, None), (None, 2)]
+    assert len(spatial.cluster_rows(rows, MAX_CLUSTER_ZOOM)) == 3
+    for zoom in (-1, MAX_CLUSTER_ZOOM + 1, 5000):
+        try:
+            spatial.cluster_rows(rows, zoom)
+        except ValueError:
+            continue
+        raise AssertionError(f"zoom {zoom} was accepted")
+    print("✅ Clustering groups close stations and rejects out-of-range zooms")
+
+
+if __name__ == "__main__":
+    test_nearest_matches_brute_force()
+    test_nearby_radius_and_limit()
+    test_bbox_edges()
+    test_cluster_zoom_range()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test station typeahead search: rank tiers, limits and index swaps on reload
+"""
+
+import os
+import tempfile
+
+# Serve stations from the bundled file and keep store files out of the source tree
+os.environ['STATION_BACKEND'] = 'embedded'
+os.environ.setdefault('STATION_STORE_DIR', tempfile.mkdtemp(prefix='station_store_'))
+
+import app  # noqa: E402
+from station_index import StationIndex  # noqa: E402
+from station_search import StationSearchEngine  # noqa: E402
+from station_store import StationStore  # noqa: E402
+
+
+def _station(code, name, zone='NR', state='Punjab'):
+    return {'id': code, 'name': name, 'position': {'latitude': 28.0, 'longitude': 77.0},
+            'type': None, 'platforms': None, 'zone': zone, 'state': state, 'division': None}
+
+
+# One station per rank tier for the query "del"; load order deliberately differs from rank order
+STATIONS = [
+    _station('DEE', 'Deel'),               # fuzzy: shares ' de' and 'el ' with " del "
+    _station('MDP', 'Mandelpur'),          # substring of the name
+    _station('NDLS', 'New Delhi'),         # prefix of a later word in the name
+    _station('DEC', 'Delhi Cantt'),        # name prefix
+    _station('DELB', 'Bhopal Jn'),         # code prefix
+    _station('XDL', 'Del'),                # exact name
+    _station('DEL', 'Zeta Halt'),          # exact code
+    _station('BCT', 'Mumbai Central', 'WR', 'Maharashtra'),
+    _station('NZM', 'Hazrat Nizamuddin'),
+]
+RANKED = ['DEL', 'XDL', 'DELB', 'DEC', 'NDLS', 'MDP', 'DEE']
+
+
+def _codes(stations):
+    return [station['id'] for station in stations]
+
+
+def _search(query, limit=None):
+    args = {'q': query} if limit is None else {'q': query, 'limit': limit}
+    response = app.app.test_client().get('/api/stations/search', query_string=args)
+    return response.status_code, response.get_json()
+
+
+def test_ranking_order():
+    engine = StationSearchEngine(StationIndex(STATIONS))
+    assert _codes(engine.search('del')) == RANKED
+    # Case and surrounding/repeated whitespace do not matter
+    assert _codes(engine.search('  DeL ')) == RANKED
+    assert _codes(engine.search('new   delhi')) == ['NDLS', 'DEC']  # Delhi Cantt as a fuzzy match
+    # A station matching several tiers is listed once, at its best rank
+    assert _codes(engine.search('delhi')) == ['DEC', 'NDLS']
+    # Zone/state matches come after name and code matches
+    assert _codes(engine.search('maharashtra')) == ['BCT']
+    # Fuzzy matching tolerates a typo, but not for one- or two-letter queries
+    assert _codes(engine.search('nizamudin')) == ['NZM']
+    assert engine.search('qq') == [] and engine.search('') == [] and engine.search(None) == []
+    print("✅ Results are ranked exact code, exact name, prefixes, substrings, then fuzzy")
+
+
+def test_limit():
+    engine = StationSearchEngine(StationIndex(STATIONS))
+    for limit in range(1, len(RANKED) + 1):
+        assert _codes(engine.search('del', limit)) == RANKED[:limit]
+    assert _codes(engine.search('del', 1000)) == RANKED
+    assert engine.search('del', 0) == [] and engine.search('del', -5) == []
+
+    status, body = _search('a', 3)
+    assert status == 200 and body['count'] == len(body['data']) == 3
+    for limit in ('0', '-1', 'ten', '2.5'):
+        status, body = _search('a', limit)
+        assert status == 400 and body['success'] is False, limit
+    assert _search('')[0] == 400
+    print("✅ limit caps results in rank order; non-positive limits are rejected")
+
+
+def test_search_follows_reload():
+    original = app.station_index.store
+    bundled_code = original.code(0)
+    assert bundled_code in _codes(_search(bundled_code)[1]['data'])
+    previous_engine = app.station_search
+    try:
+        app.reload_stations(StationStore.from_stations(STATIONS))
+        status, body = _search('del')
+        assert status == 200 and _codes(body['data']) == RANKED
+        assert bundled_code not in _codes(_search(bundled_code)[1]['data'])
+        # A search already holding the old engine keeps answering from the old index
+        assert bundled_code in _codes(previous_engine.search(bundled_code))
+    finally:
+        app.reload_stations(original)
+    assert bundled_code in _codes(_search(bundled_code)[1]['data'])
+    print("✅ Search answers from the index swapped in by a reload")
+
+
+if __name__ == "__main__":
+    test_ranking_order()
+    test_limit()
+    test_search_follows_reload()
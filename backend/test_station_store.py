@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test the columnar station store: binary round trip, code index, category groups,
+edges and the content-addressed files used as the startup snapshot
+"""
+
+import os
+import tempfile
+import time
+
+from station_store import _PREAMBLE, MAGIC, MAX_CATEGORY_VALUES, StationStore
+
+
+def _station(code, name='Station', lat=28.6, lng=77.2, platforms=4, zone='NR', state='Delhi',
+             division='DLI', station_type='Junction'):
+    return {'id': code, 'name': name, 'position': {'latitude': lat, 'longitude': lng},
+            'type': station_type, 'platforms': platforms, 'zone': zone, 'state': state, 'division': division}
+
+
+STATIONS = [
+    _station('NDLS', 'New Delhi'),
+    _station('BCT', 'Mumbai Central', 18.97, 72.82, 9, 'WR', 'Maharashtra', 'BCT', 'Terminal'),
+    _station('XNOL', 'No Location', None, None, None, None, None, None, None),
+    _station('HWH', 'Howrah Jn', 22.58, 88.34, 23, 'ER', 'West Bengal', 'HWH', 'Junction'),
+    _station('ndls', 'Duplicate, later row', 0.0, 0.0, 0, 'NR', 'Delhi', 'DLI', 'Halt'),
+]
+
+EDGES = [
+    {'from': 'NDLS', 'to': 'HWH', 'train': '12301', 'status': 'running'},
+    {'from': 'HWH', 'to': 'BCT', 'train': None, 'status': None},
+]
+
+
+def test_round_trip():
+    store = StationStore.from_stations(STATIONS, EDGES, source='neo4j')
+    assert len(store) == len(STATIONS) and store.source == 'neo4j' and store.path is None
+    assert list(store) == STATIONS
+    # Missing coordinates and platforms come back as None, not NaN or -1
+    unlocated = store.station(2)
+    assert unlocated['position'] == {'latitude': None, 'longitude': None} and unlocated['platforms'] is None
+    assert store.station(4)['platforms'] == 0 and store.station(4)['position']['latitude'] == 0.0
+    assert store.vocabularies['zone'] == ['NR', 'WR', None, 'ER']
+    assert store.category('zone', 2) is None
+
+    empty = StationStore.from_stations([])
+    assert len(empty) == 0 and list(empty) == [] and empty.edges() == [] and empty.row_of('NDLS') is None
+
+    try:
+        StationStore(b'NOTASTORE' + bytes(64))
+        raise AssertionError("foreign buffer was accepted")
+    except ValueError:
+        pass
+    print("✅ Stations round-trip, including missing coordinates and platforms")
+
+
+def test_row_of():
+    store = StationStore.from_stations(STATIONS)
+    assert [store.row_of(code) for code in ('NDLS', 'BCT', 'XNOL', 'HWH')] == [0, 1, 2, 3]
+    # Case-insensitive, and the first row in load order wins over a later duplicate
+    assert store.row_of('ndls') == 0 and store.row_of('NdLs') == 0
+    assert store.row_of('hwh') == 3
+    for missing in ('', None, 'NDL', 'NDLSX', 'AAA', 'ZZZ'):
+        assert store.row_of(missing) is None, missing
+
+    # Matches a linear scan on a larger set with many case-variant duplicates
+    stations = [_station(code) for code in (f"S{i % 37}" if i % 3 else f"s{i % 37}" for i in range(200))]
+    store = StationStore.from_stations(stations)
+    for i in range(40):
+        code = f"S{i}"
+        expected = next((row for row, s in enumerate(stations) if s['id'].upper() == code), None)
+        assert store.row_of(code) == expected and store.row_of(code.lower()) == expected, code
+    print("✅ row_of() is case-insensitive and returns the first duplicate")
+
+
+def test_category_rows():
+    store = StationStore.from_stations(STATIONS)
+    for field in ('zone', 'state', 'division', 'type'):
+        groups = store.category_rows(field)
+        assert len(groups) == len(store.vocabularies[field])
+        for category_id, value in enumerate(store.vocabularies[field]):
+            expected = [row for row, station in enumerate(STATIONS) if station[field] == value]
+            assert groups[category_id].tolist() == expected, (field, value)
+        assert store.category_rows(field) is groups
+
+    # Overflowing the uint16 ids is rejected rather than wrapped
+    try:
+        StationStore.from_stations(_station(f"S{i}", zone=f"Z{i}") for i in range(MAX_CATEGORY_VALUES + 1))
+        raise AssertionError("too many zones were accepted")
+    except ValueError:
+        pass
+    print("✅ category_rows() groups rows by dictionary id")
+
+
+def test_edges():
+    store = StationStore.from_stations(STATIONS, EDGES)
+    assert store.edge_count == 2
+    assert store.edges() == EDGES
+    # '' is the stored form of a missing train/status and reads back as None
+    assert StationStore.from_stations([], [{'from': 'A', 'to': 'B', 'train': '', 'status': 'x'}]).edges() == [
+        {'from': 'A', 'to': 'B', 'train': None, 'status': 'x'}]
+    print("✅ ROUTE edges round-trip with missing trains and statuses")
+
+
+def test_shared_files():
+    directory = tempfile.mkdtemp(prefix='station_store_')
+    first = StationStore.shared(STATIONS, directory, EDGES, source='neo4j')
+    assert os.path.dirname(first.path) == directory and list(first) == STATIONS
+    assert first.edges() == EDGES and first.source == 'neo4j'
+    assert first.saved_at is not None
+
+    # Same content: the same file is reused, not rewritten, and touched as the latest load
+    past = time.time() - 3600
+    os.utime(first.path, (past, past))
+    again = StationStore.shared(STATIONS, directory, EDGES, source='neo4j')
+    assert again.path == first.path and os.listdir(directory) == [os.path.basename(first.path)]
+    assert os.path.getmtime(again.path) > past + 60
+
+    # New content gets a new file and the stale one is removed; the old mapping stays readable
+    changed = StationStore.shared(STATIONS[:2], directory)
+    assert changed.path != first.path
+    assert os.listdir(directory) == [os.path.basename(changed.path)]
+    assert list(first) == STATIONS and len(changed) == 2
+    print("✅ shared() reuses content-addressed files and removes stale ones")
+
+
+def test_latest_skips_unreadable_files():
+    directory = tempfile.mkdtemp(prefix='station_store_')
+    assert StationStore.latest(directory) is None
+    assert StationStore.latest(os.path.join(directory, 'missing')) is None
+
+    older = StationStore.shared(STATIONS, directory, source='neo4j')
+    assert StationStore.latest(directory).path == older.path
+
+    def write(name, data, age):
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        os.utime(path, (time.time() - age, time.time() - age))
+
+    # Newer files from another format version or truncated are passed over for the older valid one
+    os.utime(older.path, (time.time() - 100, time.time() - 100))
+    write('stations-oldversion.bin', _PREAMBLE.pack(MAGIC, 1, 0) + bytes(64), 10)
+    write('stations-truncated.bin', MAGIC[:4], 5)
+    write('stations-empty.bin', b'', 1)
+    latest = StationStore.latest(directory)
+    assert latest.path == older.path and list(latest) == STATIONS and latest.source == 'neo4j'
+
+    os.unlink(older.path)
+    assert StationStore.latest(directory) is None
+    print("✅ latest() opens the newest readable store of this version")
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_row_of()
+    test_category_rows()
+    test_edges()
+    test_shared_files()
+    test_latest_skips_unreadable_files()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test vectorized fleet trajectories: positions against the scalar per-train curve,
+and arc-length lookups along() / polyline_for()
+"""
+
+import numpy as np
+
+from train_tracker import TrainTracker
+from trajectory import TrajectoryBatch
+
+rng = np.random.default_rng(7)
+N = 12
+START = np.column_stack([rng.uniform(10, 30, N), rng.uniform(70, 90, N)])
+END = np.column_stack([rng.uniform(10, 30, N), rng.uniform(70, 90, N)])
+END[0] = START[0]  # A zero-length route
+PARAMS = {
+    'phase': rng.uniform(0, 6, N),
+    'scale1': rng.uniform(0.3, 1.2, N),
+    'scale2': rng.uniform(0.3, 1.2, N),
+    'along1': rng.uniform(0.2, 0.4, N),
+    'along2': rng.uniform(0.6, 0.8, N),
+}
+
+
+def _batch():
+    return TrajectoryBatch(START, END, speed=6.0 + np.arange(N) % 9, offset=(np.arange(N) * 13) % 100, **PARAMS)
+
+
+def _scalar(tracker, row, t):
+    point = tracker._curved_position_cubic(
+        {'lat': START[row, 0], 'lng': START[row, 1]}, {'lat': END[row, 0], 'lng': END[row, 1]}, t,
+        **{name: float(values[row]) for name, values in PARAMS.items()})
+    return [point['lat'], point['lng']]
+
+
+def test_positions_match_scalar_curve():
+    tracker = TrainTracker('test-key')
+    batch = _batch()
+    times = np.linspace(0.0, 1.0, 11)
+    grid = batch.positions(np.repeat(times[:, None], N, axis=1))
+    assert grid.shape == (len(times), N, 2)
+    expected = np.array([[_scalar(tracker, row, t) for row in range(N)] for t in times])
+    assert np.allclose(grid, expected, rtol=0, atol=1e-9)
+    assert np.allclose(grid[0], START) and np.allclose(grid[-1], END)
+
+    # A single time per train, and a subset of rows
+    t = rng.uniform(0, 1, N)
+    assert np.allclose(batch.positions(t), [_scalar(tracker, row, t[row]) for row in range(N)], rtol=0, atol=1e-9)
+    rows = np.array([3, 0, 7])
+    assert np.allclose(batch.positions(t[rows], rows), batch.positions(t)[rows], rtol=0, atol=1e-12)
+
+    # Progress over many timestamps matches one timestamp at a time
+    timestamps = 1_700_000_000.0 + np.arange(5) * 3.7
+    progress, coords = batch.over(timestamps)
+    assert progress.shape == (5, N) and coords.shape == (5, N, 2)
+    for i, timestamp in enumerate(timestamps):
+        single_progress, single_coords = batch.at(timestamp)
+        assert np.allclose(progress[i], single_progress) and np.allclose(coords[i], single_coords)
+        assert ((0 <= single_progress) & (single_progress < 100)).all()
+    print("✅ Batch curve positions match the per-train cubic Bezier")
+
+
+def _ground_steps(points):
+    """Ground-proportional lengths of consecutive steps along axis 0 (longitude scaled by cos(latitude))"""
+    step = np.diff(points, axis=0)
+    lng_scale = np.cos(np.radians(points[:-1, ..., 0] + step[..., 0] / 2))
+    return np.hypot(step[..., 0], step[..., 1] * lng_scale)
+
+
+def test_along_is_even_by_distance():
+    batch = _batch()
+    assert np.allclose(batch.along(np.zeros(N)), START) and np.allclose(batch.along(np.ones(N)), END)
+    # Out-of-range fractions are clamped to the endpoints
+    assert np.allclose(batch.along(np.full(N, -0.5)), START) and np.allclose(batch.along(np.full(N, 1.5)), END)
+
+    fractions = np.linspace(0.0, 1.0, 201)
+    points = batch.along(np.repeat(fractions[:, None], N, axis=1))
+    assert points.shape == (len(fractions), N, 2) and np.isfinite(points).all()
+    # The zero-length route stays put
+    assert np.allclose(points[:, 0], START[0])
+
+    # Equal fraction steps cover equal distances, so position moves monotonically along the curve
+    steps = _ground_steps(points)[:, 1:]
+    assert (steps > 0).all()
+    assert np.allclose(steps, steps.mean(axis=0), rtol=0.02)
+
+    # Against a much finer arc-length table of the same curves
+    dense_t = np.linspace(0.0, 1.0, 20001)
+    dense = batch.positions(np.repeat(dense_t[:, None], N, axis=1))
+    arc = np.concatenate([np.zeros((1, N)), np.cumsum(_ground_steps(dense), axis=0)])
+    for row in range(1, N):
+        reference = np.column_stack([np.interp(fractions, arc[:, row] / arc[-1, row], dense[:, row, axis])
+                                     for axis in (0, 1)])
+        assert np.abs(points[:, row] - reference).max() < 2e-3 * batch.length_deg[row], row
+    print("✅ along() spaces positions evenly by distance from start to end")
+
+
+def test_batch_along_matches_per_train_polylines():
+    batch = _batch()
+    fractions = rng.uniform(0, 1, (6, N))
+    grid = batch.along(fractions)
+    for i in range(len(fractions)):
+        assert np.allclose(grid[i], batch.along(fractions[i]), rtol=0, atol=1e-12)
+
+    for row in range(N):
+        polyline, arc = batch.polyline_for(row)
+        assert polyline.shape == (batch.samples + 1, 2) and arc[0] == 0.0 and arc[-1] == 1.0
+        assert (np.diff(arc) >= 0).all()
+        for points in (2, 5, 32):
+            resampled, spacing = batch.polyline_for(row, points)
+            assert resampled.shape == (points, 2) and np.allclose(spacing, np.linspace(0.0, 1.0, points))
+            column = np.zeros((points, N))
+            column[:, row] = spacing
+            assert np.allclose(resampled, batch.along(column)[:, row], rtol=0, atol=1e-9), (row, points)
+            assert np.allclose(resampled[0], START[row]) and np.allclose(resampled[-1], END[row])
+    assert len(batch.polyline_for(1, 1)[0]) == 2
+    print("✅ Batch along() matches each train's resampled polyline")
+
+
+if __name__ == "__main__":
+    test_positions_match_scalar_curve()
+    test_along_is_even_by_distance()
+    test_batch_along_matches_per_train_polylines()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test /api/whatif/batch: sweep expansion, the scenario cap and per-scenario errors
+"""
+
+import os
+import tempfile
+import time
+
+# Serve stations from the bundled file and keep store files out of the source tree
+os.environ['STATION_BACKEND'] = 'embedded'
+os.environ.setdefault('STATION_STORE_DIR', tempfile.mkdtemp(prefix='station_store_'))
+
+import app  # noqa: E402
+
+client = app.app.test_client()
+
+
+def _batch(body):
+    response = client.post('/api/whatif/batch', json=body)
+    return response.status_code, response.get_json()
+
+
+def test_expand_sweep():
+    sweep = {'train_ids': '*', 'delay_minutes': {'start': 5, 'stop': 15, 'step': 5}}
+    assert [(s['type'], s['delay_minutes']) for s in app.expand_sweep(sweep)] == [('delay', 5), ('delay', 10), ('delay', 15)]
+    assert len(app.expand_sweep({'delay_minutes': {}})) == 12  # 5..60 by 5
+    assert app.expand_sweep({'type': 'cancel', 'train_id': 'X'}) == [{'type': 'cancel', 'train_id': 'X'}]
+    assert app.expand_sweep({'delay_minutes': {'start': 10, 'stop': 5}}) == []
+
+    for minutes, max_scenarios in (({'step': 0}, 10), ({'step': -5}, 10), ({'start': 'x'}, 10),
+                                   ({'stop': 100}, 3), ({}, 11)):
+        try:
+            app.expand_sweep({'delay_minutes': minutes}, max_scenarios)
+        except ValueError:
+            continue
+        raise AssertionError(f"{minutes} was accepted with max_scenarios={max_scenarios}")
+
+    # Rejected from the range length alone, without building the scenarios
+    started = time.perf_counter()
+    try:
+        app.expand_sweep({'delay_minutes': {'start': 0, 'stop': 10 ** 12, 'step': 1}})
+        raise AssertionError("huge sweep was accepted")
+    except ValueError:
+        pass
+    assert time.perf_counter() - started < 0.1
+    print("✅ Sweeps expand inclusively and are sized before they are built")
+
+
+def test_batch_sweep_and_scenario_cap():
+    train_id = app.TRAINS_DATA[0]['id']
+    status, body = _batch({'sweep': {'train_ids': [train_id], 'delay_minutes': {'start': 10, 'stop': 30, 'step': 10}}})
+    assert status == 200
+    results = body['data']['results']
+    assert [r['scenario']['delay_minutes'] for r in results] == [10, 20, 30]
+    assert all(r['success'] and r['affected_trains'] == [train_id] for r in results)
+
+    too_many = [{'type': 'cancel', 'train_id': train_id}] * (app.MAX_BATCH_SCENARIOS + 1)
+    assert _batch({'scenarios': too_many})[0] == 400
+    # The sweep counts against what is left after the explicit scenarios
+    almost_full = too_many[:app.MAX_BATCH_SCENARIOS - 2]
+    sweep = {'train_ids': '*', 'delay_minutes': {'start': 1, 'stop': 3, 'step': 1}}
+    assert _batch({'scenarios': almost_full, 'sweep': sweep})[0] == 400
+    sweep['delay_minutes']['stop'] = 2
+    status, body = _batch({'scenarios': almost_full, 'sweep': sweep})
+    assert status == 200 and body['data']['count'] == app.MAX_BATCH_SCENARIOS
+
+    started = time.perf_counter()
+    status, body = _batch({'sweep': {'train_ids': '*', 'delay_minutes': {'start': 0, 'stop': 3000000, 'step': 1}}})
+    assert status == 400 and 'at most' in body['error']
+    assert time.perf_counter() - started < 0.5
+    print("✅ Batches are capped before large sweeps are expanded")
+
+
+def test_malformed_batches_are_rejected():
+    for body in ([{'type': 'cancel'}], {'sweep': 'delay'}, {'sweep': [1, 2]}, {'scenarios': 'delay'},
+                 {'sweep': {'delay_minutes': {'step': 0}}}, {'sweep': {'delay_minutes': {'start': None}}}, {}):
+        status, response = _batch(body)
+        assert status == 400 and response['success'] is False, (body, status, response)
+    assert client.post('/api/whatif/batch', data='not json', content_type='text/plain').status_code == 400
+    print("✅ Malformed batches get 400")
+
+
+def test_per_scenario_errors():
+    train_id = app.TRAINS_DATA[0]['id']
+    before = [dict(train) for train in app.TRAINS_DATA]
+    status, body = _batch({'scenarios': [
+        'cancel',
+        {'type': 'reroute', 'current_station': 'NDLS'},
+        {'type': 'delay', 'train_ids': train_id},
+        {'type': 'delay', 'train_id': train_id, 'delay_minutes': 'ten'},
+        {'type': 'teleport', 'train_id': train_id},
+        {'type': 'delay', 'train_id': train_id, 'delay_minutes': 15},
+    ]})
+    assert status == 200
+    results = body['data']['results']
+    assert [r['success'] for r in results] == [False] * 5 + [True]
+    assert all(r['error'] for r in results[:5])
+    assert [r['index'] for r in results] == list(range(6))
+    assert results[5]['affected_trains'] == [train_id]
+    # Scenarios run against a snapshot; the live fleet is untouched
+    assert app.TRAINS_DATA == before
+    assert body['data']['baseline_kpis'] == app.kpi_calculator.calculate_kpis(before)
+    print("✅ Invalid scenarios fail individually without failing the batch")
+
+
+if __name__ == "__main__":
+    test_expand_sweep()
+    test_batch_sweep_and_scenario_cap()
+    test_malformed_batches_are_rejected()
+    test_per_scenario_errors()
@@ -0,0 +1,127 @@
+"""
+Columnar (NumPy) view of train state for vectorized KPI computation.
+Delay, status and last-update hour are kept as parallel arrays so KPIs,
+status histograms and hourly trends come out of a single pass.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+HOURS = 24
+
+
+def hour_of(train: Dict, now: Optional[datetime] = None) -> int:
+    """Hour of day of a train's lastUpdate, or the current hour if it has none"""
+    try:
+        return datetime.fromisoformat(train.get('lastUpdate', '')).hour
+    except (TypeError, ValueError):
+        return (now or datetime.now()).hour
+
+
+def hourly_trends(counts: Sequence, on_time: Sequence, delay_sum: Sequence) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Per-hour punctuality (% on time) and average delay from per-hour totals
+
+    Hours without trains report 100% punctuality and zero delay.
+
+    Args:
+        counts, on_time, delay_sum: Trains, on-time trains and delay minutes per hour (HOURS entries each)
+
+    Returns:
+        (punctuality_trend, average_delay_trend), each a list of {hour, value} for hours 0-23
+    """
+    punctuality_trend = []
+    avg_delay_trend = []
+    for h in range(HOURS):
+        count = counts[h]
+        if count:
+            punctuality = round(float(on_time[h]) / float(count) * 100, 2)
+            avg_delay = round(float(delay_sum[h]) / float(count), 2)
+        else:
+            punctuality = 100.0
+            avg_delay = 0.0
+        punctuality_trend.append({"hour": h, "value": punctuality})
+        avg_delay_trend.append({"hour": h, "value": avg_delay})
+    return punctuality_trend, avg_delay_trend
+
+
+class TrainColumns:
+    def __init__(self, ids: List[str], delay: np.ndarray, status: np.ndarray, hour: np.ndarray,
+                 status_names: List[str]):
+        """
+        Args:
+            ids: Train ids, one per row
+            delay: Delay minutes per train (float64)
+            status: Index into status_names per train (int16)
+            hour: Hour of day (0-23) of each train's last update (int8)
+            status_names: Status vocabulary referenced by the status column
+        """
+        self.ids = ids
+        self.delay = delay
+        self.status = status
+        self.hour = hour
+        self.status_names = status_names
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, float, str, int]]) -> 'TrainColumns':
+        """Build columns from (id, delay_minutes, status, hour) tuples"""
+        ids: List[str] = []
+        delays: List[float] = []
+        codes: List[int] = []
+        hours: List[int] = []
+        vocabulary: Dict[str, int] = {}
+        for train_id, delay, status, hour in records:
+            ids.append(train_id)
+            delays.append(delay or 0)
+            codes.append(vocabulary.setdefault(status, len(vocabulary)))
+            hours.append(hour)
+        return cls(
+            ids,
+            np.asarray(delays, dtype=np.float64),
+            np.asarray(codes, dtype=np.int16),
+            np.asarray(hours, dtype=np.int8),
+            list(vocabulary)
+        )
+
+    def kpis(self) -> Dict:
+        """Key performance indicators in the KPICalculator.calculate_kpis() format"""
+        total = len(self)
+        if not total:
+            return {
+                "total_trains": 0,
+                "on_time_trains": 0,
+                "delayed_trains": 0,
+                "average_delay_minutes": 0,
+                "punctuality_rate": 0,
+                "active_trains": 0
+            }
+
+        on_time = int(np.count_nonzero(self.delay == 0))
+        running = self.status_names.index('running') if 'running' in self.status_names else -1
+        active = int(np.count_nonzero(self.status == running))
+        total_delay = float(self.delay.sum())
+        return {
+            "total_trains": total,
+            "on_time_trains": on_time,
+            "delayed_trains": total - on_time,
+            "average_delay_minutes": round(total_delay / total, 2),
+            "punctuality_rate": round(on_time / total * 100, 2),
+            "active_trains": active
+        }
+
+    def status_counts(self) -> Dict[str, int]:
+        """Number of trains per status"""
+        counts = np.bincount(self.status, minlength=len(self.status_names))
+        return {name: int(count) for name, count in zip(self.status_names, counts) if count}
+
+    def hourly_trends(self) -> Tuple[List[Dict], List[Dict]]:
+        """Per-hour punctuality and average delay by last-update hour (see hourly_trends())"""
+        hours = self.hour.astype(np.intp)
+        return hourly_trends(np.bincount(hours, minlength=HOURS),
+                             np.bincount(hours, weights=(self.delay == 0), minlength=HOURS),
+                             np.bincount(hours, weights=self.delay, minlength=HOURS))
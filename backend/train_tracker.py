@@ -4,71 +4,117 @@ Fetches trains and their live locations for animation
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 import json
 import time
 import os
+import threading
+import math
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, NamedTuple, Optional, Tuple
 import logging
 
+import numpy as np
+
+from trajectory import TrajectoryBatch
+from upstream_cache import UpstreamCache
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Coordinates for the demo route stations, used when no station lookup is
+# configured or the lookup has no real location for a station
+FALLBACK_STATIONS = {
+    'RC': {'name': 'Raichur Jn', 'lat': 16.2079, 'lng': 77.3553},
+    'AGC': {'name': 'Agra Cantt', 'lat': 27.1767, 'lng': 77.9890},
+    'MTJ': {'name': 'Mathura Jn', 'lat': 27.4924, 'lng': 77.6739},
+    'GZB': {'name': 'Ghaziabad', 'lat': 28.6692, 'lng': 77.4538},
+    'NDLS': {'name': 'New Delhi', 'lat': 28.6139, 'lng': 77.2090},
+}
+
+# Default rate of the shared position clock
+TICK_HZ = 2.0
+
+DEFAULT_BASE_URL = "https://railradar.in/api/v1"
+# (connect, read) timeout in seconds for every RailRadar call
+REQUEST_TIMEOUT = (3.05, 10)
+# Stop paging a station's train list after this many pages
+MAX_PAGES = 20
+# Per-endpoint (ttl, stale_while_revalidate) seconds for cached RailRadar responses
+UPSTREAM_TTLS = {
+    'trains/list': (60.0, 300.0),
+}
+
+class LiveSnapshot(NamedTuple):
+    """One frame of the position clock; shared by every reader, so treat as read-only"""
+    seq: int
+    timestamp: str
+    trains: Tuple[Dict, ...]
+
 class TrainTracker:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, tick_hz: float = TICK_HZ, idle_timeout_s: float = 60.0,
+                 base_url: Optional[str] = None, max_workers: int = 8, max_retries: int = 3,
+                 backoff_factor: float = 0.5, timeout=REQUEST_TIMEOUT):
+        """
+        Args:
+            api_key: RailRadar API key
+            tick_hz: Rate of the shared position clock
+            idle_timeout_s: The position clock stops after this long without readers
+            base_url: RailRadar API root (defaults to RAILRADAR_BASE_URL or the public API)
+            max_workers: Concurrent RailRadar requests (also the keep-alive pool size)
+            max_retries: Retries per request on connection errors, 429 and 5xx responses
+            backoff_factor: Exponential backoff base in seconds between retries
+            timeout: (connect, read) timeout in seconds per request
+        """
         self.api_key = api_key
-        self.base_url = "https://railradar.in/api/v1"
+        self.base_url = (base_url or os.getenv('RAILRADAR_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
         self.headers = {
             'x-api-key': api_key,
             'Content-Type': 'application/json'
         }
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # One keep-alive connection pool shared by every fetch thread
+        retry = Retry(total=max_retries, backoff_factor=backoff_factor,
+                      status_forcelist=(429, 500, 502, 503, 504), allowed_methods=('GET',))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Shared across callers so bursts of identical requests collapse into one upstream call
+        self.upstream_cache = UpstreamCache()
         self.trains_data = []
         self.live_trains = []
         self._demo_trains: List[Dict] = []
-
-    @staticmethod
-    def _quadratic_bezier(a: float, c: float, b: float, t: float) -> float:
-        """
-        Quadratic Bezier interpolation for a single component.
-        """
-        return (1 - t) * (1 - t) * a + 2 * (1 - t) * t * c + t * t * b
-
-    def _curved_position(self, start: Dict, end: Dict, progress: float, curve_phase: float, curve_scale: float) -> Dict[str, float]:
+        # Optional callable mapping a station code to {'name', 'lat', 'lng'} (or None)
+        self.station_lookup: Optional[Callable[[str], Optional[Dict]]] = None
+        # Shared position clock: one background thread advances every train at tick_hz
+        # and publishes an immutable LiveSnapshot that all readers share
+        self.tick_hz = tick_hz
+        self.idle_timeout_s = idle_timeout_s
+        self._snapshot: Optional[LiveSnapshot] = None
+        self._clock_lock = threading.Lock()
+        # Notified (under _clock_lock) whenever _advance publishes a snapshot
+        self._clock_tick = threading.Condition(self._clock_lock)
+        self._clock_thread: Optional[threading.Thread] = None
+        self._last_read = 0.0
+        # Vectorized curves for self._demo_trains plus a mask of trains with known endpoints, built on first use
+        self._curves: Optional[Tuple[TrajectoryBatch, np.ndarray]] = None
+
+    def _station(self, station_code: str) -> Optional[Dict]:
         """
-        Compute a non-linear (curved) position between start and end using a quadratic Bezier.
-        The control point is offset perpendicular to the start->end vector and varies per-train.
+        Resolve a station code to {'name', 'lat', 'lng'} via the station lookup,
+        falling back to the built-in demo coordinates
         """
-        import math
-
-        lat1, lng1 = start['lat'], start['lng']
-        lat2, lng2 = end['lat'], end['lng']
-
-        # Vector from start to end
-        dv_lat = lat2 - lat1
-        dv_lng = lng2 - lng1
-        # Perpendicular vector (not normalized)
-        perp_lat = -dv_lng
-        perp_lng = dv_lat
-        # Normalize perpendicular
-        mag = math.sqrt(perp_lat * perp_lat + perp_lng * perp_lng) or 1.0
-        perp_lat /= mag
-        perp_lng /= mag
-
-        # Midpoint
-        mid_lat = (lat1 + lat2) / 2.0
-        mid_lng = (lng1 + lng2) / 2.0
-
-        # Unique amplitude per train based on supplied phase
-        amplitude = curve_scale * (0.5 + 0.5 * math.sin(curve_phase))
-
-        control_lat = mid_lat + perp_lat * amplitude
-        control_lng = mid_lng + perp_lng * amplitude
-
-        cur_lat = self._quadratic_bezier(lat1, control_lat, lat2, progress)
-        cur_lng = self._quadratic_bezier(lng1, control_lng, lng2, progress)
-
-        return { 'lat': cur_lat, 'lng': cur_lng }
+        if self.station_lookup:
+            station = self.station_lookup(station_code)
+            if station:
+                return station
+        return FALLBACK_STATIONS.get(station_code)
 
     @staticmethod
     def _cubic_bezier(a: float, c1: float, c2: float, b: float, t: float) -> float:
@@ -89,8 +135,6 @@ class TrainTracker:
         Control points are placed at fractional distances along the segment and offset perpendicularly
         with different magnitudes to ensure diverse shapes.
         """
-        import math
-
         lat1, lng1 = start['lat'], start['lng']
         lat2, lng2 = end['lat'], end['lng']
 
@@ -122,70 +166,148 @@ class TrainTracker:
 
         return { 'lat': cur_lat, 'lng': cur_lng }
         
+    def _fetch_station_trains(self, station_code: str, limit: int) -> List[Dict]:
+        """
+        Fetch every page of the train list matching one station code
+
+        Raises:
+            requests.RequestException: If a page cannot be fetched (after retries)
+        """
+        url = f"{self.base_url}/trains/list"
+        station_trains: List[Dict] = []
+        for page in range(1, MAX_PAGES + 1):
+            params = {
+                'page': page,
+                'limit': limit,
+                'search': station_code
+            }
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+
+            data = response.json()
+            # The API returns data in a nested structure
+            if 'data' in data and 'trains' in data['data']:
+                body = data['data']
+            else:
+                body = data
+            trains = body.get('trains', [])
+
+            # Filter trains that start or end at this station
+            station_trains.extend(
+                train for train in trains
+                if (train.get('source_station_code') == station_code or
+                    train.get('destination_station_code') == station_code)
+            )
+
+            # Follow explicit pagination metadata if present, else stop on a short page
+            pagination = body.get('pagination') or {}
+            total_pages = pagination.get('totalPages') or pagination.get('total_pages')
+            if total_pages is not None:
+                if page >= int(total_pages):
+                    break
+            elif len(trains) < limit:
+                break
+
+        logger.info(f"Found {len(station_trains)} trains for station {station_code}")
+        return station_trains
+
+    def _station_trains(self, station_code: str, limit: int) -> List[Dict]:
+        """Cached, coalesced _fetch_station_trains(); errors are logged and yield no trains"""
+        ttl, stale_ttl = UPSTREAM_TTLS['trains/list']
+        try:
+            return self.upstream_cache.get(('trains/list', station_code, limit),
+                                           lambda: self._fetch_station_trains(station_code, limit),
+                                           ttl=ttl, stale_ttl=stale_ttl)
+        except Exception as e:
+            logger.error(f"Error processing station {station_code}: {e}")
+            return []
+
     def get_trains_by_stations(self, station_codes: List[str], limit: int = 100) -> List[Dict]:
         """
         Get trains that start or end at specific stations
+
+        Stations are fetched concurrently (up to max_workers at once) over the
+        shared keep-alive session, so the total time is close to the slowest
+        station rather than the sum of all of them. Each station's list is
+        cached per UPSTREAM_TTLS, so overlapping station sets share fetches.
         """
-        all_trains = []
-        
-        for station_code in station_codes:
-            try:
-                # Search for trains starting from this station
-                url = f"{self.base_url}/trains/list"
-                params = {
-                    'page': 1,
-                    'limit': limit,
-                    'search': station_code
-                }
-                
-                response = requests.get(url, headers=self.headers, params=params)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    # The API returns data in a nested structure
-                    if 'data' in data and 'trains' in data['data']:
-                        trains = data['data']['trains']
-                    else:
-                        trains = data.get('trains', [])
-                    
-                    # Filter trains that start or end at this station
-                    station_trains = [
-                        train for train in trains 
-                        if (train.get('source_station_code') == station_code or 
-                            train.get('destination_station_code') == station_code)
-                    ]
-                    
-                    all_trains.extend(station_trains)
-                    logger.info(f"Found {len(station_trains)} trains for station {station_code}")
-                else:
-                    logger.error(f"Error fetching trains for {station_code}: {response.status_code}")
-                    
-            except Exception as e:
-                logger.error(f"Error processing station {station_code}: {e}")
-                
+        codes = list(dict.fromkeys(station_codes))
+        if not codes:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(codes)),
+                                thread_name_prefix='railradar') as executor:
+            # map() keeps station order, so de-duplication below is deterministic
+            results = list(executor.map(lambda code: self._station_trains(code, limit), codes))
+
         # Remove duplicates based on train_number
         unique_trains = {}
-        for train in all_trains:
-            train_num = train.get('train_number')
-            if train_num and train_num not in unique_trains:
-                unique_trains[train_num] = train
+        for station_trains in results:
+            for train in station_trains:
+                train_num = train.get('train_number')
+                if train_num and train_num not in unique_trains:
+                    unique_trains[train_num] = train
                 
         return list(unique_trains.values())
     
     def get_live_train_locations(self) -> List[Dict]:
         """
         Get live train locations from RailRadar API with demo speed modifications
+
+        Reads the shared clock snapshot; positions are at most one tick old.
+        """
+        return list(self.live_snapshot().trains)
+
+    def live_snapshot(self) -> LiveSnapshot:
+        """Return the latest position snapshot, starting the clock if it is not running"""
+        self._last_read = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and self._clock_thread is not None:
+            return snapshot
+        with self._clock_lock:
+            if self._snapshot is None or self._clock_thread is None:
+                # First read, or the clock stopped while idle: compute this frame inline
+                self._advance()
+                self._clock_thread = threading.Thread(target=self._run_clock, name='train-clock', daemon=True)
+                self._clock_thread.start()
+                logger.info(f"✅ Train position clock started at {self.tick_hz} Hz")
+            return self._snapshot
+
+    def next_snapshot(self, after_seq: int, timeout: float) -> LiveSnapshot:
+        """
+        Wait for a snapshot newer than after_seq
+
+        Args:
+            after_seq: seq of the last snapshot the caller has seen (0 for none)
+            timeout: Seconds to wait for the clock's next tick
+
+        Returns:
+            The latest snapshot; its seq is still after_seq if the timeout expired first
         """
+        snapshot = self.live_snapshot()
+        if snapshot.seq > after_seq:
+            return snapshot
+        with self._clock_tick:
+            self._clock_tick.wait_for(lambda: self._snapshot.seq > after_seq, timeout)
+            return self._snapshot
+
+    def _advance(self):
+        """Advance every train to the current time and publish a new snapshot; caller holds self._clock_lock"""
         # Always return a constant set of trains; only positions update smoothly
         if not self._demo_trains:
             logger.info("Initializing constant live trains set")
             self._demo_trains = self._create_demo_train_data(seed=42)
-        return self._update_positions(self._demo_trains)
-        
+        previous = self._snapshot
+        self._snapshot = LiveSnapshot(
+            seq=(previous.seq + 1) if previous else 1,
+            timestamp=datetime.now().isoformat(),
+            trains=tuple(self._update_positions(self._demo_trains))
+        )
+        self._clock_tick.notify_all()
+
         # Commented out real API for demo
         # try:
         #     url = f"{self.base_url}/trains/live-map"
-        #     response = requests.get(url, headers=self.headers)
+        #     response = self.session.get(url, timeout=self.timeout)
         #     
         #     if response.status_code == 200:
         #         data = response.json()
@@ -212,27 +334,34 @@ class TrainTracker:
         #     logger.error(f"Error fetching live train locations: {e}")
         #     # Return demo data if API fails
         #     return self._apply_demo_speed_modifications(self._create_demo_train_data())
+
+    def _run_clock(self):
+        interval = 1.0 / self.tick_hz
+        started = time.monotonic()
+        while True:
+            # The frame that started the clock was computed inline, so wait before ticking
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+            started = time.monotonic()
+            with self._clock_lock:
+                if started - self._last_read > self.idle_timeout_s:
+                    # Nobody is reading; stop until the next live_snapshot() call
+                    self._clock_thread = None
+                    logger.info("Train position clock idle, stopping")
+                    return
+                try:
+                    self._advance()
+                except Exception as e:
+                    logger.error(f"Train position tick failed: {e}")
     
     def _create_demo_train_data(self, seed: Optional[int] = None) -> List[Dict]:
         """
         Create a constant demo train dataset; details never change
         """
         import random
-        import time
-        import math
         
         if seed is not None:
             random.seed(seed)
 
-        # Station coordinates
-        stations = {
-            'RC': {'name': 'Raichur Jn', 'lat': 16.2079, 'lng': 77.3553},
-            'AGC': {'name': 'Agra Cantt', 'lat': 27.1767, 'lng': 77.9890},
-            'MTJ': {'name': 'Mathura Jn', 'lat': 27.4924, 'lng': 77.6739},
-            'GZB': {'name': 'Ghaziabad', 'lat': 28.6692, 'lng': 77.4538},
-            'NDLS': {'name': 'New Delhi', 'lat': 28.6139, 'lng': 77.2090},
-        }
-        
         # Define routes between stations
         # Diverse, non-overlapping path set so trains don't all share the same segment
         routes = [
@@ -257,8 +386,8 @@ class TrainTracker:
                 progress = (current_time + i * 3600 + j * 1800) % (route['duration'] * 3600) / (route['duration'] * 3600)
                 
                 # Get start and end coordinates
-                start_station = stations[route['from']]
-                end_station = stations[route['to']]
+                start_station = self._station(route['from'])
+                end_station = self._station(route['to'])
                 
                 # Calculate current position (cubic curved interpolation) with unique parameters per-train
                 phase = (i * 2.13 + j * 1.17)
@@ -321,68 +450,132 @@ class TrainTracker:
         logger.info(f"Created {len(demo_trains)} constant trains for live map")
         return demo_trains
     
-    def _update_positions(self, trains: List[Dict]) -> List[Dict]:
-        """
-        Update only position and journey progress deterministically; keep all other details constant
+    def reset_trajectories(self):
+        """Drop the cached curves, e.g. after station coordinates were reloaded"""
+        self._curves = None
+
+    def _build_trajectories(self, trains: List[Dict]) -> Tuple[TrajectoryBatch, np.ndarray]:
+        """Resolve route endpoints once and store every train's curve in one TrajectoryBatch"""
+        n = len(trains)
+        start = np.zeros((n, 2))
+        end = np.zeros((n, 2))
+        located = np.zeros(n, dtype=bool)
+        for row, train in enumerate(trains):
+            start_station = self._station(train['route_from'])
+            end_station = self._station(train['route_to'])
+            if start_station and end_station:
+                start[row] = (start_station['lat'], start_station['lng'])
+                end[row] = (end_station['lat'], end_station['lng'])
+                located[row] = True
+
+        # Deterministic, per-train speed factors, offsets and curve shapes to avoid sync
+        idx = np.arange(n)
+        batch = TrajectoryBatch(
+            start, end,
+            phase=idx * 0.91 + 1.37,
+            scale1=0.7 + 0.2 * ((idx % 4) - 1),
+            scale2=0.6 + 0.25 * (((idx + 1) % 4) - 1),
+            along1=0.25 + 0.15 * ((idx % 3) / 2),
+            along2=0.65 - 0.15 * (((idx + 1) % 3) / 2),
+            speed=6.0 + (idx % 9),  # 6..14 different speeds
+            offset=(idx * 13) % 100,
+        )
+        self._curves = (batch, located)
+        return self._curves
+
+    def get_trajectories(self, points: int = 32, station_codes: Optional[List[str]] = None) -> List[Dict]:
         """
-        import time
-        import math
+        Arc-length polylines of every live train's route, for client-side interpolation
 
-        current_time = time.time()
+        A train's position at epoch time `t` is the point at arc fraction
+        ((t * progress_rate + progress_offset) % 100) / 100 along its polyline.
 
-        stations = {
-            'RC': {'lat': 16.2079, 'lng': 77.3553},
-            'AGC': {'lat': 27.1767, 'lng': 77.9890},
-            'MTJ': {'lat': 27.4924, 'lng': 77.6739},
-            'GZB': {'lat': 28.6692, 'lng': 77.4538},
-            'NDLS': {'lat': 28.6139, 'lng': 77.2090},
-        }
+        Args:
+            points: Points per polyline, spaced evenly by distance along the curve
+            station_codes: Only trains whose route starts or ends at one of these codes
+        """
+        self.live_snapshot()  # Creates the demo fleet on first use
+        trains = self._demo_trains
+        curves = self._curves
+        if curves is None or len(curves[0]) != len(trains):
+            curves = self._build_trajectories(trains)
+        batch, located = curves
+        target = {s.upper() for s in station_codes} if station_codes else None
+
+        trajectories: List[Dict] = []
+        for row, train in enumerate(trains):
+            if not located[row]:
+                continue
+            if target and str(train.get('route_from', '')).upper() not in target \
+                    and str(train.get('route_to', '')).upper() not in target:
+                continue
+            polyline, arc = batch.polyline_for(row, points)
+            trajectories.append({
+                'train_number': train['train_number'],
+                'route_from': train['route_from'],
+                'route_to': train['route_to'],
+                'color_hex': train.get('color_hex'),
+                'polyline': np.round(polyline, 5).tolist(),
+                'arc': np.round(arc, 5).tolist(),
+                'progress_rate': float(batch.speed[row]),
+                'progress_offset': float(batch.offset[row])
+            })
+        return trajectories
+
+    def _update_positions(self, trains: List[Dict], now: Optional[float] = None) -> List[Dict]:
+        """
+        Update only position and journey progress deterministically; keep all other details constant
+
+        Progress, positions and status for the whole fleet are evaluated in one
+        vectorized pass; only building the output dicts is per train.
+        """
+        current_time = time.time() if now is None else now
+        curves = self._curves
+        if curves is None or len(curves[0]) != len(trains):
+            curves = self._build_trajectories(trains)
+        batch, located = curves
+
+        progress, coords = batch.at(current_time)
+        p = progress / 100.0
+
+        # Status logic varies by position and per-train phase
+        phase_mod = (np.arange(len(trains)) * 0.37) % 1.0
+        halted = ((0.88 < p) & (p < 0.95)) | ((0.05 < p) & (p < 0.12))
+        on_time = ~halted & ((((0.3 < p) & (p < 0.35)) & (phase_mod > 0.5)) |
+                             (((0.62 < p) & (p < 0.67)) & (phase_mod < 0.5)))
+
+        located = located.tolist()
+        progress_pct = progress.astype(np.int64).tolist()
+        fractions = p.tolist()
+        lats = coords[:, 0].tolist()
+        lngs = coords[:, 1].tolist()
+        halted = halted.tolist()
+        on_time = on_time.tolist()
 
         updated: List[Dict] = []
         for idx, train in enumerate(trains):
             t = train.copy()
-            # Deterministic, per-train speed factors and offsets to avoid sync
-            base_speed = 6.0 + (idx % 9)  # 6..14 different speeds
-            offset = (idx * 13) % 100
-            accelerated_progress = (current_time * base_speed + offset) % 100
-            t['journey_progress'] = int(accelerated_progress)
-
-            start_station = stations.get(train['route_from'])
-            end_station = stations.get(train['route_to'])
-            if start_station and end_station:
-                p = accelerated_progress / 100.0
-                # Use cubic curved path per train with unique parameters
-                phase = (idx * 0.91 + 1.37)
-                curve = self._curved_position_cubic(
-                    start_station,
-                    end_station,
-                    p,
-                    phase,
-                    scale1=0.7 + 0.2 * ((idx % 4) - 1),
-                    scale2=0.6 + 0.25 * (((idx + 1) % 4) - 1),
-                    along1=0.25 + 0.15 * ((idx % 3) / 2),
-                    along2=0.65 - 0.15 * (((idx + 1) % 3) / 2),
-                )
-                t['current_lat'] = curve['lat']
-                t['current_lng'] = curve['lng']
+            t['journey_progress'] = progress_pct[idx]
+
+            if located[idx]:
+                t['current_lat'] = lats[idx]
+                t['current_lng'] = lngs[idx]
 
-                if p < 0.1:
+                if fractions[idx] < 0.1:
                     t['current_station'] = train['route_from']
                     t['current_station_name'] = f"Departing from {train['route_from']}"
-                elif p > 0.9:
+                elif fractions[idx] > 0.9:
                     t['current_station'] = train['route_to']
                     t['current_station_name'] = f"Arriving at {train['route_to']}"
                 else:
                     t['current_station'] = f"{train['route_from']}-{train['route_to']}"
                     t['current_station_name'] = f"En route {train['route_from']} to {train['route_to']}"
 
-            # Status logic varies by position and per-train phase
-            phase_mod = (idx * 0.37) % 1.0
-            if 0.88 < p < 0.95 or 0.05 < p < 0.12:
+            if halted[idx]:
                 t['halt_mins'] = 1
                 t['demo_status'] = 'BRIEF_HALT'
                 t['speed_kmph'] = 0
-            elif (0.3 < p < 0.35 and phase_mod > 0.5) or (0.62 < p < 0.67 and phase_mod < 0.5):
+            elif on_time[idx]:
                 t['halt_mins'] = 0
                 t['demo_status'] = 'ON_TIME'
                 t['speed_kmph'] = min(max(train.get('speed_kmph', 80), 60), 120)
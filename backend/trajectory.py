@@ -0,0 +1,176 @@
+"""
+Vectorized cubic Bezier trajectories for a whole fleet of trains.
+Control points are stored in NumPy arrays so positions for every train, at one
+timestamp or a range of timestamps, come out of a single array expression.
+Each curve is also flattened once into a dense polyline with an arc-length
+table, so journey progress maps to distance travelled rather than to the
+Bezier parameter and trains move at an even speed along their curves.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Polyline segments per curve used for the arc-length table
+ARC_SAMPLES = 128
+
+
+class TrajectoryBatch:
+    def __init__(self, start: np.ndarray, end: np.ndarray, phase: np.ndarray, scale1: np.ndarray,
+                 scale2: np.ndarray, along1: np.ndarray, along2: np.ndarray,
+                 speed: np.ndarray, offset: np.ndarray, samples: int = ARC_SAMPLES):
+        """
+        Precompute both control points of every train's curve
+
+        Shapes follow TrainTracker._curved_position_cubic(): control points sit at
+        along1/along2 of the start->end segment, offset perpendicular by
+        scale1/scale2 and skewed along the segment, all varying with phase.
+
+        Args:
+            start, end: (n, 2) arrays of [lat, lng] route endpoints
+            phase, scale1, scale2, along1, along2: (n,) per-train curve parameters
+            speed: (n,) journey progress in percent per second
+            offset: (n,) journey progress in percent at time 0
+            samples: Polyline segments per curve for the arc-length table
+        """
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.speed = np.asarray(speed, dtype=np.float64)
+        self.offset = np.asarray(offset, dtype=np.float64)
+        phase = np.asarray(phase, dtype=np.float64)
+
+        dv = self.end - self.start
+        length = np.hypot(dv[:, 0], dv[:, 1])
+        length[length == 0] = 1.0
+        tangent = dv / length[:, None]
+        perp = np.stack([-tangent[:, 1], tangent[:, 0]], axis=1)
+
+        skew1 = 0.15 * np.cos(phase * 0.7)
+        skew2 = -0.18 * np.sin(phase * 0.9)
+        # Perpendicular offsets use sin/cos per component, so each control point gets its own (lat, lng) wobble
+        wobble1 = np.stack([np.sin(phase), np.cos(phase)], axis=1) * np.asarray(scale1)[:, None]
+        wobble2 = np.stack([np.cos(phase * 1.3), np.sin(phase * 1.3)], axis=1) * np.asarray(scale2)[:, None]
+
+        self.c1 = self.start + dv * np.asarray(along1)[:, None] + perp * wobble1 + tangent * skew1[:, None]
+        self.c2 = self.start + dv * np.asarray(along2)[:, None] + perp * wobble2 + tangent * skew2[:, None]
+
+        # Dense polyline (n, samples + 1, 2) and its cumulative arc length normalized to 0..1 per train.
+        # Longitude is scaled by cos(latitude) so lengths are proportional to ground distance.
+        self.samples = samples
+        self.polyline = self.positions(np.repeat(np.linspace(0.0, 1.0, samples + 1)[:, None], len(self), axis=1)) \
+            .transpose(1, 0, 2)
+        step = np.diff(self.polyline, axis=1)
+        lng_scale = np.cos(np.radians(self.polyline[:, :-1, 0] + step[:, :, 0] / 2))
+        seg = np.hypot(step[:, :, 0], step[:, :, 1] * lng_scale)
+        arc = np.concatenate([np.zeros((len(self), 1)), np.cumsum(seg, axis=1)], axis=1)
+        total = arc[:, -1:]
+        # Zero-length curves (start == end) fall back to an even split so lookups stay defined
+        self.arc = np.where(total > 0, arc / np.where(total > 0, total, 1.0),
+                            np.linspace(0.0, 1.0, samples + 1)[None, :])
+        self.length_deg = total[:, 0]
+        # Arc tables concatenated with row r shifted by 2 * r, so a single sorted array covers the fleet
+        self._shifted_arc = (self.arc + 2.0 * np.arange(len(self))[:, None]).ravel()
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def progress(self, timestamps) -> np.ndarray:
+        """
+        Journey progress in percent (0-100) for every train
+
+        Args:
+            timestamps: A scalar epoch time, or a (m,) array of times
+
+        Returns:
+            (n,) array for a scalar time, (m, n) array for m times
+        """
+        times = np.asarray(timestamps, dtype=np.float64)
+        if times.ndim:
+            times = times[:, None]
+        return np.mod(times * self.speed + self.offset, 100.0)
+
+    def positions(self, t: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Evaluate the curves at fractions t in [0, 1]
+
+        Args:
+            t: (n,) or (m, n) curve parameters, one column per train
+            rows: Optional train rows to evaluate (t then has len(rows) columns)
+
+        Returns:
+            Array of shape t.shape + (2,) holding [lat, lng]
+        """
+        start, c1, c2, end = (self.start, self.c1, self.c2, self.end) if rows is None else \
+            (self.start[rows], self.c1[rows], self.c2[rows], self.end[rows])
+        t = np.asarray(t, dtype=np.float64)[..., None]
+        u = 1.0 - t
+        return u * u * u * start + 3 * u * u * t * c1 + 3 * u * t * t * c2 + t * t * t * end
+
+    def along(self, fractions: np.ndarray) -> np.ndarray:
+        """
+        Positions at fractions of each curve's arc length
+
+        One searchsorted over the concatenated arc tables (each train's row
+        shifted by 2 * row so the whole table is sorted) finds every segment,
+        followed by a linear interpolation inside it.
+
+        Args:
+            fractions: (n,) or (m, n) distance fractions in [0, 1], one column per train
+
+        Returns:
+            Array of shape fractions.shape + (2,) holding [lat, lng]
+        """
+        fractions = np.clip(np.asarray(fractions, dtype=np.float64), 0.0, 1.0)
+        n = len(self)
+        points = self.samples + 1
+        rows = np.broadcast_to(np.arange(n), fractions.shape)
+
+        flat = np.searchsorted(self._shifted_arc, (fractions + 2.0 * rows).ravel(), side='right') - 1
+        segment = np.clip(flat.reshape(fractions.shape) - rows * points, 0, self.samples - 1)
+
+        arc0 = self.arc[rows, segment]
+        arc1 = self.arc[rows, segment + 1]
+        span = arc1 - arc0
+        weight = np.where(span > 0, (fractions - arc0) / np.where(span > 0, span, 1.0), 0.0)[..., None]
+        p0 = self.polyline[rows, segment]
+        p1 = self.polyline[rows, segment + 1]
+        return p0 + (p1 - p0) * weight
+
+    def at(self, timestamp: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Progress and position of every train at one time
+
+        Returns:
+            ((n,) progress percent, (n, 2) [lat, lng])
+        """
+        progress = self.progress(timestamp)
+        return progress, self.along(progress / 100.0)
+
+    def over(self, timestamps) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Progress and position of every train at each of m times
+
+        Returns:
+            ((m, n) progress percent, (m, n, 2) [lat, lng])
+        """
+        progress = self.progress(np.atleast_1d(timestamps))
+        return progress, self.along(progress / 100.0)
+
+    def polyline_for(self, row: int, points: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        A train's polyline resampled at evenly spaced arc-length fractions
+
+        Args:
+            row: Train row
+            points: Number of points to return (defaults to the full table)
+
+        Returns:
+            ((points, 2) [lat, lng], (points,) arc-length fractions)
+        """
+        if points is None or points >= self.samples + 1:
+            return self.polyline[row], self.arc[row]
+        fractions = np.linspace(0.0, 1.0, max(2, points))
+        arc = self.arc[row]
+        lat = np.interp(fractions, arc, self.polyline[row, :, 0])
+        lng = np.interp(fractions, arc, self.polyline[row, :, 1])
+        return np.stack([lat, lng], axis=1), fractions
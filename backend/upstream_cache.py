@@ -0,0 +1,113 @@
+"""
+In-process cache for upstream API responses (RailRadar).
+Entries have a TTL and an extra stale-while-revalidate window; concurrent
+misses for the same key share one upstream call (single-flight), and the
+least recently used entries are evicted beyond a size bound.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ('value', 'fetched_at', 'ttl', 'stale_ttl')
+
+    def __init__(self, value: Any, ttl: float, stale_ttl: float):
+        self.value = value
+        self.fetched_at = time.monotonic()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class UpstreamCache:
+    def __init__(self, max_entries: int = 512, refresh_workers: int = 4):
+        """
+        Args:
+            max_entries: Least recently used entries beyond this are evicted
+            refresh_workers: Threads used for stale-while-revalidate refreshes
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='upstream-refresh')
+        self.stats = {'hits': 0, 'stale': 0, 'misses': 0, 'coalesced': 0, 'fetches': 0}
+
+    def get(self, key: Hashable, fetch: Callable[[], Any], ttl: float, stale_ttl: float = 0.0) -> Any:
+        """
+        Return the value for key, calling fetch() only when needed
+
+        - Fresh (age < ttl): served from cache
+        - Stale (age < ttl + stale_ttl): served from cache while one background refresh runs
+        - Missing or expired: fetched; concurrent callers for the same key wait for that one fetch
+
+        Exceptions from a foreground fetch propagate to every waiting caller and
+        nothing is cached. A failed background refresh keeps the stale value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = entry.age()
+                if age < entry.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry.value
+                if age < entry.ttl + entry.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.stats['stale'] += 1
+                    if key not in self._inflight:
+                        self._inflight[key] = self._refresher.submit(self._fill, key, fetch, ttl, stale_ttl)
+                    return entry.value
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.stats['misses'] += 1
+                future = self._inflight[key] = Future()
+            else:
+                self.stats['coalesced'] += 1
+
+        if owner:
+            # This caller performs the fetch for everyone waiting on the key
+            try:
+                future.set_result(self._fill(key, fetch, ttl, stale_ttl))
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()
+
+    def _fill(self, key: Hashable, fetch: Callable[[], Any], ttl: float, stale_ttl: float) -> Any:
+        try:
+            value = fetch()
+        except Exception as e:
+            logger.error(f"Upstream fetch for {key!r} failed: {e}")
+            with self._lock:
+                self._inflight.pop(key, None)
+            raise
+        with self._lock:
+            self.stats['fetches'] += 1
+            self._entries[key] = _Entry(value, ttl, stale_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            # Store before clearing the in-flight marker so no caller can slip in a second fetch
+            self._inflight.pop(key, None)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one key, or every entry"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)